@@ -0,0 +1,144 @@
+# Memory / dispatch comparison between the __slots__ AST nodes and the old dict-based tree
+#   python benchmarks/bench_ast.py [number of repetitions of the sample program]
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from drawpp import Tokenizer, Parser, Node, DrawCommand, NodeVisitor  # noqa: E402
+
+SAMPLE = """x -> 10
+si x ==> 10 {
+    drawSquare(x, 20, 30)
+    afficher("x = %d", x)
+} sinon {
+    tantque x > 0 { x -> x - 1 drawLine(0, 0, x, x) }
+}
+pour i de 0 à 3 {
+    drawCircle(i * 10, 200, 5 + i)
+    drawArc(400, 400, 50, 0, 90)
+    moveCursor(1, 2)
+    rotateCursor(45)
+}
+"""
+
+
+# Old representation of the tree : one dict per node, "type" key used for the dispatch
+def to_dict(node):
+    if isinstance(node, DrawCommand):
+        return {"type": node.token_type, "params": [to_dict(param) for param in node.params]}
+    result = {"type": type(node).__name__}
+    for name in node.fields():
+        value = getattr(node, name)
+        key = {"then_branch": "then", "else_branch": "else"}.get(name, name)
+        if isinstance(value, Node):
+            value = to_dict(value)
+        elif isinstance(value, list):
+            value = [to_dict(item) for item in value]
+        result[key] = value
+    return result
+
+
+# Walk of the dict tree through the same elif chain as the old CTranslator.translate
+def count_dict(ast):
+    if ast["type"] == "Program":
+        return 1 + sum(count_dict(statement) for statement in ast["body"])
+    elif ast["type"] == "IfStatement":
+        total = 1 + count_dict(ast["condition"]) + count_dict(ast["then"])
+        return total + (count_dict(ast["else"]) if ast.get("else") else 0)
+    elif ast["type"] == "Assignment":
+        return 1 + count_dict(ast["value"])
+    elif ast["type"] == "PrintStatement":
+        return 1 + sum(count_dict(value) for value in ast["values"])
+    elif ast["type"] == "ForLoop":
+        return 1 + count_dict(ast["start"]) + count_dict(ast["end"]) + count_dict(ast["body"])
+    elif ast["type"] == "WhileLoop":
+        return 1 + count_dict(ast["condition"]) + count_dict(ast["body"])
+    elif ast["type"] == "BinaryExpression":
+        return 1 + count_dict(ast["left"]) + count_dict(ast["right"])
+    elif ast["type"] == "Literal":
+        return 1
+    elif ast["type"] == "Variable":
+        return 1
+    elif ast["type"] in ("DRAW_LINE", "DRAW_SQUARE", "DRAW_CIRCLE", "DRAW_ARC",
+                         "DRAW_CURSOR", "MOVE_CURSOR", "ROTATE_CURSOR"):
+        return 1 + sum(count_dict(param) for param in ast["params"])
+    raise ValueError(ast["type"])
+
+
+class NodeCounter(NodeVisitor):
+    def visit_Program(self, node):
+        return 1 + sum(self.visit(statement) for statement in node.body)
+
+    def visit_IfStatement(self, node):
+        total = 1 + self.visit(node.condition) + self.visit(node.then_branch)
+        return total + (self.visit(node.else_branch) if node.else_branch else 0)
+
+    def visit_Assignment(self, node):
+        return 1 + self.visit(node.value)
+
+    def visit_PrintStatement(self, node):
+        return 1 + sum(self.visit(value) for value in node.values)
+
+    def visit_ForLoop(self, node):
+        return 1 + self.visit(node.start) + self.visit(node.end) + self.visit(node.body)
+
+    def visit_WhileLoop(self, node):
+        return 1 + self.visit(node.condition) + self.visit(node.body)
+
+    def visit_BinaryExpression(self, node):
+        return 1 + self.visit(node.left) + self.visit(node.right)
+
+    def visit_Literal(self, node):
+        return 1
+
+    def visit_Variable(self, node):
+        return 1
+
+    def visit_DrawCommand(self, node):
+        return 1 + sum(self.visit(param) for param in node.params)
+
+
+# Size of the objects allocated while building the tree
+def measure(build):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    tree = build()
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return tree, size
+
+
+def best_time(function, arg, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(arg)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    repetitions = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    code = SAMPLE * repetitions
+    tokens = Tokenizer(code).tokenize()
+
+    nodes, nodes_size = measure(lambda: Parser(tokens).parse())
+    dicts, dicts_size = measure(lambda: to_dict(nodes))
+
+    count = NodeCounter().visit(nodes)
+    assert count == count_dict(dicts)
+    nodes_time = best_time(NodeCounter().visit, nodes)
+    dicts_time = best_time(count_dict, dicts)
+
+    print(f"source : {len(code)} chars, {len(tokens)} tokens, {count} AST nodes")
+    print(f"{'':8}{'bytes/node':>12}{'total (MB)':>12}{'nodes/s':>14}")
+    for name, size, elapsed in (("slots", nodes_size, nodes_time), ("dicts", dicts_size, dicts_time)):
+        print(f"{name:8}{size / count:12.1f}{size / 1e6:12.2f}{count / elapsed:14.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# Native build of generated programs against the stub SDL of sdl_stub/ : every C file compiled whole
+# (prelude included, as before drawpp.build), then with NativeBuilder (prelude object compiled once),
+# with an empty cache and again with the cache filled. Builds run jobs at a time.
+#   python benchmarks/bench_build.py [--programs 32] [--size 20K] [-j 4] [--cc gcc]
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from drawpp import CompileCache, compile_to_file  # noqa: E402
+from drawpp.build import NativeBuilder, stub_sdl_options, executable_path_for  # noqa: E402
+from bench_pipeline import generate, parse_size  # noqa: E402
+
+STUB_DIR = os.path.join(ROOT, "sdl_stub")
+PRELUDE = os.path.join(ROOT, "forme.c")
+
+
+# Every C file compiled and linked in one compiler call, as the programs were built by hand
+def build_whole(c_paths, compiler, cflags, jobs):
+    def build(c_path):
+        subprocess.run([compiler, *cflags, "-I", STUB_DIR, c_path, os.path.join(STUB_DIR, "sdl_stub.c"),
+                        "-o", executable_path_for(c_path), "-lm"], check=True)
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        list(pool.map(build, c_paths))
+
+
+def build_split(c_paths, builder, jobs):
+    failures = [error for _, error in builder.build_all(c_paths, jobs) if error]
+    if failures:
+        raise RuntimeError(failures[0])
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compilation native des programmes générés, avec la SDL factice.")
+    parser.add_argument("--programs", type=int, default=32, help="nombre de programmes générés")
+    parser.add_argument("--size", default="20K", help="taille de chaque programme en caractères")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(), help="compilations en parallèle")
+    parser.add_argument("--cc", default=os.environ.get("CC", "gcc"), help="compilateur C (défaut : gcc)")
+    parser.add_argument("--cflags", default="-O2", help="options du compilateur (défaut : -O2)")
+    args = parser.parse_args(argv)
+
+    if shutil.which(args.cc) is None:
+        print(f"Compilateur introuvable : {args.cc}", file=sys.stderr)
+        return 1
+    cflags = args.cflags.split()
+    with tempfile.TemporaryDirectory() as directory:
+        c_paths = []
+        for seed in range(args.programs):
+            c_path = os.path.join(directory, f"programme{seed}.c")
+            compile_to_file(generate("straight", parse_size(args.size), seed), c_path, PRELUDE)
+            c_paths.append(c_path)
+        builder = NativeBuilder(PRELUDE, CompileCache(os.path.join(directory, "cache")), args.cc, cflags,
+                                **stub_sdl_options(STUB_DIR))
+
+        results = [
+            ("fichier entier", timed(build_whole, c_paths, args.cc, cflags, args.jobs)),
+            ("prélude compilé à part", timed(build_split, c_paths, builder, args.jobs)),
+            ("depuis le cache", timed(build_split, c_paths, builder, args.jobs)),
+        ]
+    print(f"{args.programs} programmes de {args.size}, {args.jobs} compilation(s) en parallèle")
+    for label, seconds in results:
+        print(f"  {label:24}{seconds:9.3f} s{seconds / args.programs * 1000:10.1f} ms/programme"
+              f"{results[0][1] / seconds:8.1f}x")
+    print(f"  objets compilés {builder.stats['compiled']}, réutilisés {builder.stats['reused']}, "
+          f"exécutables liés {builder.stats['linked']}, depuis le cache {builder.stats['cached']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
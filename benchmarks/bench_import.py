@@ -0,0 +1,49 @@
+# Cold start of the compiler core, measured like "python -X importtime -c 'import drawpp'"
+#   python benchmarks/bench_import.py [budget in ms] [module]
+# Exit code 1 if the import takes longer than the budget or pulls in tkinter.
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# (self µs, cumulative µs, module) for every module imported by "import <module>" in a fresh interpreter
+def import_times(module):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    times = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        times.append((int(self_us), int(cumulative_us), name.strip()))
+    return times
+
+
+def main():
+    budget_ms = float(sys.argv[1]) if len(sys.argv) > 1 else 50.0
+    module = sys.argv[2] if len(sys.argv) > 2 else "drawpp"
+
+    times = import_times(module)
+    total_ms = next(cumulative for _, cumulative, name in times if name == module) / 1000
+    names = {name for _, _, name in times}
+
+    print(f"import {module} : {total_ms:.1f} ms (budget {budget_ms:.1f} ms), {len(times)} modules")
+    for self_us, cumulative_us, name in sorted(times, reverse=True)[:10]:
+        print(f"  {self_us / 1000:8.2f} ms self {cumulative_us / 1000:8.2f} ms cumulative  {name}")
+
+    failed = False
+    if total_ms > budget_ms:
+        print(f"ÉCHEC : {total_ms:.1f} ms > {budget_ms:.1f} ms")
+        failed = True
+    if "tkinter" in names:
+        print(f"ÉCHEC : import {module} charge tkinter")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
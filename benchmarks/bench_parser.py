@@ -0,0 +1,102 @@
+# Parser of the working tree against the one of a git revision (by default the recursive parser, from
+# before the commit adding this benchmark) : nodes/s on the generated programs of bench_pipeline, then
+# the time to parse blocks nested deeper and deeper.
+#   python benchmarks/bench_parser.py [--baseline REV] [--sizes 10K,100K,1M] [--depths 10,100,1000,10000]
+# The baseline parser is read with "git show REV:drawpp/parser.py" and imported next to the current
+# drawpp modules : it has to use the same nodes. A parser failing on a depth shows its error.
+import argparse
+import os
+import subprocess
+import sys
+import time
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(1, os.path.join(ROOT, "tests"))  # programs of the tests
+
+from drawpp import Tokenizer, Parser, walk  # noqa: E402
+from bench_pipeline import SHAPES, generate, parse_size, format_size  # noqa: E402
+from programs import nested_program  # noqa: E402
+
+
+def git(*args):
+    return subprocess.run(["git", *args], cwd=ROOT, check=True, capture_output=True, text=True).stdout
+
+
+# Revision before the commit that added this file : the parser it replaced
+def default_baseline():
+    added = git("log", "--diff-filter=A", "--format=%H", "-1", "--", "benchmarks/bench_parser.py").strip()
+    return f"{added}~1" if added else "HEAD"
+
+
+def load_baseline(revision):
+    source = git("show", f"{revision}:drawpp/parser.py")
+    module = types.ModuleType("drawpp.baseline_parser")
+    module.__package__ = "drawpp"  # for its relative imports
+    exec(compile(source, f"{revision}:drawpp/parser.py", "exec"), module.__dict__)
+    return module.Parser
+
+
+def best_time(function, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+# Seconds to parse tokens, or the error raised
+def parse_time(parser_class, tokens, repeat):
+    try:
+        return best_time(lambda: parser_class(tokens).parse(), repeat)
+    except (RecursionError, SyntaxError) as e:
+        return e
+
+
+def format_time(result):
+    return f"{result * 1000:.1f} ms" if isinstance(result, float) else type(result).__name__
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare l'analyseur syntaxique actuel à celui d'une révision git.")
+    parser.add_argument("--baseline", help="révision git de référence (par défaut, celle d'avant l'ajout de ce banc "
+                                           "d'essai : l'analyseur récursif)")
+    parser.add_argument("--sizes", default="10K,100K,1M", help="tailles des programmes générés en caractères")
+    parser.add_argument("--depths", default="10,100,1000,10000,100000", help="profondeurs d'imbrication des blocs")
+    parser.add_argument("--repeat", type=int, default=3, help="mesures par programme (la meilleure est gardée)")
+    args = parser.parse_args(argv)
+    revision = args.baseline or default_baseline()
+    baseline = load_baseline(revision)
+    print(f"référence : {git('rev-parse', '--short', revision).strip()} ({revision})\n")
+
+    print(f"{'forme':10}{'taille':>8}{'nœuds':>10}{'référence':>18}{'actuel':>14}{'accélération':>14}")
+    for shape in SHAPES:
+        for size in map(parse_size, args.sizes.split(",")):
+            tokens = Tokenizer(generate(shape, size)).tokenize()
+            nodes = sum(1 for _ in walk(Parser(tokens).parse()))
+            before = parse_time(baseline, tokens, args.repeat)
+            after = parse_time(Parser, tokens, args.repeat)
+            speedup = f"{before / after:.2f}x" if isinstance(before, float) else "-"
+            print(f"{shape:10}{format_size(size):>8}{nodes:>10}{format_time(before):>18}{format_time(after):>14}"
+                  f"{speedup:>14}")
+
+    print(f"\n{'profondeur':>10}{'tokens':>10}{'référence':>18}{'actuel':>14}{'actuel / token':>16}")
+    failure = None  # (depth, error) of the first depth the baseline could not parse
+    for depth in map(int, args.depths.split(",")):
+        tokens = Tokenizer(nested_program(depth)).tokenize()
+        before = parse_time(baseline, tokens, 1)
+        if failure is None and not isinstance(before, float):
+            failure = depth, before
+        after = parse_time(Parser, tokens, 1)
+        per_token = f"{after / len(tokens) * 1e6:.2f} µs" if isinstance(after, float) else "-"
+        print(f"{depth:>10}{len(tokens):>10}{format_time(before):>18}{format_time(after):>14}{per_token:>16}")
+    if failure is not None:
+        print(f"\nLa référence échoue à partir de la profondeur {failure[0]} : {type(failure[1]).__name__} "
+              f"au lieu d'une mesure")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+# Scaling of the compiler front end on generated programs : Tokenizer.tokenize, Parser.parse and
+# CTranslator.emit timed on seeded synthetic .draw sources of growing size, results in JSON.
+#   python benchmarks/bench_pipeline.py [--sizes 1K,10K,100K,1M,10M] [--shapes straight,nested,wide,print]
+#                                       [--seed 0] [--depth 1000] [--terms 1000]
+#                                       [-o results.json] [--compare baseline.json]
+#   python benchmarks/bench_pipeline.py --generate nested --sizes 100K > programme.draw
+# With --compare, exit code 1 when a throughput dropped, or the peak memory grew, by more than
+# --tolerance against the baseline. In every run, a throughput falling much lower at
+# the largest size than at the middle one is reported as a non linear stage.
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from drawpp import __version__, Tokenizer, Parser, CTranslator, walk  # noqa: E402
+
+SHAPES = ("straight", "nested", "wide", "print")
+SIZE_UNITS = {"K": 1000, "M": 1000 ** 2}
+METRICS = ("tokens_per_s", "nodes_per_s", "c_bytes_per_s")  # throughputs, higher is better
+LINEARITY_LIMIT = 0.5  # throughput at the largest size / at the middle one below this : non linear
+NESTED_DEPTH = 1000  # blocks one inside the other in a "nested" statement
+WIDE_TERMS = 1000  # operands of the assignments of a "wide" statement (a quarter in its draw calls)
+INDENT_LIMIT = 32  # deeper levels are not indented more : the source stays mostly code
+
+
+# "10K" -> 10000
+def parse_size(text):
+    unit = SIZE_UNITS.get(text[-1].upper())
+    return int(float(text[:-1]) * unit) if unit else int(text)
+
+
+def format_size(size):
+    for suffix, unit in (("M", SIZE_UNITS["M"]), ("K", SIZE_UNITS["K"])):
+        if size >= unit and size % unit == 0:
+            return f"{size // unit}{suffix}"
+    return str(size)
+
+
+# --- Seeded generators : every call returns one top-level statement (a few lines)
+
+def expression(rng, names, terms):
+    parts = [str(rng.randint(0, 800)) if not names or rng.random() < 0.5 else rng.choice(names)]
+    for _ in range(terms - 1):
+        parts.append(rng.choice("+-*/"))
+        parts.append(str(rng.randint(1, 99)) if rng.random() < 0.5 or not names else rng.choice(names))
+    return " ".join(parts)
+
+
+def draw_call(rng, names, terms=1):
+    function, count = rng.choice((("drawSquare", 3), ("drawCircle", 3), ("drawLine", 4), ("drawArc", 5),
+                                  ("drawCursor", 2), ("moveCursor", 2), ("rotateCursor", 1)))
+    return f"{function}({', '.join(expression(rng, names, terms) for _ in range(count))})"
+
+
+# Long straight-line program of draw calls
+def straight_statement(rng, names):
+    return draw_call(rng, names)
+
+
+# si / pour / tantque blocks nested depth levels deep, a draw call at each level. Levels stop before
+# the statement gets longer than max_length characters (one level at least) : the program of a small
+# size is not one statement deeper than that size.
+def nested_statement(rng, names, depth=NESTED_DEPTH, max_length=None):
+    lines = []
+    scope = list(names)
+    length = 0  # of the statement with its closing braces
+    for level in range(depth):
+        indent = " " * min(level, INDENT_LIMIT)  # one space a level
+        closing = len(indent) + 2
+        if level and max_length is not None and length + closing + len(indent) + 40 > max_length:
+            break  # about the shortest level
+        kind = rng.choice(("si", "pour", "tantque"))
+        if kind == "si":
+            lines.append(f"{indent}si {expression(rng, scope, 2)} > {rng.randint(0, 800)} {{")
+        elif kind == "pour":
+            variable = f"i{level}"
+            lines.append(f"{indent}pour {variable} de 0 à {rng.randint(1, 10)} {{")
+            scope.append(variable)
+        else:
+            lines.append(f"{indent}tantque {expression(rng, scope, 2)} < {rng.randint(0, 800)} {{")
+        lines.append(f"{indent}    {draw_call(rng, scope)}")
+        length += len(lines[-2]) + len(lines[-1]) + 2 + closing
+    for level in reversed(range(len(lines) // 2)):
+        lines.append(" " * min(level, INDENT_LIMIT) + "}")
+    return "\n".join(lines)
+
+
+# Assignments and draw calls with long chains of operators
+def wide_statement(rng, names, terms=WIDE_TERMS):
+    if rng.random() < 0.5:
+        return f"{rng.choice(names)} -> {expression(rng, names, terms)}"
+    return draw_call(rng, names, terms // 4)
+
+
+# afficher with format strings and values
+def print_statement(rng, names):
+    if rng.random() < 0.3:
+        return f'afficher("{rng.choice(("Bonjour", "Étape", "Dessin terminé", "x vaut"))} %d", {rng.choice(names)})'
+    return f'afficher("valeur : %d", {expression(rng, names, 3)})'
+
+
+GENERATORS = {
+    "straight": straight_statement,
+    "nested": nested_statement,
+    "wide": wide_statement,
+    "print": print_statement,
+}
+
+
+# Program of the given shape, about size characters long (never less, at least one statement).
+# depth is the nesting of the "nested" statements (less for the last one, or when size is too small
+# for one that deep), terms the length of the operator chains of "wide".
+def generate(shape, size, seed=0, depth=NESTED_DEPTH, terms=WIDE_TERMS):
+    rng = random.Random(f"{shape}-{seed}")
+    names = ["a", "b", "c"]
+    lines = [f"{name} -> {rng.randint(1, 100)}" for name in names]
+    length = sum(len(line) + 1 for line in lines)
+    statement = GENERATORS[shape]
+    options = {"nested": {"depth": depth}, "wide": {"terms": terms}}.get(shape, {})
+    while length < size:
+        if shape == "nested":
+            options["max_length"] = size - length
+        line = statement(rng, names, **options)
+        lines.append(line)
+        length += len(line) + 1
+    return "\n".join(lines) + "\n"
+
+
+# --- Measures
+
+# Sink of the generated C code keeping only its size
+class ByteCounter:
+    def __init__(self):
+        self.count = 0
+
+    def write(self, text):
+        self.count += len(text.encode("utf-8"))
+
+
+# Seconds of every stage of one run, and the sizes they produced
+def run_stages(code):
+    start = time.perf_counter()
+    tokens = Tokenizer(code).tokenize()
+    tokenized = time.perf_counter()
+    ast = Parser(tokens).parse()
+    parsed = time.perf_counter()
+    sink = ByteCounter()
+    CTranslator().emit(ast, sink)
+    translated = time.perf_counter()
+    return {
+        "tokens": len(tokens),
+        "nodes": sum(1 for _ in walk(ast)),
+        "c_bytes": sink.count,
+        "tokenize_s": tokenized - start,
+        "parse_s": parsed - tokenized,
+        "translate_s": translated - parsed,
+    }
+
+
+# Peak of the memory allocated by the three stages, tokens and tree alive together like in a compile
+def peak_memory(code):
+    tracemalloc.start()
+    try:
+        tokens = Tokenizer(code).tokenize()
+        ast = Parser(tokens).parse()
+        CTranslator().emit(ast, ByteCounter())
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def measure(shape, size, seed, repeat, memory, depth=NESTED_DEPTH, terms=WIDE_TERMS):
+    code = generate(shape, size, seed, depth, terms)
+    runs = [run_stages(code) for _ in range(repeat)]
+    result = {"shape": shape, "size": size, "chars": len(code)}
+    result.update({key: runs[0][key] for key in ("tokens", "nodes", "c_bytes")})
+    for stage in ("tokenize_s", "parse_s", "translate_s"):
+        result[stage] = min(run[stage] for run in runs)  # best of the runs : least disturbed
+    result["tokens_per_s"] = result["tokens"] / result["tokenize_s"]
+    result["nodes_per_s"] = result["nodes"] / result["parse_s"]
+    result["c_bytes_per_s"] = result["c_bytes"] / result["translate_s"]
+    result["peak_bytes"] = peak_memory(code) if memory else None
+    return result
+
+
+# --- Reports
+
+def print_table(results, file=sys.stderr):
+    print(f"{'forme':10}{'taille':>8}{'tokens':>10}{'tokens/s':>12}{'nœuds/s':>12}{'octets C/s':>13}"
+          f"{'mémoire max':>14}", file=file)
+    for result in results:
+        peak = f"{result['peak_bytes'] / 1e6:.1f} Mo" if result["peak_bytes"] is not None else "-"
+        print(f"{result['shape']:10}{format_size(result['size']):>8}{result['tokens']:>10}"
+              f"{result['tokens_per_s']:>12.0f}{result['nodes_per_s']:>12.0f}{result['c_bytes_per_s']:>13.0f}"
+              f"{peak:>14}", file=file)
+
+
+# Stages whose throughput at the largest size falls under LINEARITY_LIMIT times the one at the middle
+# size (the smallest sizes are too short to time) : a cost growing faster than the input
+def nonlinear_stages(results):
+    problems = []
+    for shape in dict.fromkeys(result["shape"] for result in results):
+        runs = sorted((result for result in results if result["shape"] == shape), key=lambda r: r["size"])
+        if len(runs) < 3:
+            continue
+        middle, largest = runs[len(runs) // 2], runs[-1]
+        for metric in METRICS:
+            ratio = largest[metric] / middle[metric]
+            if ratio < LINEARITY_LIMIT:
+                problems.append(f"{shape} {metric} : {ratio:.2f}x entre {format_size(middle['size'])} "
+                                f"et {format_size(largest['size'])}")
+    return problems
+
+
+# Regressions of results against the ones of baseline with the same shape and size
+def compare(results, baseline, tolerance):
+    previous = {(result["shape"], result["size"]): result for result in baseline["results"]}
+    regressions = []
+    print(f"\n{'forme':10}{'taille':>8}  {'mesure':15}{'base':>14}{'actuel':>14}{'écart':>9}", file=sys.stderr)
+    for result in results:
+        old = previous.get((result["shape"], result["size"]))
+        if old is None:
+            continue
+        checks = [(metric, 1) for metric in METRICS]
+        if result["peak_bytes"] is not None and old.get("peak_bytes") is not None:
+            checks.append(("peak_bytes", -1))  # lower is better
+        for metric, direction in checks:
+            change = (result[metric] - old[metric]) / old[metric] * direction
+            flag = ""
+            if change < -tolerance:
+                flag = "  RÉGRESSION"
+                regressions.append(f"{result['shape']} {format_size(result['size'])} {metric} : {change:+.0%}")
+            print(f"{result['shape']:10}{format_size(result['size']):>8}  {metric:15}{old[metric]:>14.0f}"
+                  f"{result[metric]:>14.0f}{change:>+9.0%}{flag}", file=sys.stderr)
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Mesure le passage à l'échelle de l'analyseur et de la traduction.")
+    parser.add_argument("--sizes", default="1K,10K,100K,1M,10M", help="tailles des programmes en caractères")
+    parser.add_argument("--shapes", default=",".join(SHAPES), help=f"formes de programmes parmi {', '.join(SHAPES)}")
+    parser.add_argument("--seed", type=int, default=0, help="graine du générateur")
+    parser.add_argument("--depth", type=int, default=NESTED_DEPTH,
+                        help=f"profondeur des blocs de la forme nested (défaut : {NESTED_DEPTH})")
+    parser.add_argument("--terms", type=int, default=WIDE_TERMS,
+                        help=f"opérandes des expressions de la forme wide (défaut : {WIDE_TERMS})")
+    parser.add_argument("--repeat", type=int, default=3, help="mesures par programme (la meilleure est gardée)")
+    parser.add_argument("--no-memory", dest="memory", action="store_false", help="sans mesure de la mémoire")
+    parser.add_argument("-o", "--output", help="fichier JSON des résultats (sortie standard par défaut)")
+    parser.add_argument("--compare", help="fichier JSON de référence : signale les régressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="écart toléré avec la référence (0.2 = 20 %%)")
+    parser.add_argument("--generate", choices=SHAPES, help="écrit seulement le programme généré (première taille)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    sizes = [parse_size(size) for size in args.sizes.split(",")]
+    shapes = args.shapes.split(",")
+    for shape in shapes:
+        if shape not in GENERATORS:
+            print(f"Forme inconnue : {shape}", file=sys.stderr)
+            return 2
+    if args.generate:
+        sys.stdout.write(generate(args.generate, sizes[0], args.seed, args.depth, args.terms))
+        return 0
+
+    results = []
+    for shape in shapes:
+        for size in sizes:
+            results.append(measure(shape, size, args.seed, args.repeat, args.memory, args.depth, args.terms))
+            print(f"  {shape} {format_size(size)} : {results[-1]['tokens_per_s']:.0f} tokens/s", file=sys.stderr)
+    report = {
+        "version": __version__,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "seed": args.seed,
+        "depth": args.depth,
+        "terms": args.terms,
+        "results": results,
+    }
+    print_table(results)
+
+    failed = False
+    for problem in nonlinear_stages(results):
+        print(f"NON LINÉAIRE : {problem}", file=sys.stderr)
+        failed = True
+    if args.compare:
+        with open(args.compare) as file:
+            regressions = compare(results, json.load(file), args.tolerance)
+        for regression in regressions:
+            print(f"RÉGRESSION : {regression}", file=sys.stderr)
+        failed = failed or bool(regressions)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+# Micro-benchmark of the drawing primitives of the C prelude, run against the stub SDL of sdl_stub/
+# (no window : SDL calls are only counted). Every prelude given is compiled with its own copy of the
+# benchmark, so the current forme.c can be compared with an older one.
+#   python benchmarks/bench_primitives.py [prelude.c ...] [--repeat N]
+#   git show HEAD~1:forme.c > /tmp/old_forme.c && python benchmarks/bench_primitives.py /tmp/old_forme.c forme.c
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STUB_DIR = os.path.join(ROOT, "sdl_stub")
+
+# Call timed for every primitive, i is the iteration number
+PRIMITIVES = [
+    ("drawSquare", "drawSquare(renderer, 100 + i % 500, 100 + i % 300, 50);"),
+    ("drawCircle r=10", "drawCircle(renderer, 400, 400, 10 + i % 3);"),
+    ("drawCircle r=100", "drawCircle(renderer, 400, 400, 100 + i % 3);"),
+    ("drawCircle bord", "drawCircle(renderer, 790, 10, 100 + i % 3);"),
+    ("drawLine", "drawLine(renderer, 0, i % 800, 799, 799 - i % 800);"),
+    ("drawArc r=50", "drawArc(renderer, 400, 400, 50, i % 90, 180 + i % 90);"),
+    ("drawArc r=300", "drawArc(renderer, 400, 400, 300, i % 90, 180 + i % 90);"),
+    ("drawCursor", "drawCursor(renderer, 10 + i % 780, 400);"),
+    ("rotateCursor", "rotateCursor(i % 360);"),
+]
+
+BENCH_MAIN = r"""
+#include <time.h>
+
+static double now(void) {
+    struct timespec t;
+    clock_gettime(CLOCK_MONOTONIC, &t);
+    return t.tv_sec + t.tv_nsec * 1e-9;
+}
+
+int main(int argc, char **argv) {
+    long repeat = argc > 1 ? atol(argv[1]) : 10000;
+    SDL_Renderer *renderer = SDL_CreateRenderer(SDL_CreateWindow("bench", 0, 0, 800, 800, 0), -1, 0);
+%(cases)s
+    return 0;
+}
+"""
+
+BENCH_CASE = r"""
+    {
+        SDL_StubCounters before = sdl_stub_counters;
+        double start = now();
+        for (long i = 0; i < repeat; i++) {
+            %(call)s
+        }
+        double elapsed = now() - start;
+        printf("%(name)s\t%%ld\t%%.9f\t%%ld\t%%ld\t%%ld\n", repeat, elapsed,
+               sdl_stub_counters.draw_point + sdl_stub_counters.draw_points + sdl_stub_counters.draw_line
+               + sdl_stub_counters.draw_lines + sdl_stub_counters.fill_rect + sdl_stub_counters.fill_rects
+               - before.draw_point - before.draw_points - before.draw_line
+               - before.draw_lines - before.fill_rect - before.fill_rects,
+               sdl_stub_counters.points - before.points, sdl_stub_counters.lines - before.lines);
+    }
+"""
+
+
+# Functions of the prelude (everything before main) followed by the benchmark main
+def bench_source(prelude_path):
+    with open(prelude_path, "r") as file:
+        prelude = file.read()
+    if "<stdlib.h>" not in prelude:  # atol
+        prelude = "#include <stdlib.h>\n" + prelude
+    position = prelude.find("int main(")
+    if position < 0:
+        raise ValueError(f"{prelude_path} : pas de fonction main")
+    cases = "".join(BENCH_CASE % {"name": name, "call": call} for name, call in PRIMITIVES)
+    return prelude[:position] + BENCH_MAIN % {"cases": cases}
+
+
+# {primitive: (calls, seconds, SDL calls, points, lines)} of a prelude
+def run_prelude(prelude_path, repeat, compiler):
+    with tempfile.TemporaryDirectory() as directory:
+        source_path = os.path.join(directory, "bench.c")
+        binary_path = os.path.join(directory, "bench")
+        with open(source_path, "w") as file:
+            file.write(bench_source(prelude_path))
+        subprocess.run(
+            [compiler, "-O2", "-I", STUB_DIR, source_path, os.path.join(STUB_DIR, "sdl_stub.c"),
+             "-o", binary_path, "-lm"],
+            check=True,
+        )
+        output = subprocess.run([binary_path, str(repeat)], capture_output=True, text=True, check=True).stdout
+
+    results = {}
+    for line in output.splitlines():
+        name, calls, seconds, sdl_calls, points, lines = line.split("\t")
+        results[name] = (int(calls), float(seconds), int(sdl_calls), int(points), int(lines))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmark des primitives de dessin du prélude C.")
+    parser.add_argument("preludes", nargs="*", default=[os.path.join(ROOT, "forme.c")])
+    parser.add_argument("--repeat", type=int, default=10000, help="appels par primitive (défaut : 10000)")
+    parser.add_argument("--cc", default=os.environ.get("CC", "gcc"), help="compilateur C (défaut : gcc)")
+    args = parser.parse_args()
+
+    if shutil.which(args.cc) is None:
+        print(f"Compilateur introuvable : {args.cc}", file=sys.stderr)
+        return 1
+
+    all_results = [(path, run_prelude(path, args.repeat, args.cc)) for path in args.preludes]
+    reference = all_results[0][1]
+    for path, results in all_results:
+        print(path)
+        print(f"  {'primitive':18}{'µs/appel':>10}{'appels SDL':>12}{'points':>10}{'lignes':>10}")
+        for name, (calls, seconds, sdl_calls, points, lines) in results.items():
+            speedup = ""
+            if results is not reference and seconds > 0:
+                speedup = f"  x{reference[name][1] / seconds:.1f}"
+            print(f"  {name:18}{seconds / calls * 1e6:10.3f}{sdl_calls / calls:12.1f}"
+                  f"{points / calls:10.1f}{lines / calls:10.1f}{speedup}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
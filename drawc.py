@@ -0,0 +1,193 @@
+# Headless Draw++ compiler : .draw files -> .c files, spread over a pool of processes
+#   python drawc.py "scripts/**/*.draw" --prelude forme.c -o build -j 8
+#   python drawc.py "scripts/*.draw" --build --sdl-stub sdl_stub  # executables too, without SDL installed
+import argparse
+import glob
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+from drawpp import CompileCache, EPILOGUES, compile_to_file, map_source
+from drawpp.profiling import Profiler, LoggerSink, JsonSink
+
+
+# One cache object per worker process, shared by all the files it compiles
+@lru_cache(maxsize=None)
+def open_cache(directory, max_bytes):
+    return CompileCache(directory, max_bytes)
+
+
+# Tokenizer -> Parser -> Optimizer -> Culler -> CTranslator for one file, returns (source, seconds,
+# error, True if the C code came from the cache, number of draw calls removed by the Culler, report
+# of the drawpp.profiling.Profiler or None). profile is False, True, or "memory" to follow the memory peak.
+# With builder (a drawpp.build.NativeBuilder), the executable is built too.
+def compile_file(source_path, output_path, prelude_path, optimize=True, cache_dir=None, cache_size=None,
+                 batch=False, epilogue="interactive", cull=True, profile=False, builder=None):
+    start = time.perf_counter()
+    cached = False
+    stats = {}
+    reports = []
+    profiler = Profiler([reports.append], memory=profile == "memory") if profile else None
+    try:
+        cache = open_cache(cache_dir, cache_size) if cache_dir else None
+        with map_source(source_path) as code:
+            cached = compile_to_file(code, output_path, prelude_path, optimize, cache, batch=batch,
+                                     epilogue=epilogue, cull=cull, stats=stats, profiler=profiler,
+                                     builder=builder)
+        error = None
+    except SyntaxError as e:
+        error = f"Erreur de syntaxe : {e}"
+    except Exception as e:
+        error = f"Erreur d'exécution : {e}"
+    report = reports[0] if reports else None
+    if report is not None:
+        report["source"] = source_path
+    removed = 0 if error else stats.get("removed", 0)
+    return source_path, time.perf_counter() - start, error, cached, removed, report
+
+
+# Directory a pattern starts from : its path before the first glob component, the folder of a file name
+def glob_root(pattern):
+    root = os.path.dirname(pattern)
+    while glob.has_magic(root):
+        root = os.path.dirname(root)
+    return root
+
+
+# Files named on the command line, glob patterns expanded (recursive with "**") : (path, glob_root of its pattern)
+def expand_inputs(patterns):
+    inputs = {}
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern, recursive=True)) if glob.has_magic(pattern) else [pattern]
+        for path in matches:
+            inputs.setdefault(path, glob_root(pattern))
+    return list(inputs.items())
+
+
+# Output .c path : same name as the source, in output_dir if given. There, the source keeps its
+# folders under root (the glob_root of its pattern) : s/a/x.draw and s/b/x.draw of "s/**/*.draw" -> a/x.c, b/x.c
+def output_path_for(source_path, output_dir=None, root=""):
+    name = os.path.splitext(os.path.basename(source_path))[0] + ".c"
+    if not output_dir:
+        return os.path.join(os.path.dirname(source_path), name)
+    folder = os.path.relpath(os.path.dirname(source_path) or os.curdir, root or os.curdir)
+    return os.path.normpath(os.path.join(output_dir, folder, name))
+
+
+# Sources written to the same output path, e.g. files of the same name given from several folders
+def output_conflicts(outputs):
+    sources_by_output = {}
+    for source, output_path in outputs:
+        sources_by_output.setdefault(os.path.normcase(os.path.abspath(output_path)), []).append(source)
+    return [sources for sources in sources_by_output.values() if len(sources) > 1]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Compile des fichiers Draw++ en C sans interface graphique.")
+    parser.add_argument("inputs", nargs="+", help="fichiers .draw ou motifs glob")
+    parser.add_argument("--prelude", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "forme.c"),
+                        help="fichier C inséré avant le code généré (forme.c par défaut)")
+    parser.add_argument("-o", "--output-dir", help="dossier des fichiers .c (à côté des sources par défaut)")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(), help="nombre de processus")
+    parser.add_argument("--no-optimize", dest="optimize", action="store_false", help="désactive l'optimiseur")
+    parser.add_argument("--no-cull", dest="cull", action="store_false",
+                        help="garde les dessins hors de la fenêtre ou cachés par un carré dessiné après")
+    parser.add_argument("--batch", action="store_true",
+                        help="regroupe les appels de dessin en tableaux envoyés à SDL en une fois")
+    parser.add_argument("--offscreen", dest="epilogue", action="store_const", const="offscreen",
+                        default="interactive",
+                        help="programme sans fenêtre : enregistre le dessin en BMP (argument 1) et se termine")
+    parser.add_argument("--cache-dir", help="dossier du cache de compilation (pas de cache par défaut)")
+    parser.add_argument("--cache-size", type=int, default=256, help="taille maximale du cache en Mo")
+    parser.add_argument("--build", action="store_true",
+                        help="compile aussi chaque fichier .c en exécutable : les fonctions du prélude sont compilées "
+                             "une seule fois, objets et exécutables sont gardés dans le cache (celui de "
+                             "--cache-dir, sinon le cache par défaut)")
+    parser.add_argument("--cc", default=os.environ.get("CC", "gcc"), help="compilateur C de --build (défaut : gcc)")
+    parser.add_argument("--cflags", default="-O2", help="options du compilateur C de --build (défaut : -O2)")
+    parser.add_argument("--sdl-stub", metavar="DOSSIER",
+                        help="avec --build, utilise la SDL factice du dossier (sdl_stub) au lieu de la SDL installée")
+    parser.add_argument("--profile", action="store_true",
+                        help="affiche la durée de chaque étape de la compilation de chaque fichier")
+    parser.add_argument("--profile-json", metavar="FICHIER",
+                        help="ajoute les mesures de chaque fichier (durées, compteurs) au fichier, une ligne JSON "
+                             "par fichier")
+    parser.add_argument("--profile-memory", action="store_true",
+                        help="mesure aussi le pic de mémoire de chaque étape (tracemalloc, plus lent), "
+                             "implique --profile sans --profile-json")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    inputs = expand_inputs(args.inputs)
+    if not inputs:
+        print("Aucun fichier à compiler.", file=sys.stderr)
+        return 1
+    outputs = [(source, output_path_for(source, args.output_dir, root)) for source, root in inputs]
+    conflicts = output_conflicts(outputs)
+    if conflicts:
+        for sources in conflicts:
+            print(f"Même fichier de sortie pour : {', '.join(sources)}", file=sys.stderr)
+        return 1
+    sources = [source for source, _ in outputs]
+    for output_dir in sorted({os.path.dirname(output_path) for _, output_path in outputs}):
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+
+    sinks = []
+    if args.profile or (args.profile_memory and not args.profile_json):
+        logging.basicConfig(level=logging.INFO, format="%(message)s")
+        sinks.append(LoggerSink())
+    if args.profile_json:
+        sinks.append(JsonSink(args.profile_json))
+    profile = ("memory" if args.profile_memory else True) if sinks else False
+
+    builder = None
+    if args.build:
+        from drawpp.build import NativeBuilder, stub_sdl_options
+
+        options = stub_sdl_options(args.sdl_stub) if args.sdl_stub else {}
+        try:
+            builder = NativeBuilder(args.prelude, CompileCache(args.cache_dir, args.cache_size * 1024 * 1024),
+                                    args.cc, args.cflags.split(), **options)
+            builder.prepare(EPILOGUES[args.epilogue][0])  # prelude object built once, before the workers
+        except (OSError, RuntimeError, ValueError) as e:
+            print(f"Compilation native impossible : {e}", file=sys.stderr)
+            return 1
+
+    start = time.perf_counter()
+    failures = []
+    cached_count = 0
+    removed_count = 0
+    with ProcessPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+        futures = [
+            pool.submit(compile_file, source, output_path, args.prelude, args.optimize, args.cache_dir,
+                        args.cache_size * 1024 * 1024, args.batch, args.epilogue, args.cull, profile, builder)
+            for source, output_path in outputs
+        ]
+        for future in futures:
+            source, seconds, error, cached, removed, report = future.result()
+            status = "ERREUR" if error else "cache" if cached else "ok"
+            print(f"{status:8}{seconds:9.3f}s  {source}" + (f"  ({removed} dessin(s) supprimé(s))" if removed else ""))
+            if report is not None:
+                for sink in sinks:
+                    sink(report)
+            cached_count += cached
+            removed_count += removed
+            if error:
+                failures.append((source, error))
+    elapsed = time.perf_counter() - start
+
+    print(f"\n{len(sources) - len(failures)} compilé(s) dont {cached_count} depuis le cache, "
+          f"{len(failures)} échec(s) en {elapsed:.3f}s, {removed_count} appel(s) de dessin supprimé(s)")
+    for source, error in failures:
+        print(f"  {source} : {error}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
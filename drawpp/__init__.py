@@ -0,0 +1,23 @@
+# Draw++ compiler core : tokenizer, parser, optimizer and C translator.
+# No GUI dependency, so it can be imported from workers, scripts and tests without Tk.
+__version__ = "1.4"  # part of the compilation cache keys : change it when the generated code changes
+
+from .tokenizer import Token, Tokenizer
+from .nodes import (
+    Node, Program, Block, IfStatement, ForLoop, WhileLoop, Assignment, PrintStatement, BinaryExpression, Literal,
+    Variable, DrawCommand, DrawLine, DrawSquare, DrawCircle, DrawArc, DrawCursor, MoveCursor, RotateCursor,
+    NodeVisitor, OPERATOR_PRECEDENCE, walk, nesting_depth,
+)
+from .parser import Parser
+from .symbols import (
+    SymbolTable, PRELUDE_GLOBALS, PRELUDE_VALUES, CANVAS_WIDTH, CANVAS_HEIGHT, get_value_type, get_type, infer_type,
+)
+from .optimizer import Optimizer, fold_constant
+from .culling import Culler, CoverGrid
+from .translator import (
+    CEmitter, CTranslator, C_EPILOGUE, C_OFFSCREEN_EPILOGUE, EPILOGUES, BATCHED_FUNCTIONS, write_c_program,
+)
+from .interpreter import Interpreter
+from .vm import Bytecode, BytecodeCompiler, VM, run_program
+from .cache import CompileCache, default_cache_dir
+from .pipeline import STAGES, map_source, parse_source, compile_to_file
@@ -0,0 +1,233 @@
+# Native build of the generated C programs. Every program embeds its prelude (forme.c), but the
+# functions of the prelude are the same from one program to the next : they are compiled once into
+# an object file, and each program only gets the rest of its code (main()) compiled, behind a header
+# declaring them. Objects and executables are stored in a CompileCache, by hash of their source, of
+# the compiler version and of the flags : a program built again is copied from the cache.
+#   builder = NativeBuilder("forme.c", **stub_sdl_options("sdl_stub"))  # no SDL needed
+#   builder.build("dessin.c")  # -> dessin
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from .cache import CompileCache
+
+# Comments of a C source, string and character literals are matched to be kept as they are
+C_COMMENT = re.compile(r"//[^\n]*|/\*.*?\*/|(\"(?:\\.|[^\"\\\n])*\"|'(?:\\.|[^'\\\n])*')", re.S)
+C_SYMBOL = re.compile(r"\"(?:\\.|[^\"\\\n])*\"|'(?:\\.|[^'\\\n])*'|[{};]")
+C_TYPE_DEFINITION = ("typedef", "struct", "union", "enum")
+
+
+# (functions and variables of the prelude, main() and the rest), cut where main() starts
+def split_prelude(source, prelude_path="prélude"):
+    position = source.find("int main(")
+    if position < 0:
+        raise ValueError(f"{prelude_path} : pas de fonction main")
+    return source[:position], source[position:]
+
+
+# Parts of a declaration split on its commas, commas inside (), [] or {} excluded
+def split_declarators(declaration):
+    parts, depth, start = [], 0, 0
+    for i, char in enumerate(declaration):
+        if char in "([{":
+            depth += 1
+        elif char in ")]}":
+            depth -= 1
+        elif char == "," and depth == 0:
+            parts.append(declaration[start:i])
+            start = i + 1
+    parts.append(declaration[start:])
+    return parts
+
+
+# Declaration of the header for a top-level declaration of the prelude (without its ";"), None to leave it out :
+# static ones are private to the prelude object, variables are declared extern without their initial value
+def header_declaration(declaration):
+    declaration = " ".join(declaration.split())
+    first_word = declaration.split(" ", 1)[0]
+    if not declaration or first_word == "static":
+        return None
+    if first_word in C_TYPE_DEFINITION or first_word == "extern" or ("(" in declaration and "=" not in declaration):
+        return declaration + ";"  # type, or prototype already
+    names = [part.split("=", 1)[0].strip() for part in split_declarators(declaration)]
+    return f"extern {', '.join(names)};"
+
+
+# Header declaring what a prelude defines before main() : its preprocessor lines and types as they are,
+# a prototype per function, extern variables. Only what is at the top level is looked at.
+def prelude_header(source):
+    source = C_COMMENT.sub(lambda match: match.group(1) or " ", source).replace("\\\n", "")
+    lines = []
+    statement = ""  # top-level declaration being read
+    head = None  # text before the "{" of the top-level block being read
+    depth = 0
+    for line in source.splitlines(keepends=True):
+        if depth == 0 and not statement.strip() and line.lstrip().startswith("#"):
+            lines.append(line.rstrip())
+            continue
+        start = 0
+        for match in C_SYMBOL.finditer(line):
+            symbol = match.group()
+            if symbol == "{":
+                if depth == 0:
+                    head = statement + line[start:match.start()]
+                depth += 1
+            elif symbol == "}":
+                depth -= 1
+                if depth == 0 and head.rstrip().endswith(")"):  # end of a function
+                    function = head.split()
+                    if function and function[0] != "static":
+                        lines.append(" ".join(function) + ";")
+                    statement, head, start = "", None, match.end()
+            elif symbol == ";" and depth == 0:
+                declaration = header_declaration(statement + line[start:match.start()])
+                if declaration is not None:
+                    lines.append(declaration)
+                statement, start = "", match.end()
+        if depth > 0 and head is not None and head.rstrip().endswith(")"):
+            continue  # body of a function, left out
+        statement += line[start:]
+    return "\n".join(lines) + "\n"
+
+
+# Directive giving the line number and file shown by the compiler for the line after it
+def line_directive(line, path):
+    return '#line %d "%s"\n' % (line, path.replace("\\", "\\\\").replace('"', '\\"'))
+
+
+# Executable built from a generated C file by default : same name without .c
+def executable_path_for(c_path):
+    return os.path.splitext(c_path)[0] + (".exe" if os.name == "nt" else "")
+
+
+# Options of NativeBuilder for the stub SDL of sdl_stub/ (nothing is drawn, calls are counted) :
+# programs are built and run without SDL installed
+def stub_sdl_options(stub_dir):
+    return {
+        "include_dirs": [stub_dir],
+        "extra_sources": [os.path.join(stub_dir, "sdl_stub.c")],
+        "libraries": ["-lm"],
+    }
+
+
+# Builds executables from the C files written by compile_to_file with the prelude prelude_path.
+# extra_sources are C files compiled once and linked into every program (e.g. the stub SDL),
+# libraries the linker arguments. Without a cache, the default CompileCache is used.
+class NativeBuilder:
+    def __init__(self, prelude_path, cache=None, compiler=None, cflags=("-O2",), libraries=("-lSDL2", "-lm"),
+                 include_dirs=(), extra_sources=()):
+        self.prelude_path = prelude_path
+        self.cache = cache if cache is not None else CompileCache()
+        self.compiler = compiler or os.environ.get("CC", "gcc")
+        self.cflags = [*cflags, *(f"-I{directory}" for directory in include_dirs)]
+        self.libraries = list(libraries)
+        self.include_dirs = list(include_dirs)
+        with open(prelude_path, "r") as file:
+            self.runtime = split_prelude(file.read(), prelude_path)[0]
+        self.header = prelude_header(self.runtime)
+        self.extra_sources = []  # (object name, source)
+        for path in extra_sources:
+            with open(path, "r") as file:
+                self.extra_sources.append((os.path.splitext(os.path.basename(path))[0],
+                                           line_directive(1, path) + file.read()))
+        self.identity = None  # hash of the compiler version, flags and headers, computed on first use
+        self.stats = {"compiled": 0, "reused": 0, "linked": 0, "cached": 0}
+
+    # Cache key of a build product : the parts, the compiler and everything it reads besides the source
+    def key(self, *parts):
+        if self.identity is None:
+            if shutil.which(self.compiler) is None:
+                raise ValueError(f"Compilateur introuvable : {self.compiler}")
+            version = subprocess.run([self.compiler, "--version"], capture_output=True, text=True).stdout
+            headers = []
+            for directory in self.include_dirs:
+                for root, _, files in sorted(os.walk(directory)):
+                    for name in sorted(name for name in files if name.endswith(".h")):
+                        with open(os.path.join(root, name), "rb") as file:
+                            headers += (name, file.read())
+            self.identity = self.cache.key(version, *self.cflags, *headers)
+        return self.cache.key(self.identity, *parts)
+
+    # (object name, source) of the objects of a generated program : the prelude functions (after what
+    # the program defines before them, e.g. DRAWPP_OFFSCREEN), then the rest of the program behind the
+    # header. A program without this prelude is compiled whole. Errors point to the lines of c_path.
+    def program_sources(self, program, c_path):
+        position = program.find(self.runtime)
+        if position < 0 or not self.runtime.strip():
+            return [("programme", line_directive(1, c_path) + program)]
+        prologue, end = program[:position], position + len(self.runtime)
+        return [
+            ("prelude", self.prelude_source(prologue)),
+            ("programme", prologue + self.header + line_directive(program.count("\n", 0, end) + 1, c_path)
+             + program[end:]),
+        ]
+
+    def prelude_source(self, prologue):
+        return prologue + line_directive(1, self.prelude_path) + self.runtime
+
+    # directory/name.o compiled from source, or copied from the cache
+    def object_file(self, name, source, directory, key=None):
+        object_path = os.path.join(directory, f"{name}.o")
+        key = key or self.key("object", source)
+        if self.cache.copy_to(key, "o", object_path):
+            self.stats["reused"] += 1
+            return object_path
+        source_path = os.path.join(directory, f"{name}.c")
+        with open(source_path, "w") as file:
+            file.write(source)
+        self.run([self.compiler, *self.cflags, "-c", source_path, "-o", object_path])
+        self.cache.put_file(key, "o", object_path)
+        self.stats["compiled"] += 1
+        return object_path
+
+    def run(self, command):
+        result = subprocess.run(command, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"Échec de la compilation native :\n{result.stderr.strip()}")
+
+    # Objects shared by every program (prelude functions after prologue, extra sources) compiled into
+    # the cache now, e.g. once before builds run in parallel
+    def prepare(self, prologue=""):
+        with tempfile.TemporaryDirectory() as directory:
+            for name, source in [("prelude", self.prelude_source(prologue)), *self.extra_sources]:
+                self.object_file(name, source, directory)
+
+    # Executable of the generated C program c_path (executable_path_for(c_path) by default).
+    # Returns True when it came from the cache.
+    def build(self, c_path, executable_path=None):
+        executable_path = executable_path or executable_path_for(c_path)
+        with open(c_path, "r") as file:
+            sources = self.program_sources(file.read(), c_path) + self.extra_sources
+        keys = [self.key("object", source) for _, source in sources]
+        executable_key = self.key("executable", *keys, *self.libraries)
+        if self.cache.copy_to(executable_key, "exe", executable_path):
+            os.chmod(executable_path, 0o755)
+            self.stats["cached"] += 1
+            return True
+
+        with tempfile.TemporaryDirectory() as directory:
+            objects = [self.object_file(name, source, directory, key) for (name, source), key in zip(sources, keys)]
+            linked_path = os.path.join(directory, "programme")
+            self.run([self.compiler, *objects, "-o", linked_path, *self.libraries])
+            self.cache.put_file(executable_key, "exe", linked_path)
+            shutil.copy(linked_path, executable_path)  # with its execute permission
+        self.stats["linked"] += 1
+        return False
+
+    # Builds of several C programs, jobs at a time (the compiler runs in its own process), after the
+    # shared objects. Returns (c_path, error message or None) in the order of c_paths.
+    def build_all(self, c_paths, jobs=None, prologue=""):
+        self.prepare(prologue)
+
+        def build_one(c_path):
+            try:
+                self.build(c_path)
+            except (OSError, RuntimeError, ValueError) as e:
+                return c_path, str(e)
+            return c_path, None
+
+        with ThreadPoolExecutor(max_workers=max(1, jobs or os.cpu_count() or 1)) as pool:
+            return list(pool.map(build_one, c_paths))
@@ -0,0 +1,147 @@
+import hashlib
+import os
+import pickle
+import shutil
+import tempfile
+
+from . import __version__
+
+
+# Default location of the compilation cache (DRAWPP_CACHE_DIR overrides it)
+def default_cache_dir():
+    return os.environ.get("DRAWPP_CACHE_DIR") or os.path.join(os.path.expanduser("~"), ".cache", "drawpp")
+
+
+# On-disk, content-addressed cache of the compilation stages (tokens, AST, generated C).
+# One file per entry : <directory>/<2 first hex digits>/<key>.<stage>. The modification time is
+# the last use, the least recently used files are removed when the cache grows over max_bytes.
+# Files are written to a temporary name then renamed, so several processes can share the cache.
+class CompileCache:
+    def __init__(self, directory=None, max_bytes=256 * 1024 * 1024):
+        self.directory = directory or default_cache_dir()
+        self.max_bytes = max_bytes
+        self.size = None  # estimated size of the cache, computed on the first write
+        self.stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0, "errors": 0}
+
+    # Key of an entry : hash of the compiler version and of every part (str or bytes)
+    def key(self, *parts):
+        digest = hashlib.sha256(__version__.encode())
+        for part in parts:
+            if isinstance(part, str):
+                part = part.encode("utf-8")
+            digest.update(len(part).to_bytes(8, "little"))
+            digest.update(part)
+        return digest.hexdigest()
+
+    def path(self, key, stage):
+        return os.path.join(self.directory, key[:2], f"{key}.{stage}")
+
+    # Path of an existing entry (marked as just used), None on a miss
+    def lookup(self, key, stage):
+        path = self.path(key, stage)
+        try:
+            os.utime(path)
+        except OSError:  # missing, or removed by another process
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        return path
+
+    # Python object stored for (key, stage), None on a miss
+    def get(self, key, stage):
+        path = self.lookup(key, stage)
+        if path is None:
+            return None
+        try:
+            with open(path, "rb") as file:
+                return pickle.load(file)
+        except (OSError, EOFError, pickle.UnpicklingError):  # evicted meanwhile or truncated
+            self.stats["hits"] -= 1
+            self.stats["misses"] += 1
+            return None
+
+    # A value that can't be stored (not picklable, disk full...) is left out of the cache : a cache
+    # write never makes the compile fail
+    def put(self, key, stage, value):
+        try:
+            self.write(key, stage, pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+        except (OSError, RecursionError, AttributeError, TypeError, pickle.PicklingError):
+            self.stats["errors"] += 1
+
+    # Copy of an existing file (e.g. a generated .c) stored for (key, stage)
+    def put_file(self, key, stage, source_path):
+        try:
+            with open(source_path, "rb") as file:
+                self.write(key, stage, file.read())
+        except OSError:
+            self.stats["errors"] += 1
+
+    # Copy of the entry into destination_path, False on a miss
+    def copy_to(self, key, stage, destination_path):
+        path = self.lookup(key, stage)
+        if path is None:
+            return False
+        try:
+            with open(path, "rb") as source, open(destination_path, "wb") as destination:
+                shutil.copyfileobj(source, destination)
+        except FileNotFoundError:  # evicted meanwhile
+            self.stats["hits"] -= 1
+            self.stats["misses"] += 1
+            return False
+        return True
+
+    # Atomic write : temporary file in the same directory, then rename
+    def write(self, key, stage, data):
+        path = self.path(key, stage)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temporary_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                file.write(data)
+            os.replace(temporary_path, path)
+        except BaseException:
+            os.unlink(temporary_path)
+            raise
+        self.stats["writes"] += 1
+
+        if self.size is None:
+            self.size = sum(size for _, size, _ in self.entries())
+        else:
+            self.size += len(data)
+        if self.size > self.max_bytes:
+            self.evict()
+
+    # (modification time, size, path) of every entry
+    def entries(self):
+        result = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    info = os.stat(path)
+                except FileNotFoundError:  # removed by another process
+                    continue
+                result.append((info.st_mtime, info.st_size, path))
+        return result
+
+    # Removes the least recently used entries until the cache fits in max_bytes
+    def evict(self):
+        entries = sorted(self.entries())
+        self.size = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if self.size <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+                self.stats["evictions"] += 1
+            except FileNotFoundError:
+                pass
+            self.size -= size
+
+    def clear(self):
+        for _, _, path in self.entries():
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+        self.size = 0
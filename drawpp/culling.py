@@ -0,0 +1,300 @@
+import math
+
+from .nodes import (
+    Program, Block, IfStatement, ForLoop, WhileLoop, Assignment, BinaryExpression, Literal, Variable, DrawCommand,
+    DrawLine, DrawSquare, DrawCircle, DrawArc, MoveCursor, RotateCursor, NodeVisitor, walk,
+)
+from .optimizer import C_INT_MIN, C_INT_MAX
+from .symbols import PRELUDE_VALUES, CANVAS_WIDTH, CANVAS_HEIGHT
+
+UNKNOWN = (-math.inf, math.inf)
+GRID_CELL = 64  # side in pixels of the cells of the occlusion index
+
+
+# Interval of values from interval operands, computed on the bounds. A result beyond a C int is
+# UNKNOWN : the generated code would wrap around.
+def combine(operator, left, right):
+    if operator in ("<", ">", "=="):
+        return (0, 1)
+    if operator == "+":
+        low, high = left[0] + right[0], left[1] + right[1]
+    elif operator == "-":
+        low, high = left[0] - right[1], left[1] - right[0]
+    elif operator in ("*", "/"):
+        if operator == "/" and right[0] <= 0 <= right[1]:
+            return UNKNOWN  # maybe a division by zero
+        corners = []
+        for a in left:
+            for b in right:
+                if operator == "/":
+                    corners.append(a / b if math.isfinite(b) else 0.0)
+                else:
+                    corners.append(0 if a == 0 or b == 0 else a * b)
+        if any(math.isnan(corner) for corner in corners):
+            return UNKNOWN
+        low, high = min(corners), max(corners)
+    else:
+        return UNKNOWN
+    if not C_INT_MIN <= low <= high <= C_INT_MAX:
+        return UNKNOWN
+    return math.floor(low), math.ceil(high)  # int truncation of the result stays inside
+
+
+# Variables a block may change : assigned ones, and the cursor globals moved or rotated
+def changed_names(block):
+    names = set()
+    for node in walk(block):
+        if isinstance(node, Assignment):
+            names.add(node.variable)
+        elif isinstance(node, MoveCursor):
+            names.update(("x", "y"))
+        elif isinstance(node, RotateCursor):
+            names.update(("dx", "dy"))
+    return names
+
+
+def hull(first, second):
+    return min(first[0], second[0]), max(first[1], second[1])
+
+
+# Pixels a draw command may touch : (x min, y min, x max, y max) included, None if it is unbounded
+def shape_box(node, params):
+    if isinstance(node, DrawSquare):
+        x, y, size = params
+        box = (x[0] + min(size[0], 0), y[0] + min(size[0], 0), x[1] + max(size[1], 0), y[1] + max(size[1], 0))
+    elif isinstance(node, DrawLine):
+        x1, y1, x2, y2 = params
+        box = (min(x1[0], x2[0]), min(y1[0], y2[0]), max(x1[1], x2[1]), max(y1[1], y2[1]))
+    elif isinstance(node, (DrawCircle, DrawArc)):
+        x, y, radius = params[:3]
+        reach = max(abs(radius[0]), abs(radius[1])) + 1  # + 1 : arc points are truncated toward 0
+        box = (x[0] - reach, y[0] - reach, x[1] + reach, y[1] + reach)
+    else:
+        return None  # drawCursor changes the color of the next shapes : always kept
+    return box if all(map(math.isfinite, box)) else None
+
+
+# Pixels a drawSquare fills whatever the values of its parameters in their intervals, None if none
+def square_cover(params):
+    x, y, size = params
+    if size[0] <= 0 or not all(math.isfinite(bound) for interval in params for bound in interval):
+        return None
+    cover = (x[1], y[1], x[0] + size[0] - 1, y[0] + size[0] - 1)
+    return cover if cover[0] <= cover[2] and cover[1] <= cover[3] else None
+
+
+def clip_to_canvas(box):
+    return max(box[0], 0), max(box[1], 0), min(box[2], CANVAS_WIDTH - 1), min(box[3], CANVAS_HEIGHT - 1)
+
+
+# Opaque squares over the canvas in a grid of cells : a square is listed in every cell it overlaps,
+# so the squares that may contain a box are the ones listed in the cell of its top left corner.
+# Insertions are undone in reverse order when leaving a loop or a branch (see Culler.prune).
+class CoverGrid:
+    def __init__(self, cell=GRID_CELL):
+        self.cell = cell
+        self.cells = {}  # (column, row) -> [cover box...]
+        self.log = []  # cells of every insertion, in order
+
+    def insert(self, cover):
+        x0, y0, x1, y1 = clip_to_canvas(cover)
+        if x0 > x1 or y0 > y1:
+            return
+        cell = self.cell
+        keys = [(column, row) for column in range(x0 // cell, x1 // cell + 1)
+                for row in range(y0 // cell, y1 // cell + 1)]
+        for key in keys:
+            self.cells.setdefault(key, []).append((x0, y0, x1, y1))
+        self.log.append(keys)
+
+    def undo(self, mark):
+        while len(self.log) > mark:
+            for key in self.log.pop():
+                self.cells[key].pop()
+
+    def covers(self, box):
+        for x0, y0, x1, y1 in self.cells.get((box[0] // self.cell, box[1] // self.cell), ()):
+            if x0 <= box[0] and y0 <= box[1] and box[2] <= x1 and box[3] <= y1:
+                return True
+        return False
+
+
+# AST to AST pass run after the Optimizer : draw commands whose shape is entirely outside the window
+# of forme.c, or entirely under an opaque drawSquare drawn after it, are removed.
+# A first pass computes the interval of values of every variable at every draw command (constants,
+# pour loop variables, cursor globals moved by moveCursor) and the box of pixels each command may
+# touch. A second pass goes through the statements backward : the squares sure to be drawn after a
+# command are in a CoverGrid. The input tree is not modified.
+class Culler(NodeVisitor):
+    def __init__(self):
+        self.stats = {}
+
+    def cull(self, ast):
+        self.stats = dict.fromkeys(("draw_calls", "offscreen", "occluded", "removed"), 0)
+        # Cursor globals hidden by a variable of the same name somewhere : not followed
+        declared = {node.variable for node in walk(ast) if isinstance(node, (Assignment, ForLoop))}
+        self.hidden_globals = declared & PRELUDE_VALUES.keys()
+        self.intervals = {name: (value, value) for name, value in PRELUDE_VALUES.items()
+                          if name not in self.hidden_globals}
+        self.shapes = {}  # id of a draw command -> (box or None, cover or None)
+        self.visit(ast)
+        self.grid = CoverGrid()
+        result = self.prune(ast)
+        self.stats["removed"] = self.stats["offscreen"] + self.stats["occluded"]
+        return result
+
+    # --- First pass : intervals and boxes, in execution order
+
+    # Interval of an expression, operands before their operator from an explicit stack
+    def interval(self, node):
+        results = []
+        stack = [(node, False)]
+        while stack:
+            node, operands_done = stack.pop()
+            match node:
+                case BinaryExpression() if not operands_done:
+                    stack += ((node, True), (node.right, False), (node.left, False))
+                case BinaryExpression(operator=operator):
+                    right = results.pop()
+                    results[-1] = combine(operator, results[-1], right)
+                case Literal(value=float(value)):
+                    results.append((math.floor(value) - 1, math.ceil(value) + 1))  # the C float may round differently
+                case Literal(value=int(value)):
+                    results.append((value, value))
+                case Variable(name=name):
+                    results.append(self.intervals.get(name, UNKNOWN))
+                case _:
+                    results.append(UNKNOWN)
+        return results[0]
+
+    def forget(self, names):
+        for name in names:
+            self.intervals.pop(name, None)
+
+    def visit_Program(self, ast):
+        for statement in ast.body:
+            self.visit(statement)
+
+    def visit_Block(self, ast):
+        self.visit(ast.body)
+
+    def visit_Literal(self, ast):
+        pass  # expression alone as a statement
+
+    def visit_Variable(self, ast):
+        pass
+
+    def visit_BinaryExpression(self, ast):
+        pass
+
+    def visit_PrintStatement(self, ast):
+        pass
+
+    def visit_Assignment(self, ast):
+        if ast.variable not in self.hidden_globals:
+            self.intervals[ast.variable] = self.interval(ast.value)
+
+    def visit_IfStatement(self, ast):
+        before = dict(self.intervals)
+        self.visit(ast.then_branch)
+        then_intervals = self.intervals
+        self.intervals = dict(before)
+        if ast.else_branch:
+            self.visit(ast.else_branch)
+        # Values after the si : the ones of either branch
+        self.intervals = {name: hull(interval, self.intervals[name])
+                          for name, interval in then_intervals.items() if name in self.intervals}
+
+    def visit_WhileLoop(self, ast):
+        assigned = changed_names(ast.body)
+        self.forget(assigned)  # values can change from one iteration to the next
+        self.visit(ast.body)
+        self.forget(assigned)
+
+    def visit_ForLoop(self, ast):
+        variable = ast.variable
+        assigned = changed_names(ast.body)
+        outer = self.intervals.pop(variable, None)  # the loop variable hides an outer one
+        start = self.interval(ast.start)
+        self.forget(assigned)
+        end = self.interval(ast.end)  # evaluated again at every iteration
+        if variable not in assigned:
+            self.intervals[variable] = (start[0], end[1])
+        self.visit(ast.body)
+        self.forget(assigned | {variable})
+        if outer is not None and variable not in assigned:
+            self.intervals[variable] = outer
+
+    def visit_DrawCommand(self, ast):
+        params = [self.interval(param) for param in ast.params]
+        if id(ast) in self.shapes:  # same node twice in the tree : kept
+            self.shapes[id(ast)] = (None, None)
+            return
+        cover = square_cover(params) if isinstance(ast, DrawSquare) else None
+        self.shapes[id(ast)] = (shape_box(ast, params), cover)
+
+    def visit_MoveCursor(self, ast):
+        for name, param in zip(("x", "y"), ast.params):
+            if name not in self.hidden_globals:
+                self.intervals[name] = combine("+", self.intervals.get(name, UNKNOWN), self.interval(param))
+
+    def visit_RotateCursor(self, ast):
+        # A rotation keeps the length of (dx, dy), the truncation to int only shortens it
+        dx, dy = self.intervals.get("dx", UNKNOWN), self.intervals.get("dy", UNKNOWN)
+        length = math.hypot(max(map(abs, dx)), max(map(abs, dy)))
+        for name in ("dx", "dy"):
+            if name not in self.hidden_globals:
+                self.intervals[name] = (-math.ceil(length), math.ceil(length)) if math.isfinite(length) else UNKNOWN
+
+    # --- Second pass : removal, statements read backward
+
+    # Statements of body kept. Squares of the body are added to the grid for the statements before
+    # them, and stay there when body always runs to its end after the statements that follow it.
+    def prune(self, body):
+        kept = []
+        for statement in reversed(body.body):
+            statement = self.prune_statement(statement)
+            if statement is not None:
+                kept.append(statement)
+        kept.reverse()
+        return Program(kept)
+
+    # Branch or loop body : its squares are not sure to be drawn after the statements before it
+    def prune_branch(self, body):
+        mark = len(self.grid.log)
+        result = self.prune(body)
+        self.grid.undo(mark)
+        return result
+
+    def prune_statement(self, statement):
+        match statement:
+            case Block():
+                return Block(self.prune(statement.body))  # always runs : its squares stay in the grid
+            # A si or a pour left without statements does nothing (expressions have no side effects)
+            case IfStatement():
+                else_branch = self.prune_branch(statement.else_branch) if statement.else_branch else None
+                then_branch = self.prune_branch(statement.then_branch)
+                if not then_branch.body and not (else_branch and else_branch.body):
+                    return None
+                return IfStatement(statement.condition, then_branch, else_branch)
+            case WhileLoop():
+                return WhileLoop(statement.condition, self.prune_branch(statement.body))  # may never end
+            case ForLoop():
+                body = self.prune_branch(statement.body)
+                return ForLoop(statement.variable, statement.start, statement.end, body) if body.body else None
+            case DrawCommand() if id(statement) in self.shapes:
+                self.stats["draw_calls"] += 1
+                box, cover = self.shapes[id(statement)]
+                if box is None:
+                    return statement
+                visible = clip_to_canvas(box)
+                if visible[0] > visible[2] or visible[1] > visible[3]:
+                    self.stats["offscreen"] += 1
+                    return None
+                if self.grid.covers(visible):
+                    self.stats["occluded"] += 1
+                    return None
+                if cover is not None:
+                    self.grid.insert(cover)
+                return statement
+        return statement
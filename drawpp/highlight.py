@@ -0,0 +1,51 @@
+# Syntax highlighting spans computed with the tokenizer's patterns, one line at a time so that an
+# editor can color only the lines it shows. Spans of a line only depend on its text : they are
+# cached by content and reused for every unchanged (or repeated) line.
+from functools import lru_cache
+
+from .tokenizer import Tokenizer
+
+# Highlighting style of the token types, the other types are not colored
+TOKEN_STYLES = {
+    "SI": "keyword",
+    "SINON": "keyword",
+    "POUR": "keyword",
+    "A": "keyword",
+    "DE": "keyword",
+    "TANTQUE": "keyword",
+    "AFFICHER": "keyword",
+    "DRAW_LINE": "builtin",
+    "DRAW_SQUARE": "builtin",
+    "DRAW_CIRCLE": "builtin",
+    "DRAW_ARC": "builtin",
+    "DRAW_CURSOR": "builtin",
+    "MOVE_CURSOR": "builtin",
+    "ROTATE_CURSOR": "builtin",
+    "NOMBRE": "number",
+    "FLOTTANT": "number",
+    "CHAINE": "string",
+    "ASSIGNATION": "operator",
+    "OPERATEUR": "operator",
+    "EQUALS_EQUIV": "operator",
+}
+STYLES = sorted(set(TOKEN_STYLES.values()))
+
+
+# (style, first column, end column) of the colored tokens of a line. A character no pattern
+# matches is skipped : the line is still colored while it is being typed.
+@lru_cache(maxsize=65536)
+def line_spans(line):
+    match_at = Tokenizer.master_regex.match
+    spans = []
+    pos = 0
+    end = len(line)
+    while pos < end:
+        match = match_at(line, pos)
+        if not match:
+            pos += 1
+            continue
+        style = TOKEN_STYLES.get(match.lastgroup)
+        if style is not None:
+            spans.append((style, pos, match.end()))
+        pos = match.end()
+    return tuple(spans)
@@ -0,0 +1,215 @@
+# Incremental front end for live diagnostics in the editor. The document is kept as a list of
+# segments : runs of whole lines holding complete top-level statements, with their AST. An edit
+# re-lexes and re-parses only the segments covering the changed lines (plus the one before, an
+# expression may go on after a line break), every other segment and its statements are reused.
+import re
+from bisect import bisect_left
+from itertools import accumulate, chain
+from operator import attrgetter
+
+from .nodes import Program
+from .parser import Parser
+from .tokenizer import Tokenizer
+
+line_counts = attrgetter("line_count")
+
+# First tokens that would make a segment the continuation of the statement before it
+CONTINUATION_TOKENS = ("OPERATEUR", "EQUALS_EQUIV", "ASSIGNATION", "SINON")
+
+# Line numbers written in the error messages : of the tokenizer and of this module, of a Token
+MESSAGE_LINES = re.compile(r"(ligne |line=)(\d+)")
+
+
+class Segment:
+    __slots__ = ("text", "line_count", "statements", "error")
+
+    def __init__(self, text, statements, error=None):
+        self.text = text  # lines of the segment joined with "\n", without the final line break
+        self.line_count = text.count("\n") + 1
+        self.statements = statements  # top-level statements, empty for a segment in error
+        # (line in the segment starting at 0, message, line of the segment in the document when the
+        # message was written) or None
+        self.error = error
+
+
+# Lines of the segment text (or region) from first to last, both counted from 0
+def slice_lines(lines, first, last):
+    return "\n".join(lines[first:last + 1])
+
+
+# Segments of a region of the document. Returns None when the region ends in the middle of a
+# statement (unclosed block, string...) and is not the end of the document : it has to be extended.
+def parse_region(text, first_line, at_end):
+    lines = text.split("\n")
+    try:
+        tokens = Tokenizer(text, first_line).tokenize()
+    except SyntaxError as e:
+        if not at_end and '"' in text:  # maybe a string going on in the next segment
+            return None
+        line = re.search(r"ligne (\d+)", str(e))
+        return [Segment(text, [], (int(line.group(1)) - first_line if line else 0, str(e), first_line))]
+
+    parser = Parser(tokens)
+    spans = []  # (first line, last line, statement) relative to the region
+    error = None
+    while tokens[parser.pos].type != "EOF":
+        start = tokens[parser.pos]
+        if start.type == "ACCOLADE_FERM":
+            error = (start.line - first_line, f"Accolade fermante sans accolade ouvrante (ligne {start.line})")
+            break
+        try:
+            statement = parser.parse_statement()
+        except (SyntaxError, IndexError) as e:
+            if parser.pos >= len(tokens) - 1 and not at_end:
+                return None
+            error = (start.line - first_line, str(e) or "Fin du code inattendue")
+            break
+        last = tokens[parser.pos - 1]
+        last_line = last.line + (last.value.count("\n") if last.type == "CHAINE" else 0)
+        spans.append((start.line - first_line, last_line - first_line, statement))
+
+    # Statements sharing a line go in the same segment, blank lines stay with the statement before
+    groups = []  # [first line, [statements], last line]
+    for first, last, statement in spans:
+        if groups and first <= groups[-1][2]:
+            groups[-1][1].append(statement)
+            groups[-1][2] = max(groups[-1][2], last)
+        else:
+            groups.append([first, [statement], last])
+    error_line = None
+    if error is not None:
+        error_line = error[0]
+        if groups and error_line <= groups[-1][2]:  # error on the last line of the statements before
+            error_line = groups.pop()[0]
+        if not groups:
+            error_line = 0
+
+    segments = []
+    for index, (first, statements, _) in enumerate(groups):
+        if index == 0:
+            first = 0  # leading blank lines of the region
+        if index + 1 < len(groups):
+            end = groups[index + 1][0] - 1
+        elif error_line is not None:
+            end = error_line - 1
+        else:
+            end = len(lines) - 1
+        segments.append(Segment(slice_lines(lines, first, end), statements))
+    if error_line is not None:
+        error_text = slice_lines(lines, error_line, len(lines) - 1)
+        segments.append(Segment(error_text, [], (error[0] - error_line, error[1], first_line + error_line)))
+    if not segments:  # blank region
+        segments.append(Segment(text, []))
+    return segments
+
+
+# First token of a text (blank spaces skipped), None when there is none or it can't be read
+def first_token_type(text):
+    match = Tokenizer.master_regex.match(text)
+    if match and match.lastgroup == "ESPACE":
+        match = Tokenizer.master_regex.match(text, match.end())
+    return match.lastgroup if match else None
+
+
+# Segments of a document and their last line numbers. The line numbers are kept like a gap buffer :
+# exact before self.boundary, off by self.shift after it (the line count change of the edits made
+# before them), so an edit only updates the numbers between the previous edit and this one.
+class IncrementalParser:
+    def __init__(self, text=""):
+        self.segments = parse_region(text, 1, True)
+        self.ends = list(accumulate(map(line_counts, self.segments)))  # last line of every segment
+        self.boundary = len(self.ends)
+        self.shift = 0
+        self.error_segments = [segment for segment in self.segments if segment.error is not None]
+        self.reparsed_lines = self.line_count  # size of the last re-parsed region, for statistics
+
+    @property
+    def line_count(self):
+        return self.end_of(len(self.segments) - 1)
+
+    # Last line number of the segment at index
+    def end_of(self, index):
+        if index < 0:
+            return 0
+        return self.ends[index] + (self.shift if index >= self.boundary else 0)
+
+    # Index of the segment holding line
+    def segment_at(self, line):
+        if self.boundary and line <= self.ends[self.boundary - 1]:
+            return bisect_left(self.ends, line, 0, self.boundary)
+        return min(bisect_left(self.ends, line - self.shift, self.boundary), len(self.ends) - 1)
+
+    def move_boundary(self, index):
+        ends, shift = self.ends, self.shift
+        if index > self.boundary:
+            for i in range(self.boundary, index):
+                ends[i] += shift
+        else:
+            for i in range(index, self.boundary):
+                ends[i] -= shift
+        self.boundary = index
+
+    def text(self):
+        return "\n".join(segment.text for segment in self.segments)
+
+    # old_count lines starting at first_line (counted from 1) replaced by the lines of new_text
+    def edit(self, first_line, old_count, new_text):
+        segments = self.segments
+        first = max(self.segment_at(first_line) - 1, 0)
+        last = self.segment_at(first_line + old_count - 1)
+        region_line = self.end_of(first - 1) + 1
+
+        lines = "\n".join(segment.text for segment in segments[first:last + 1]).split("\n")
+        offset = first_line - region_line
+        lines[offset:offset + old_count] = new_text.split("\n")
+        text = "\n".join(lines)
+
+        # Region extended (1, 2, 4... segments) while it ends inside a statement
+        step = 1
+        while True:
+            at_end = last == len(segments) - 1
+            new_segments = parse_region(text, region_line, at_end)
+            if new_segments is not None and (at_end or first_token_type(segments[last + 1].text)
+                                             not in CONTINUATION_TOKENS):
+                break
+            following = segments[last + 1:last + 1 + step]
+            text = "\n".join([text] + [segment.text for segment in following])
+            last += len(following)
+            step *= 2
+
+        if self.error_segments:
+            replaced = set(map(id, segments[first:last + 1]))
+            self.error_segments = [segment for segment in self.error_segments if id(segment) not in replaced]
+        self.error_segments.extend(segment for segment in new_segments if segment.error is not None)
+
+        old_end = self.end_of(last)
+        self.move_boundary(first)
+        segments[first:last + 1] = new_segments
+        new_ends = list(accumulate(map(line_counts, new_segments), initial=region_line - 1))[1:]
+        self.ends[first:last + 1] = new_ends
+        self.boundary = first + len(new_ends)
+        self.shift += new_ends[-1] - old_end
+        self.reparsed_lines = text.count("\n") + 1
+
+    # text added at the end of the document (e.g. a file loaded piece by piece)
+    def append(self, text):
+        last_line = self.segments[-1].text.rpartition("\n")[2]
+        self.edit(self.line_count, 1, last_line + text)
+
+    # (line, message) of the syntax errors, in the order of the document. The line numbers of a message
+    # follow its segment when the edits before it moved it.
+    def errors(self):
+        result = []
+        for segment in self.error_segments:
+            index = self.segments.index(segment)
+            first_line = self.end_of(index - 1) + 1
+            line, message, parsed_line = segment.error
+            moved = first_line - parsed_line
+            if moved:
+                message = MESSAGE_LINES.sub(lambda match: f"{match.group(1)}{int(match.group(2)) + moved}", message)
+            result.append((first_line + line, message))
+        return sorted(result)
+
+    # AST of the whole document, the statements of unchanged segments are the same objects
+    def program(self):
+        return Program(list(chain.from_iterable(map(attrgetter("statements"), self.segments))))
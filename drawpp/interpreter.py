@@ -0,0 +1,171 @@
+import math
+
+from .nodes import NodeVisitor
+from .symbols import PRELUDE_VALUES
+
+
+# "left operator right" evaluated like the generated C : int division truncated toward 0, 0/1 comparisons
+def apply_operator(operator, left, right):
+    if operator == "+":
+        return left + right
+    elif operator == "-":
+        return left - right
+    elif operator == "*":
+        return left * right
+    elif operator == "/":
+        if right == 0:
+            raise ZeroDivisionError("Division par zéro")
+        if isinstance(left, int) and isinstance(right, int):
+            quotient = abs(left) // abs(right)
+            return quotient if (left < 0) == (right < 0) else -quotient
+        return left / right
+    elif operator == "<":
+        return int(left < right)
+    elif operator == ">":
+        return int(left > right)
+    elif operator == "==":
+        return int(left == right)
+    raise SyntaxError(f"Opérateur non supporté : {operator}")
+
+
+# Evaluation of a Draw++ program with the semantics of the generated C code and of forme.c :
+# typed variables declared on first assignment, block scopes, cursor globals x, y, dx, dy.
+# Draw commands are sent to a canvas with the methods draw_square, draw_circle, draw_line,
+# draw_arc and draw_cursor, taking the int parameters of the C functions.
+class Interpreter(NodeVisitor):
+    def __init__(self, canvas, output=None, max_steps=None):
+        self.canvas = canvas
+        self.output = output  # text stream receiving afficher(...), None to ignore it
+        self.max_steps = max_steps  # max number of executed statements, None for no limit
+
+    def run(self, ast):
+        self.globals = dict(PRELUDE_VALUES)
+        self.scopes = [{}]
+        self.steps = 0
+        self.visit(ast)
+        return self.canvas
+
+    # Counts one executed statement or loop iteration
+    def step(self):
+        self.steps += 1
+        if self.max_steps is not None and self.steps > self.max_steps:
+            raise RuntimeError(f"Limite de {self.max_steps} instructions atteinte")
+
+    def visit_Program(self, ast):
+        for statement in ast.body:
+            self.step()
+            self.visit(statement)
+
+    def block(self, ast):
+        self.scopes.append({})
+        self.visit(ast)
+        self.scopes.pop()
+
+    def visit_Block(self, ast):
+        self.block(ast.body)
+
+    # Innermost scope declaring name, None if it is not declared
+    def scope_of(self, name):
+        for scope in reversed(self.scopes):
+            if name in scope:
+                return scope
+        return None
+
+    def visit_Assignment(self, ast):
+        value = self.visit(ast.value)
+        scope = self.scope_of(ast.variable)
+        if scope is None:
+            self.scopes[-1][ast.variable] = value  # declaration, its type is the one of the value
+            return
+        previous = scope[ast.variable]
+        if isinstance(previous, int) and isinstance(value, float):
+            value = int(value)  # C conversion, truncated toward 0
+        elif isinstance(previous, float) and isinstance(value, int):
+            value = float(value)
+        scope[ast.variable] = value
+
+    def visit_IfStatement(self, ast):
+        if self.visit(ast.condition):
+            self.block(ast.then_branch)
+        elif ast.else_branch:
+            self.block(ast.else_branch)
+
+    def visit_WhileLoop(self, ast):
+        while self.visit(ast.condition):
+            self.step()
+            self.block(ast.body)
+
+    def visit_ForLoop(self, ast):
+        # for (int i = start; i <= end; i++), end evaluated at every iteration
+        loop_scope = {ast.variable: int(self.visit(ast.start))}
+        self.scopes.append(loop_scope)
+        while loop_scope[ast.variable] <= self.visit(ast.end):
+            self.step()
+            self.block(ast.body)
+            loop_scope[ast.variable] += 1
+        self.scopes.pop()
+
+    def visit_PrintStatement(self, ast):
+        values = [self.visit(value) for value in ast.values[:2]]  # printf(format, value)
+        if self.output is None:
+            return
+        text = str(values[0]) if values else ""
+        if len(values) > 1:
+            try:
+                text = text % values[1]
+            except (TypeError, ValueError):
+                text = f"{text} {values[1]}"
+        self.output.write(text + "\n")
+
+    def visit_BinaryExpression(self, ast):
+        return apply_operator(ast.operator, self.visit(ast.left), self.visit(ast.right))
+
+    def visit_Literal(self, ast):
+        if isinstance(ast.value, str):
+            return ast.value.strip('"')
+        return ast.value
+
+    def visit_Variable(self, ast):
+        scope = self.scope_of(ast.name)
+        if scope is not None:
+            return scope[ast.name]
+        if ast.name in self.globals:
+            return self.globals[ast.name]
+        raise NameError(f"Variable non définie : {ast.name}")
+
+    # Parameters of a draw built-in, converted to int like the C function arguments
+    def arguments(self, ast):
+        values = []
+        for param in ast.params:
+            value = self.visit(param)
+            if isinstance(value, str):
+                raise TypeError(f"{ast.function} attend des nombres, pas {value!r}")
+            values.append(int(value))
+        return values
+
+    def visit_DrawSquare(self, ast):
+        self.canvas.draw_square(*self.arguments(ast))
+
+    def visit_DrawCircle(self, ast):
+        self.canvas.draw_circle(*self.arguments(ast))
+
+    def visit_DrawLine(self, ast):
+        self.canvas.draw_line(*self.arguments(ast))
+
+    def visit_DrawArc(self, ast):
+        self.canvas.draw_arc(*self.arguments(ast))
+
+    def visit_DrawCursor(self, ast):
+        self.canvas.draw_cursor(*self.arguments(ast))
+
+    def visit_MoveCursor(self, ast):
+        dx, dy = self.arguments(ast)
+        self.globals["x"] += dx
+        self.globals["y"] += dy
+
+    def visit_RotateCursor(self, ast):
+        (angle,) = self.arguments(ast)
+        angle_rad = angle * math.pi / 180.0
+        dx, dy = self.globals["dx"], self.globals["dy"]
+        self.globals["dx"] = int(dx * math.cos(angle_rad) - dy * math.sin(angle_rad))
+        self.globals["dy"] = int(dx * math.sin(angle_rad) + dy * math.cos(angle_rad))
@@ -0,0 +1,274 @@
+class Node:
+    __slots__ = ()
+    field_names = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Slots of the class and of its parents (draw commands inherit "params")
+        cls.field_names = cls.field_names + tuple(cls.__dict__.get("__slots__", ()))
+
+    # Children names in the order they are read in the source
+    def fields(self):
+        return self.field_names
+
+    def __repr__(self):
+        values = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.fields())
+        return f"{type(self).__name__}({values})"
+
+    # Pickled as the flat list of flatten_tree : the default pickling recurses once per level of
+    # the tree, deep blocks or long operator chains would exceed the recursion limit
+    def __reduce__(self):
+        return build_tree, (flatten_tree(self),)
+
+
+class Program(Node):
+    __slots__ = ("body",)
+
+    def __init__(self, body):
+        self.body = body  # list of statements
+
+
+# Nested block with its own scope, "{ ... }" in C
+class Block(Node):
+    __slots__ = ("body",)
+
+    def __init__(self, body):
+        self.body = body  # Program
+
+
+class IfStatement(Node):
+    __slots__ = ("condition", "then_branch", "else_branch")
+
+    def __init__(self, condition, then_branch, else_branch=None):
+        self.condition = condition
+        self.then_branch = then_branch  # Program
+        self.else_branch = else_branch  # Program or None
+
+
+class ForLoop(Node):
+    __slots__ = ("variable", "start", "end", "body")
+
+    def __init__(self, variable, start, end, body):
+        self.variable = variable  # name of the loop variable
+        self.start = start
+        self.end = end  # included in the range
+        self.body = body  # Program
+
+
+class WhileLoop(Node):
+    __slots__ = ("condition", "body")
+
+    def __init__(self, condition, body):
+        self.condition = condition
+        self.body = body  # Program
+
+
+class Assignment(Node):
+    __slots__ = ("variable", "value")
+
+    def __init__(self, variable, value):
+        self.variable = variable  # name of the assigned variable
+        self.value = value
+
+
+class PrintStatement(Node):
+    __slots__ = ("values",)
+
+    def __init__(self, values):
+        self.values = values  # format string first, then the printed expressions
+
+
+# Precedence of the binary operators, tighter first : the order of C for the ones it has. "=" and "!"
+# alone are not C operators, they are kept with the comparisons.
+OPERATOR_PRECEDENCE = {"*": 3, "/": 3, "+": 2, "-": 2, "<": 1, ">": 1, "==": 0, "=": 0, "!": 0}
+
+
+class BinaryExpression(Node):
+    __slots__ = ("operator", "left", "right")
+
+    def __init__(self, operator, left, right):
+        self.operator = operator
+        self.left = left
+        self.right = right
+
+
+class Literal(Node):
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value  # int, float or str (with its double quotes)
+
+
+class Variable(Node):
+    __slots__ = ("name",)
+
+    def __init__(self, name):
+        self.name = name
+
+
+# Draw built-ins : one class per command, all sharing a list of parameter expressions
+class DrawCommand(Node):
+    __slots__ = ("params",)
+    token_type = None  # token starting the command
+    function = None  # C function called by the generated code
+    uses_renderer = True  # the C function takes the SDL renderer as first argument
+    param_names = ()
+
+    def __init__(self, params):
+        self.params = params
+
+
+class DrawLine(DrawCommand):
+    __slots__ = ()
+    token_type = "DRAW_LINE"
+    function = "drawLine"
+    param_names = ("x1", "y1", "x2", "y2")
+
+
+class DrawSquare(DrawCommand):
+    __slots__ = ()
+    token_type = "DRAW_SQUARE"
+    function = "drawSquare"
+    param_names = ("x", "y", "size")
+
+
+class DrawCircle(DrawCommand):
+    __slots__ = ()
+    token_type = "DRAW_CIRCLE"
+    function = "drawCircle"
+    param_names = ("x", "y", "radius")
+
+
+class DrawArc(DrawCommand):
+    __slots__ = ()
+    token_type = "DRAW_ARC"
+    function = "drawArc"
+    param_names = ("x", "y", "radius", "start_angle", "end_angle")
+
+
+class DrawCursor(DrawCommand):
+    __slots__ = ()
+    token_type = "DRAW_CURSOR"
+    function = "drawCursor"
+    param_names = ("x", "y")
+
+
+class MoveCursor(DrawCommand):
+    __slots__ = ()
+    token_type = "MOVE_CURSOR"
+    function = "moveCursor"
+    uses_renderer = False
+    param_names = ("dx", "dy")
+
+
+class RotateCursor(DrawCommand):
+    __slots__ = ()
+    token_type = "ROTATE_CURSOR"
+    function = "rotateCursor"
+    uses_renderer = False
+    param_names = ("angle",)
+
+
+# Every node of the tree (node included), depth first, without recursion
+def walk(node):
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        yield node
+        for name in reversed(node.fields()):
+            value = getattr(node, name)
+            if isinstance(value, Node):
+                stack.append(value)
+            elif isinstance(value, list):
+                stack.extend(reversed(value))
+
+
+# Place of a child node in the fields of a flatten_tree record, pickled by name (one instance)
+class ChildSlot:
+    __slots__ = ()
+
+    def __reduce__(self):
+        return "CHILD"
+
+
+CHILD = ChildSlot()
+
+
+# Nodes of a tree in pre-order as (class, field values) records where every child node (in a field or
+# in a list) is replaced by CHILD : no record refers to another, so the list is pickled without
+# recursion. build_tree rebuilds the tree.
+def flatten_tree(node):
+    records = []
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        values = []
+        children = []
+        for value in map(node.__getattribute__, node.field_names):
+            if isinstance(value, Node):
+                children.append(value)
+                value = CHILD
+            elif isinstance(value, list):
+                children += [item for item in value if isinstance(item, Node)]
+                value = [CHILD if isinstance(item, Node) else item for item in value]
+            values.append(value)
+        records.append((type(node), tuple(values)))
+        stack += reversed(children)
+    return records
+
+
+# Tree of the records of flatten_tree, without recursion. Read from the end, every node comes after
+# its children, its first child built last : each CHILD takes the last node built.
+def build_tree(records):
+    built = []
+    for node_class, values in reversed(records):
+        node = node_class.__new__(node_class)
+        for name, value in zip(node_class.field_names, values):
+            if value is CHILD:
+                value = built.pop()
+            elif isinstance(value, list):
+                value = [built.pop() if item is CHILD else item for item in value]
+            setattr(node, name, value)
+        built.append(node)
+    return built[0]
+
+
+# Deepest nesting of the statement bodies of a tree (Program, Block, si, pour, tantque), without recursion
+def nesting_depth(node):
+    deepest = 0
+    stack = [(node, 0)]
+    while stack:
+        node, depth = stack.pop()
+        if isinstance(node, Program):
+            deepest = max(deepest, depth)
+            stack.extend((statement, depth + 1) for statement in node.body)
+        elif isinstance(node, (Block, IfStatement, ForLoop, WhileLoop)):
+            stack.extend((getattr(node, name), depth) for name in node.fields()
+                         if name in ("body", "then_branch", "else_branch") and getattr(node, name) is not None)
+    return deepest
+
+
+class NodeVisitor:
+    # Dispatch on the class of the node : method "visit_<ClassName>" (or the one of a
+    # parent class, e.g. visit_DrawCommand) is looked up once per node class
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._methods = {}
+
+    def visit(self, node):
+        try:
+            method = self._methods[type(node)]
+        except KeyError:
+            method = self._methods[type(node)] = self._find_method(type(node))
+        return method(self, node)
+
+    @classmethod
+    def _find_method(cls, node_class):
+        for klass in node_class.__mro__:
+            method = getattr(cls, f"visit_{klass.__name__}", None)
+            if method is not None:
+                return method
+        return cls.generic_visit
+
+    def generic_visit(self, node):
+        raise ValueError(f"Unknown AST node type: {type(node).__name__} in {node}")
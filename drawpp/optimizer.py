@@ -0,0 +1,298 @@
+import math
+
+from .nodes import (
+    Node, Program, Block, IfStatement, ForLoop, WhileLoop, Assignment, PrintStatement, BinaryExpression, Literal,
+    Variable, NodeVisitor, walk,
+)
+from .symbols import SymbolTable, infer_type
+
+
+# Operators folded at compile time
+FOLDABLE_OPERATORS = ("*", "/", "+", "-", "<", ">", "==")
+C_INT_MIN, C_INT_MAX = -2 ** 31, 2 ** 31 - 1
+
+
+# Value of "left operator right" computed like the generated C would, None if it can't be folded
+def fold_constant(operator, left, right):
+    if operator not in FOLDABLE_OPERATORS or isinstance(left, str) or isinstance(right, str):
+        return None
+    if operator == "+":
+        value = left + right
+    elif operator == "-":
+        value = left - right
+    elif operator == "*":
+        value = left * right
+    elif operator == "/":
+        if right == 0:
+            return None
+        if isinstance(left, int) and isinstance(right, int):
+            value = abs(left) // abs(right) * (1 if (left < 0) == (right < 0) else -1)  # C truncates to 0
+        else:
+            value = left / right
+    elif operator == "<":
+        value = int(left < right)
+    elif operator == ">":
+        value = int(left > right)
+    else:
+        value = int(left == right)
+
+    if isinstance(value, int) and not C_INT_MIN <= value <= C_INT_MAX:
+        return None  # overflow of a C int
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+# Value of an int Literal, None for any other expression
+def int_value(node):
+    if isinstance(node, Literal) and isinstance(node.value, int):
+        return node.value
+    return None
+
+
+# Names of the variables assigned anywhere in a block, by a statement or by the "=" of an expression
+def assigned_names(block):
+    names = set()
+    for node in walk(block):
+        if isinstance(node, Assignment):
+            names.add(node.variable)
+        elif isinstance(node, BinaryExpression) and node.operator == "=" and isinstance(node.left, Variable):
+            names.add(node.left.name)
+    return names
+
+
+# (first, last) of a pour loop unrolled whatever the values known around it : literal bounds, loop
+# variable not assigned in the body, at most unroll_limit iterations. None for any other loop.
+def static_range(loop, unroll_limit):
+    first, last = int_value(loop.start), int_value(loop.end)
+    if first is None or last is None or last - first + 1 > unroll_limit or loop.variable in assigned_names(loop.body):
+        return None
+    return first, last
+
+
+# Number of nodes of a tree once its pour loops with a static_range are unrolled, nested ones included
+def unrolled_size(node, unroll_limit):
+    size = 0
+    stack = [(node, 1)]  # node, number of copies of it
+    while stack:
+        node, copies = stack.pop()
+        size += copies
+        if isinstance(node, ForLoop) and static_range(node, unroll_limit) is not None:
+            first, last = static_range(node, unroll_limit)
+            stack.append((node.body, copies * max(last - first + 1, 0)))
+            continue
+        for value in map(node.__getattribute__, node.field_names):
+            if isinstance(value, Node):
+                stack.append((value, copies))
+            elif isinstance(value, list):
+                stack.extend((item, copies) for item in value if isinstance(item, Node))
+    return size
+
+
+# AST to AST pass run between Parser.parse and CTranslator.translate : constant folding and
+# propagation, removal of dead si/tantque branches, unrolling of small pour loops.
+# The input tree is not modified, statements visitors return a node, a list of nodes or None.
+# Unrolled copies of nested loops multiply : unroll_budget bounds the nodes all the unrollings of a
+# program may produce, the loops past it are kept.
+class Optimizer(NodeVisitor):
+    def __init__(self, unroll_limit=8, unroll_budget=4096):
+        self.unroll_limit = unroll_limit  # max number of iterations of an unrolled loop
+        self.unroll_budget = unroll_budget
+        self.stats = {}
+
+    def optimize(self, ast):
+        self.symbols = SymbolTable()  # same scopes as the C declarations
+        self.constants = {}  # int variables whose value is known at this point
+        self.budget_left = self.unroll_budget
+        self.prepaid = 0  # > 0 while unrolling a loop : its cost counted the static loops of its body
+        self.stats = dict.fromkeys(
+            ("constant_folding", "constant_propagation", "dead_branches", "loop_unrolling"), 0
+        )
+        nodes_before = sum(1 for _ in walk(ast))
+        result = self.visit(ast)
+        self.stats["nodes_before"] = nodes_before
+        self.stats["nodes_after"] = sum(1 for _ in walk(result))
+        self.stats["nodes_removed"] = nodes_before - self.stats["nodes_after"]
+        return result
+
+    def visit_Program(self, ast):
+        return Program(self.statements(ast.body))
+
+    def statements(self, body):
+        result = []
+        for statement in body:
+            optimized = self.visit(statement)
+            if isinstance(optimized, list):
+                result.extend(optimized)
+            elif optimized is not None:
+                result.append(optimized)
+        return result
+
+    # Statements of a block with their own scope, returns them and the names declared in it
+    def scoped_statements(self, block):
+        self.symbols.push()
+        statements = self.statements(block.body)
+        declared = self.symbols.scopes[-1]
+        for name in declared:
+            self.constants.pop(name, None)  # out of scope after the block
+        self.symbols.pop()
+        return statements, declared
+
+    def block(self, block):
+        return Program(self.scoped_statements(block)[0])
+
+    # Statements of a branch kept in place of its si/pour : spliced, or in a Block if it declares variables
+    def inline_block(self, block):
+        statements, declared = self.scoped_statements(block)
+        if declared:
+            return [Block(Program(statements))]
+        return statements
+
+    def forget(self, names):
+        for name in names:
+            self.constants.pop(name, None)
+
+    # Expression with folded constants. The tree has the grouping of C (the translator adds the
+    # parentheses it needs), so any operator on two literals is folded. Operands are folded before
+    # their operator from an explicit stack : a long chain of operators is a deep tree.
+    # "=" is a C assignment : its left side is kept as it is and the variable loses its known value.
+    def expression(self, node):
+        results = []
+        stack = [(node, False)]
+        while stack:
+            node, operands_done = stack.pop()
+            match node:
+                case _ if operands_done is None:
+                    results.append(node)  # assigned by "=", kept as it is
+                case BinaryExpression(operator="=") if not operands_done:
+                    stack += ((node, True), (node.right, False), (node.left, None))
+                case BinaryExpression(operator="=", left=Variable(name=name)):
+                    self.constants.pop(name, None)
+                    right = results.pop()
+                    results.append(BinaryExpression("=", results.pop(), right))
+                case Variable(name=name) if name in self.constants:
+                    self.stats["constant_propagation"] += 1
+                    results.append(Literal(self.constants[name]))
+                case BinaryExpression() if not operands_done:
+                    stack += ((node, True), (node.right, False), (node.left, False))
+                case BinaryExpression(operator=operator):
+                    right = results.pop()
+                    left = results.pop()
+                    if isinstance(left, Literal) and isinstance(right, Literal):
+                        value = fold_constant(operator, left.value, right.value)
+                        if value is not None:
+                            self.stats["constant_folding"] += 1
+                            results.append(Literal(value))
+                            continue
+                    results.append(BinaryExpression(operator, left, right))
+                case _:
+                    results.append(node)
+        return results[0]
+
+    def visit_Literal(self, ast):
+        return self.expression(ast)
+
+    def visit_Variable(self, ast):
+        return self.expression(ast)
+
+    def visit_BinaryExpression(self, ast):
+        return self.expression(ast)
+
+    def visit_Assignment(self, ast):
+        value = self.expression(ast.value)
+        value_type = self.symbols.lookup(ast.variable)
+        if value_type is None:
+            value_type = infer_type(value, self.symbols)
+            self.symbols.declare(ast.variable, value_type)
+        if value_type == "int" and isinstance(value, Literal) and isinstance(value.value, int):
+            self.constants[ast.variable] = value.value
+        else:
+            self.constants.pop(ast.variable, None)
+        return Assignment(ast.variable, value)
+
+    def visit_PrintStatement(self, ast):
+        return PrintStatement([self.expression(value) for value in ast.values])
+
+    def visit_DrawCommand(self, ast):
+        return type(ast)([self.expression(param) for param in ast.params])
+
+    def visit_IfStatement(self, ast):
+        condition = self.expression(ast.condition)
+        if isinstance(condition, Literal):
+            # Only one branch can run
+            self.stats["dead_branches"] += 1
+            branch = ast.then_branch if condition.value else ast.else_branch
+            return self.inline_block(branch) if branch else None
+
+        before = dict(self.constants)
+        then_branch = self.block(ast.then_branch)
+        then_constants = self.constants
+        self.constants = before
+        else_branch = self.block(ast.else_branch) if ast.else_branch else None
+        # Values known after the si : the ones both branches agree on
+        self.constants = {
+            name: value for name, value in then_constants.items() if self.constants.get(name) == value
+        }
+        return IfStatement(condition, then_branch, else_branch)
+
+    def visit_WhileLoop(self, ast):
+        self.forget(assigned_names(ast.body))  # values can change from one iteration to the next
+        condition = self.expression(ast.condition)
+        if isinstance(condition, Literal) and not condition.value:
+            self.stats["dead_branches"] += 1
+            return None
+        body = self.block(ast.body)
+        self.forget(assigned_names(ast.body))
+        return WhileLoop(condition, body)
+
+    def visit_ForLoop(self, ast):
+        variable = ast.variable
+        assigned = assigned_names(ast.body)
+        outer_value = self.constants.pop(variable, None)  # the loop variable hides an outer one
+        start = self.expression(ast.start)
+        self.forget(assigned)
+        end = self.expression(ast.end)  # evaluated again at every iteration
+
+        first, last = int_value(start), int_value(end)
+        if first is not None and last is not None and variable not in assigned \
+                and last - first + 1 <= self.unroll_limit and self.unroll_cost(ast, first, last) <= self.budget_left:
+            if last < first:
+                self.stats["dead_branches"] += 1  # the body never runs
+                result = None
+            else:
+                self.stats["loop_unrolling"] += 1
+                self.budget_left -= self.unroll_cost(ast, first, last)
+                result = self.unroll(variable, first, last, ast.body)
+            if outer_value is not None:
+                self.constants[variable] = outer_value
+            return result
+
+        self.symbols.push()
+        self.symbols.declare(variable, "int")
+        body = self.block(ast.body)
+        self.symbols.pop()
+        self.forget(assigned)
+        if outer_value is not None and variable not in assigned:
+            self.constants[variable] = outer_value
+        return ForLoop(variable, start, end, body)
+
+    # Nodes an unrolling of loop from first to last takes from the budget : its iterations times its body
+    # with the nested static loops unrolled. Nothing for a static loop counted by a loop around it.
+    def unroll_cost(self, loop, first, last):
+        if last < first or (self.prepaid and static_range(loop, self.unroll_limit) is not None):
+            return 0
+        return (last - first + 1) * unrolled_size(loop.body, self.unroll_limit)
+
+    # One copy of the body per iteration, with the loop variable replaced by its value
+    def unroll(self, variable, start, end, body):
+        statements = []
+        self.prepaid += 1
+        for value in range(start, end + 1):
+            self.symbols.push()
+            self.symbols.declare(variable, "int")
+            self.constants[variable] = value
+            statements.extend(self.inline_block(body))
+            self.constants.pop(variable, None)
+            self.symbols.pop()
+        self.prepaid -= 1
+        return statements
@@ -0,0 +1,202 @@
+from .nodes import (
+    Program, IfStatement, ForLoop, WhileLoop, Assignment, PrintStatement, BinaryExpression, Literal, Variable,
+    DrawLine, DrawSquare, DrawCircle, DrawArc, DrawCursor, MoveCursor, RotateCursor, OPERATOR_PRECEDENCE,
+)
+
+# Draw built-ins by the token starting them, all parsed by Parser.parse_draw_command
+DRAW_COMMANDS = {node.token_type: node for node in (
+    DrawLine, DrawSquare, DrawCircle, DrawArc, DrawCursor, MoveCursor, RotateCursor,
+)}
+
+# Source spelling of the operators whose C spelling differs
+OPERATOR_ALIASES = {"==>": "=="}
+OPERATOR_TOKENS = ("OPERATEUR", "EQUALS_EQUIV")
+OPEN_GROUP = (-1, "(")  # "(" on the operator stack of Parser.parse_expression, binds less than any operator
+
+
+# Neither statements nor expressions are parsed by recursion : the blocks still open and the
+# operators waiting for their right operand are kept on explicit stacks, so a program of any
+# nesting depth is parsed in time and memory linear in its number of tokens.
+class Parser:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+        self.blocks = []  # blocks open in the statement being parsed : [finish, statements]
+
+    def consume(self, expected_type=None):
+        current_token = self.tokens[self.pos]
+        if expected_type and current_token[0] != expected_type:
+            raise SyntaxError(f"Expected {expected_type}, got {current_token[0]}")
+        self.pos += 1
+        return current_token
+
+    def peek(self):
+        return self.tokens[self.pos]
+
+    def parse(self):
+        statements = []
+        while self.peek()[0] not in ("EOF", "ACCOLADE_FERM"):
+            statements.append(self.parse_statement())
+        return Program(statements)
+
+    # One top-level statement, its nested blocks included. The parsing methods of statement_parsers
+    # return the statement, or None when they opened a block with open_block : the statements that
+    # follow go into it, up to its "}", then finish(body) builds the statement (or opens another block).
+    def parse_statement(self):
+        blocks = self.blocks = []
+        while True:
+            token = self.peek()
+            if blocks and token[0] in ("ACCOLADE_FERM", "EOF"):
+                self.consume("ACCOLADE_FERM")
+                finish, statements = blocks.pop()
+                statement = finish(Program(statements))
+            else:
+                parse = self.statement_parsers.get(token[0])
+                if parse is None:
+                    raise SyntaxError(f"Unexpected token: {token}")
+                statement = parse(self)
+            if statement is None:  # a block has been opened
+                continue
+            if not blocks:
+                return statement
+            blocks[-1][1].append(statement)
+
+    def open_block(self, finish):
+        self.consume("ACCOLADE_OUV")
+        self.blocks.append([finish, []])
+
+    def parse_if(self):
+        self.consume("SI")
+        condition = self.parse_expression()
+        self.open_block(lambda then_branch: self.parse_else(condition, then_branch))
+
+    def parse_else(self, condition, then_branch):
+        if self.peek()[0] != "SINON":
+            return IfStatement(condition, then_branch)
+        self.consume("SINON")
+        self.open_block(lambda else_branch: IfStatement(condition, then_branch, else_branch))
+
+    def parse_for(self):
+        self.consume("POUR")  # Consuming the word "for"
+        variable = self.consume("VARIABLE")[1]  # Identifying the variable
+        self.consume("DE")  # Consuming the word "de"
+        start = self.parse_expression()  # Analysing beginning of range
+        self.consume("A")  # Consuming word 'à'
+        end = self.parse_expression()  # Analysing end of range
+        self.open_block(lambda body: ForLoop(variable, start, end, body))
+
+    def parse_while(self):
+        self.consume("TANTQUE")
+        condition = self.parse_expression()
+        self.open_block(lambda body: WhileLoop(condition, body))
+
+    # Assignment, or expression alone
+    def parse_variable(self):
+        if self.tokens[self.pos + 1][0] == "ASSIGNATION":
+            return self.parse_assignment()
+        return self.parse_expression()
+
+    def parse_assignment(self):
+        variable = self.consume("VARIABLE")
+        self.consume("ASSIGNATION")
+        value = self.parse_expression()
+        return Assignment(variable[1], value)
+
+    def parse_print(self):
+        self.consume("AFFICHER")
+        self.consume("PARENTHESE_OUV")
+        if self.peek()[0] == "PARENTHESE_FERM":
+            raise SyntaxError("Expected an expression, got PARENTHESE_FERM")  # afficher() : nothing to print
+
+        expressions = []
+        while self.peek()[0] != "PARENTHESE_FERM":
+            expr = self.parse_expression()  # This will now include the variables
+            expressions.append(expr)
+            if self.peek()[0] == "VIRGULE":
+                self.consume("VIRGULE")
+
+        self.consume("PARENTHESE_FERM")
+
+        # Return PrintStatement, but for each expression to print, str and variables are handled
+        return PrintStatement(expressions)
+
+    # Every draw built-in : name, then one expression per parameter of its node class
+    def parse_draw_command(self):
+        node_class = DRAW_COMMANDS[self.consume()[0]]
+        self.consume("PARENTHESE_OUV")
+        params = [self.parse_expression()]
+        for _ in range(len(node_class.param_names) - 1):
+            self.consume("VIRGULE")
+            params.append(self.parse_expression())
+        self.consume("PARENTHESE_FERM")
+        return node_class(params)
+
+    # Binary operators by OPERATOR_PRECEDENCE, left associative, and groups in parentheses.
+    # Operator precedence parsing on two stacks : an operator is applied to the two last operands
+    # once an operator that binds less tightly (or a closing parenthesis) follows it.
+    def parse_expression(self):
+        tokens = self.tokens
+        first = tokens[self.pos][0]
+        if first != "PARENTHESE_OUV" and first != "EOF" and tokens[self.pos + 1][0] not in OPERATOR_TOKENS:
+            return self.parse_primary()  # one operand alone, the most common expression
+
+        operands = []
+        operators = []  # (precedence, operator) waiting for their right operand, OPEN_GROUP for a "("
+        groups = 0  # OPEN_GROUP in operators
+        while True:
+            while tokens[self.pos][0] == "PARENTHESE_OUV":
+                self.pos += 1
+                operators.append(OPEN_GROUP)
+                groups += 1
+            operands.append(self.parse_primary())
+
+            token = tokens[self.pos]
+            while groups and token[0] == "PARENTHESE_FERM":
+                self.pos += 1
+                while operators[-1] is not OPEN_GROUP:
+                    right = operands.pop()
+                    operands[-1] = BinaryExpression(operators.pop()[1], operands[-1], right)
+                operators.pop()
+                groups -= 1
+                token = tokens[self.pos]
+            if token[0] not in OPERATOR_TOKENS:
+                break
+            self.pos += 1
+            operator = OPERATOR_ALIASES.get(token[1], token[1])
+            precedence = OPERATOR_PRECEDENCE[operator]
+            while operators and operators[-1][0] >= precedence:  # never true for OPEN_GROUP
+                right = operands.pop()
+                operands[-1] = BinaryExpression(operators.pop()[1], operands[-1], right)
+            operators.append((precedence, operator))
+
+        if groups:
+            raise SyntaxError(f"Expected PARENTHESE_FERM, got {token[0]}")
+        while operators:
+            right = operands.pop()
+            operands[-1] = BinaryExpression(operators.pop()[1], operands[-1], right)
+        return operands[0]
+
+    def parse_primary(self):
+        token = self.tokens[self.pos]
+        self.pos += 1
+        if token[0] == "VARIABLE":
+            return Variable(token[1])
+        elif token[0] == "NOMBRE":
+            return Literal(int(token[1]))
+        elif token[0] == "FLOTTANT":
+            return Literal(float(token[1]))
+        elif token[0] == "CHAINE":
+            return Literal(token[1])
+        raise SyntaxError(f"Unexpected token in expression: {token}")
+
+    # Parsing method of a statement by the type of its first token
+    statement_parsers = {
+        "SI": parse_if,
+        "POUR": parse_for,
+        "TANTQUE": parse_while,
+        "AFFICHER": parse_print,
+        "VARIABLE": parse_variable,
+        "NOMBRE": parse_expression,  # expression alone
+        "CHAINE": parse_expression,
+        **dict.fromkeys(DRAW_COMMANDS, parse_draw_command),
+    }
@@ -0,0 +1,147 @@
+import mmap
+import os
+from contextlib import contextmanager, nullcontext
+
+from .culling import Culler
+from .nodes import walk, nesting_depth
+from .optimizer import Optimizer
+from .parser import Parser
+from .tokenizer import Tokenizer
+from .translator import CTranslator, write_c_program
+
+
+# Deepest nesting of blocks given to the Optimizer and the Culler, which recurse on the blocks : a
+# program nested deeper is translated without them (the parser and the translator have no limit)
+MAX_OPTIMIZED_DEPTH = 100
+
+
+# Stages reported to the progress callbacks and timed by the profilers, in order
+STAGES = ("tokenize", "parse", "optimize", "translate", "write", "build")
+
+
+# Context of a stage : progress(stage) is called when it starts, the profiler (see
+# drawpp.profiling.Profiler) times it. Without a profiler nothing is measured.
+def run_stage(progress, profiler, stage):
+    if progress is not None:
+        progress(stage)
+    return profiler.stage(stage) if profiler is not None else nullcontext()
+
+
+def count_tokens(profiler, tokens):
+    if profiler is not None:
+        profiler.count_by("tokens", (token.type for token in tokens))
+
+
+def count_nodes(profiler, ast):
+    if profiler is not None:
+        profiler.count_by("nodes", (type(node).__name__ for node in walk(ast)))
+
+
+# Read-only memory map of a source file, to pass as code to parse_source / compile_to_file : the
+# tokenizer decodes it piece by piece and the cache hashes it, a large file is never copied into a str
+@contextmanager
+def map_source(path):
+    with open(path, "rb") as file:
+        if not file.seek(0, 2):  # an empty file can't be mapped
+            yield b""
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as source:
+            yield source
+
+
+# AST of the source code (str, or UTF-8 bytes-like such as map_source), tokens and AST reused
+# from the cache when it has them.
+# progress(stage) is called when a stage of STAGES starts, profiler counts tokens and nodes by type.
+def parse_source(code, cache=None, progress=None, profiler=None):
+    if cache is None:
+        with run_stage(progress, profiler, "tokenize"):
+            tokens = Tokenizer(code).tokenize()
+        count_tokens(profiler, tokens)
+        with run_stage(progress, profiler, "parse"):
+            ast = Parser(tokens).parse()
+        count_nodes(profiler, ast)
+        return ast
+
+    key = cache.key(code)
+    ast = cache.get(key, "ast")
+    if ast is None:
+        with run_stage(progress, profiler, "tokenize"):
+            tokens = cache.get(key, "tokens")
+            if tokens is None:
+                tokens = Tokenizer(code).tokenize()
+                cache.put(key, "tokens", tokens)
+        count_tokens(profiler, tokens)
+        with run_stage(progress, profiler, "parse"):
+            ast = Parser(tokens).parse()
+            cache.put(key, "ast", ast)
+    count_nodes(profiler, ast)
+    return ast
+
+
+# Complete C program of the source code written into output_path : Tokenizer -> Parser -> Optimizer
+# -> CTranslator, the stages already done for the same source, prelude and compiler version are
+# skipped. Returns True when the whole program came from the cache.
+# With batch, the draw calls go through the draw batch of the prelude (see CTranslator), epilogue
+# chooses between the "interactive" window and the "offscreen" BMP export (see write_c_program).
+# With optimize and cull, the draw calls outside of the window or hidden under a later square are
+# removed (see Culler), stats receives the counters of the Culler when it runs. Programs nested
+# deeper than MAX_OPTIMIZED_DEPTH skip both passes.
+# progress(stage) is called when a stage of STAGES starts. profiler (a drawpp.profiling.Profiler)
+# times the stages and counts tokens, nodes, draw calls removed and bytes of C code : its report is
+# published at the end, even when the compile fails.
+# With builder (a drawpp.build.NativeBuilder), the C program is then compiled into an executable next
+# to output_path (stage "build"), the prelude object and unchanged programs coming from its cache.
+def compile_to_file(code, output_path, prelude_path, optimize=True, cache=None, ast=None, batch=False,
+                    epilogue="interactive", progress=None, cull=True, stats=None, profiler=None, builder=None):
+    cached = None
+    try:
+        cached = write_program(code, output_path, prelude_path, optimize, cache, ast, batch, epilogue, progress,
+                               cull, stats, profiler)
+        if builder is not None:
+            with run_stage(progress, profiler, "build"):
+                executable_cached = builder.build(output_path)
+            if profiler is not None:
+                profiler.count("executable_cached", int(executable_cached))
+        return cached
+    finally:
+        if profiler is not None:
+            profiler.publish(output=str(output_path), cached=cached)
+
+
+# Body of compile_to_file, True when the whole program came from the cache
+def write_program(code, output_path, prelude_path, optimize, cache, ast, batch, epilogue, progress, cull, stats,
+                  profiler):
+    if cache is not None:
+        with open(prelude_path, "rb") as prelude:
+            program_key = cache.key(code, prelude.read(), f"optimize={optimize}", f"batch={batch}",
+                                    f"epilogue={epilogue}", f"cull={cull}")
+        if cache.copy_to(program_key, "c", output_path):
+            return True
+
+    if ast is None:
+        ast = parse_source(code, cache, progress, profiler)
+    if optimize and nesting_depth(ast) > MAX_OPTIMIZED_DEPTH:
+        optimize = False
+        if profiler is not None:
+            profiler.count("optimizer_skipped")
+    if optimize:
+        with run_stage(progress, profiler, "optimize"):
+            ast = Optimizer().optimize(ast)
+            if cull:
+                culler = Culler()
+                ast = culler.cull(ast)
+        if cull:
+            if stats is not None:
+                stats.update(culler.stats)
+            if profiler is not None:
+                profiler.counters["culling"] = dict(culler.stats)
+    with open(output_path, "w") as file:
+        with run_stage(progress, profiler, "translate"):
+            write_c_program(file, ast, prelude_path, CTranslator(batch), epilogue)
+        with run_stage(progress, profiler, "write"):
+            file.flush()  # the end of the C code still in the buffer of the file
+            if cache is not None:
+                cache.put_file(program_key, "c", output_path)
+    if profiler is not None:
+        profiler.count("c_bytes", os.path.getsize(output_path))
+    return False
@@ -0,0 +1,208 @@
+# Live preview of a program on a Tk canvas, without the C compiler. The program runs on the VM and
+# every shape of its display list becomes a canvas item, keyed by the top-level statement that drew
+# it : after an edit, the new display list is compared to the previous one and only the items of
+# the shapes that changed are created, moved or deleted. The statements of the unchanged segments
+# of drawpp.incremental are the same objects from one check to the next, so their items are kept.
+from .nodes import Program
+from .symbols import PRELUDE_VALUES
+from .vm import VM, BytecodeCompiler
+
+BLACK = "#000000"  # drawing color set by forme.c
+CURSOR_COLOR = "#0000ff"  # set by drawCursor, and kept for the next shapes
+CURSOR_RADIUS = 5
+
+
+# Canvas item of a shape of the display list : (item type, coordinates, options as sorted pairs)
+def canvas_item(shape, color):
+    name = shape[0]
+    if name == "drawSquare":
+        _, x, y, size = shape
+        size = max(size, 0)
+        return "rectangle", (x, y, x + size, y + size), (("fill", color), ("outline", ""))
+    if name == "drawCircle":
+        _, x, y, radius = shape
+        radius = max(radius, 0)
+        return "oval", (x - radius, y - radius, x + radius, y + radius), (("fill", color), ("outline", ""))
+    if name == "drawLine":
+        return "line", shape[1:], (("fill", color),)
+    if name == "drawArc":
+        _, x, y, radius, start_angle, end_angle = shape
+        if start_angle > end_angle:
+            start_angle, end_angle = end_angle, start_angle
+        extent = min(end_angle - start_angle, 359.9)  # a 360 degrees arc is empty for Tk
+        # SDL angles turn clockwise on the screen (y goes down), Tk angles counterclockwise
+        return "arc", (x - radius, y - radius, x + radius, y + radius), (
+            ("extent", extent), ("outline", color), ("start", -start_angle - extent), ("style", "arc"))
+    _, x, y = shape  # drawCursor
+    return "oval", (x - CURSOR_RADIUS, y - CURSOR_RADIUS, x + CURSOR_RADIUS, y + CURSOR_RADIUS), (
+        ("fill", CURSOR_COLOR), ("outline", ""))
+
+
+# Top-level statements run together on the VM. With the state of the program before them (cursor,
+# variables, color), they are the unit reused from one update to the next : a group whose statements
+# and state are unchanged is not run again, and its items are not even compared.
+class Group:
+    __slots__ = ("statements", "state", "end_state", "display_list", "bounds", "items")
+
+    def __init__(self, statements, state, end_state, display_list, bounds):
+        self.statements = statements
+        self.state = state  # (color, values of the globals, ((name, C type, value) of the variables...))
+        self.end_state = end_state  # state after the last statement
+        self.display_list = display_list
+        self.bounds = bounds  # shapes of statements[i] : display_list[bounds[i]:bounds[i + 1]]
+        self.items = {}  # (id of the statement, shape index in the statement) -> (item id, canvas_item)
+
+    def follows(self, statements, start):
+        count = len(self.statements)
+        return (len(statements) - start >= count
+                and all(new is old for new, old in zip(statements[start:start + count], self.statements)))
+
+
+INITIAL_STATE = (BLACK, tuple(PRELUDE_VALUES.values()), ())
+
+
+# canvas is a tk.Canvas or any object with its create_*, coords, itemconfigure, delete, tag_raise and
+# tag_lower methods. The items are stacked in the order the program draws its shapes, like a full redraw.
+class Preview:
+    group_size = 64  # max statements of a group
+
+    def __init__(self, canvas, max_steps=None):
+        self.canvas = canvas
+        self.max_steps = max_steps  # loop iterations allowed to the VM for a group, None for no limit
+        self.groups = []
+        self.program = None  # keeps the statements of the items alive : their id() stay unique
+        self.created = self.changed = self.deleted = 0  # item counts of the last update
+        self.rerun = 0  # statements run by the last update
+
+    def create(self, item):
+        item_type, coords, options = item
+        return getattr(self.canvas, f"create_{item_type}")(*coords, **dict(options))
+
+    def run_group(self, statements, state):
+        color, global_values, variables = state
+        compiler = BytecodeCompiler()
+        scope = {name: c_type for name, c_type, _ in variables}
+        bytecode = compiler.compile(Program(statements), marks=True, scope=scope)
+        vm = VM(max_steps=self.max_steps)
+        display_list = vm.run(bytecode, [*global_values, *(value for _, _, value in variables)])
+
+        slots = vm.slots
+        top_slots = compiler.slots.scopes[0]
+        end_variables = tuple((name, c_type, slots[top_slots[name]])
+                              for name, c_type in compiler.types.scopes[0].items())
+        if any(shape[0] == "drawCursor" for shape in display_list):
+            color = CURSOR_COLOR
+        end_state = (color, tuple(slots[:len(global_values)]), end_variables)
+        return Group(statements, state, end_state, display_list, vm.marks + [len(display_list)])
+
+    # Items updated to the drawing of program (a Program AST). Raises the errors of the VM
+    # (undefined variable, division by zero, too many iterations...) and keeps the items as they are.
+    def update(self, program):
+        statements = program.body
+        starts = {id(group.statements[0]): group for group in self.groups}
+        groups = []
+        fresh = []  # groups run again, their items are compared to the old ones
+        state = INITIAL_STATE
+        index = 0
+        while index < len(statements):
+            group = starts.get(id(statements[index]))
+            if group is None or group.state != state or not group.follows(statements, index):
+                # new group up to the start of an old one, which may be reused after it
+                end = index + 1
+                while end < len(statements) and end - index < self.group_size and id(statements[end]) not in starts:
+                    end += 1
+                group = self.run_group(statements[index:end], state)
+                fresh.append(group)
+            groups.append(group)
+            state = group.end_state
+            index += len(group.statements)
+
+        reused = set(map(id, groups))
+        stale = {}  # items of the old groups not reused
+        for group in self.groups:
+            if id(group) not in reused:
+                stale.update(group.items)
+        canvas = self.canvas
+        created = changed = 0
+        placed = {}  # id of a fresh group -> [item id, True if created by this update] in drawing order
+        for group in fresh:
+            order = placed[id(group)] = []
+            color = group.state[0]
+            items = group.items
+            bounds = group.bounds
+            for index, statement in enumerate(group.statements):
+                base = id(statement)
+                for shape_index, shape in enumerate(group.display_list[bounds[index]:bounds[index + 1]]):
+                    if shape[0] == "drawCursor":
+                        color = CURSOR_COLOR
+                    item = canvas_item(shape, color)
+                    key = (base, shape_index)
+                    old = stale.pop(key, None)
+                    if old is None:
+                        items[key] = (self.create(item), item)
+                        order.append((items[key][0], True))
+                        created += 1
+                        continue
+                    item_id, old_item = old
+                    new = False
+                    if old_item != item:
+                        if old_item[0] == item[0]:
+                            if old_item[1] != item[1]:
+                                canvas.coords(item_id, *item[1])
+                            if old_item[2] != item[2]:
+                                canvas.itemconfigure(item_id, **dict(item[2]))
+                        else:
+                            canvas.delete(item_id)
+                            item_id = self.create(item)
+                            new = True
+                        changed += 1
+                    items[key] = (item_id, item)
+                    order.append((item_id, new))
+
+        if stale:  # shapes no longer drawn
+            canvas.delete(*(item_id for item_id, _ in stale.values()))
+        self.restack(groups, placed)
+        self.created, self.changed, self.deleted = created, changed, len(stale)
+        self.rerun = sum(len(group.statements) for group in fresh)
+        self.groups = groups
+        self.program = program
+
+    # Created items are on top of the canvas : the ones that a kept item must cover are moved right
+    # above the item drawn before them (at the bottom for the first one). Items created after the last
+    # kept one, e.g. by the first update, are already in place.
+    def restack(self, groups, placed):
+        kept_after = False
+        misplaced = set()
+        for group in reversed(groups):
+            order = placed.get(id(group))
+            if order is None:  # reused group, all its items kept
+                kept_after = kept_after or bool(group.items)
+                continue
+            for item_id, new in reversed(order):
+                if not new:
+                    kept_after = True
+                elif kept_after:
+                    misplaced.add(item_id)
+        if not misplaced:
+            return
+        previous = None  # item drawn just before
+        for group in groups:
+            order = placed.get(id(group))
+            if order is None:
+                if group.items:
+                    previous = next(reversed(group.items.values()))[0]
+                continue
+            for item_id, _ in order:
+                if item_id in misplaced:
+                    if previous is None:
+                        self.canvas.tag_lower(item_id)
+                    else:
+                        self.canvas.tag_raise(item_id, previous)
+                previous = item_id
+
+    def clear(self):
+        item_ids = [item_id for group in self.groups for item_id, _ in group.items.values()]
+        if item_ids:
+            self.canvas.delete(*item_ids)
+        self.groups = []
+        self.program = None
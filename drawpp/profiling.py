@@ -0,0 +1,106 @@
+# Instrumentation of a compile : wall and CPU time of every stage of pipeline.STAGES, counters
+# (tokens by type, AST nodes by type, bytes of C code...) and, with memory, the tracemalloc peak
+# of every stage. The pipeline only measures when it is given a Profiler : without one, a stage
+# costs a nullcontext. At the end, the report (a dict of JSON types) goes to the sinks.
+import json
+import logging
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+
+
+class Profiler:
+    def __init__(self, sinks=(), memory=False):
+        self.sinks = list(sinks)  # callables receiving the report
+        self.memory = memory
+        self.started_tracing = False  # tracemalloc started by this profiler, stopped by publish
+        self.stages = {}  # stage -> {"wall_s": ..., "cpu_s": ... and with memory "peak_bytes": ...}
+        self.counters = {}  # name -> number, or {key: number} for counts by type
+
+    @contextmanager
+    def stage(self, name):
+        if self.memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self.started_tracing = True
+            tracemalloc.reset_peak()
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            record = self.stages.setdefault(name, {"wall_s": 0.0, "cpu_s": 0.0})
+            record["wall_s"] += time.perf_counter() - wall
+            record["cpu_s"] += time.process_time() - cpu
+            if self.memory:
+                record["peak_bytes"] = max(record.get("peak_bytes", 0), tracemalloc.get_traced_memory()[1])
+
+    # Adds amount to a counter
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    # Adds the occurrences of every key of keys to the counter name, a {key: number} dict
+    def count_by(self, name, keys):
+        counts = Counter(self.counters.get(name, {}))
+        counts.update(keys)
+        self.counters[name] = dict(counts)
+
+    def report(self):
+        report = {
+            "stages": self.stages,
+            "counters": self.counters,
+            "wall_s": sum(record["wall_s"] for record in self.stages.values()),
+            "cpu_s": sum(record["cpu_s"] for record in self.stages.values()),
+        }
+        if self.memory:
+            report["peak_bytes"] = max((record["peak_bytes"] for record in self.stages.values()), default=0)
+        return report
+
+    # Report sent to every sink, tracemalloc stopped if this profiler started it
+    def publish(self, **extra):
+        if self.started_tracing:
+            tracemalloc.stop()
+            self.started_tracing = False
+        report = self.report()
+        report.update(extra)
+        for sink in self.sinks:
+            sink(report)
+        return report
+
+
+# One line summary of a report : "tokenize 12.0 ms, parse 30.1 ms, ... (45.2 ms, 3.1 Mo max)"
+def format_report(report):
+    parts = [f"{stage} {record['wall_s'] * 1000:.1f} ms" for stage, record in report["stages"].items()]
+    total = f"{report['wall_s'] * 1000:.1f} ms"
+    if report.get("peak_bytes") is not None:
+        total += f", {report['peak_bytes'] / 1e6:.1f} Mo max"
+    if not parts:
+        return "depuis le cache" if report.get("cached") else "aucune étape"
+    return f"{', '.join(parts)} ({total})"
+
+
+# --- Sinks
+
+# Summary line of every report to a logging logger, the whole report when DEBUG is enabled
+class LoggerSink:
+    def __init__(self, logger=None, level=logging.INFO):
+        self.logger = logger or logging.getLogger("drawpp.profiling")
+        self.level = level
+
+    def __call__(self, report):
+        name = report.get("source")
+        self.logger.log(self.level, "%s%s", f"{name} : " if name else "", format_report(report))
+        self.logger.debug("%s", json.dumps(report, ensure_ascii=False))
+
+
+# Every report appended to a file as one line of JSON, so that several compiles (or several
+# processes : one write per report) can share the file
+class JsonSink:
+    def __init__(self, path):
+        self.path = path
+
+    def __call__(self, report):
+        line = json.dumps(report, ensure_ascii=False) + "\n"
+        with open(self.path, "a", encoding="utf-8") as file:
+            file.write(line)
+
@@ -0,0 +1,164 @@
+# Python render backend : a Draw++ program evaluated straight into an RGB pixel buffer, no C
+# compiler nor SDL window needed. The primitives reproduce the pixels drawn by forme.c.
+#   python -m drawpp.raster dessin.draw dessin.png
+import math
+import struct
+import sys
+import zlib
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency, only needed to render images
+    np = None
+
+from .interpreter import Interpreter
+from .symbols import CANVAS_WIDTH, CANVAS_HEIGHT
+
+WHITE = (255, 255, 255)  # background of the window
+BLACK = (0, 0, 0)  # drawing color set by forme.c
+CURSOR_COLOR = (0, 0, 255)  # set by drawCursor, and kept for the next shapes
+CURSOR_RADIUS = 5
+
+
+# Interval of t in [0, 1] where (x1, y1) + t * (x2 - x1, y2 - y1) is in the box, None if never (Liang-Barsky)
+def clip_segment(x1, y1, x2, y2, low_x, low_y, high_x, high_y):
+    t0, t1 = 0.0, 1.0
+    dx, dy = x2 - x1, y2 - y1
+    for p, q in ((-dx, x1 - low_x), (dx, high_x - x1), (-dy, y1 - low_y), (dy, high_y - y1)):
+        if p == 0:
+            if q < 0:
+                return None
+        elif p < 0:
+            t0 = max(t0, q / p)
+        else:
+            t1 = min(t1, q / p)
+    return (t0, t1) if t0 <= t1 else None
+
+
+# 800x800 RGB buffer with the drawing functions of forme.c
+class Raster:
+    def __init__(self, width=CANVAS_WIDTH, height=CANVAS_HEIGHT):
+        if np is None:
+            raise ImportError("numpy est nécessaire pour le rendu en image (pip install numpy)")
+        self.width = width
+        self.height = height
+        self.pixels = np.full((height, width, 3), WHITE, dtype=np.uint8)
+        self.color = BLACK
+
+    # Batch of points, the ones outside of the buffer are dropped
+    def plot(self, xs, ys):
+        inside = (xs >= 0) & (xs < self.width) & (ys >= 0) & (ys < self.height)
+        self.pixels[ys[inside], xs[inside]] = self.color
+
+    # Pixels (x + dx, y + dy) with low <= dx, dy <= high and dx² + dy² <= radius², clipped to the buffer
+    def fill_disc(self, x, y, low, high, radius):
+        dxs = np.arange(max(low, -x), min(high, self.width - 1 - x) + 1, dtype=np.int64)
+        dys = np.arange(max(low, -y), min(high, self.height - 1 - y) + 1, dtype=np.int64)
+        if not len(dxs) or not len(dys):
+            return
+        mask = dxs[np.newaxis, :] ** 2 + dys[:, np.newaxis] ** 2 <= radius * radius
+        region = self.pixels[y + dys[0]:y + dys[-1] + 1, x + dxs[0]:x + dxs[-1] + 1]
+        region[mask] = self.color
+
+    # SDL_RenderFillRect of {x, y, size, size}
+    def draw_square(self, x, y, size):
+        if size <= 0:
+            return
+        x0, y0 = max(x, 0), max(y, 0)
+        x1, y1 = min(x + size, self.width), min(y + size, self.height)
+        if x0 < x1 and y0 < y1:
+            self.pixels[y0:y1, x0:x1] = self.color
+
+    # forme.c scans w, h in [0, 2 * radius) : offsets radius - w go from -radius + 1 to radius
+    def draw_circle(self, x, y, radius):
+        if radius > 0:
+            self.fill_disc(x, y, -radius + 1, radius, radius)
+
+    # forme.c switches the renderer to blue and scans offsets from -5 to 4
+    def draw_cursor(self, x, y):
+        self.color = CURSOR_COLOR
+        self.fill_disc(x, y, -CURSOR_RADIUS, CURSOR_RADIUS - 1, CURSOR_RADIUS)
+
+    # SDL_RenderDrawLine : both ends included, one point per step along the longest axis
+    def draw_line(self, x1, y1, x2, y2):
+        steps = max(abs(x2 - x1), abs(y2 - y1))
+        if steps == 0:
+            self.plot(np.array([x1]), np.array([y1]))
+            return
+        visible = clip_segment(x1, y1, x2, y2, -1, -1, self.width, self.height)
+        if visible is None:
+            return
+        first = max(int(visible[0] * steps) - 1, 0)
+        last = min(int(visible[1] * steps) + 1, steps)
+        t = np.arange(first, last + 1, dtype=np.int64)
+        xs = x1 + np.rint(t * (x2 - x1) / steps).astype(np.int64)
+        ys = y1 + np.rint(t * (y2 - y1) / steps).astype(np.int64)
+        self.plot(xs, ys)
+
+    # About one point per pixel of arc length, like forme.c : each point is the previous one rotated
+    # by the step angle, the running product of complex numbers does the same float operations
+    def draw_arc(self, x, y, radius, start_angle, end_angle):
+        if start_angle > end_angle:
+            start_angle, end_angle = end_angle, start_angle
+        end_angle = min(end_angle, start_angle + 360)  # further angles draw the same points again
+        start = start_angle * np.pi / 180.0
+        span = (end_angle - start_angle) * np.pi / 180.0
+        steps = max(math.ceil(abs(radius) * span), 1)
+        rotations = np.empty(steps + 1, dtype=np.complex128)
+        rotations[0] = complex(radius * math.cos(start), radius * math.sin(start))
+        rotations[1:] = complex(math.cos(span / steps), math.sin(span / steps))
+        points = np.cumprod(rotations)
+        self.plot(x + np.trunc(points.real).astype(np.int64), y + np.trunc(points.imag).astype(np.int64))
+
+    def write_ppm(self, path):
+        with open(path, "wb") as file:
+            file.write(f"P6\n{self.width} {self.height}\n255\n".encode("ascii"))
+            file.write(self.pixels.tobytes())
+
+    def write_png(self, path):
+        # Every row starts with filter type 0 (none)
+        rows = np.zeros((self.height, 1 + self.width * 3), dtype=np.uint8)
+        rows[:, 1:] = self.pixels.reshape(self.height, -1)
+
+        def chunk(kind, data):
+            body = kind + data
+            return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body))
+
+        header = struct.pack(">IIBBBBB", self.width, self.height, 8, 2, 0, 0, 0)  # 8 bits RGB
+        with open(path, "wb") as file:
+            file.write(b"\x89PNG\r\n\x1a\n")
+            file.write(chunk(b"IHDR", header))
+            file.write(chunk(b"IDAT", zlib.compress(rows.tobytes(), 6)))
+            file.write(chunk(b"IEND", b""))
+
+    # PNG or PPM depending on the extension
+    def save(self, path):
+        if path.lower().endswith((".ppm", ".pnm")):
+            self.write_ppm(path)
+        else:
+            self.write_png(path)
+
+
+# Image of a program, saved to path if given
+def render(ast, path=None, output=None, max_steps=None):
+    raster = Interpreter(Raster(), output, max_steps).run(ast)
+    if path:
+        raster.save(path)
+    return raster
+
+
+def main(argv=None):
+    from .pipeline import parse_source
+
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 2:
+        print("usage : python -m drawpp.raster source.draw image.png|image.ppm", file=sys.stderr)
+        return 2
+    with open(argv[0], "r") as file:
+        ast = parse_source(file.read())
+    render(ast, argv[1], output=sys.stdout)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
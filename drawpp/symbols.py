@@ -0,0 +1,83 @@
+from .nodes import BinaryExpression, Literal, Variable
+
+
+def get_value_type(value):
+    if isinstance(value, str):
+        return "char*"
+    elif isinstance(value, bool):
+        return "bool"
+    elif isinstance(value, int):
+        return "int"
+    elif isinstance(value, float):
+        return "float"
+    else:
+        return "unknown"
+
+
+def get_type(value):
+    if isinstance(value, str):
+        return "%s"
+    elif isinstance(value, int):
+        return "%d"
+    elif isinstance(value, float):
+        return "%f"
+        # elif isinstance(value, bool):
+        #   return "bool"
+    else:
+        return "unknown"
+
+
+# Variables declared by the generated C code and their type, one dict per block
+class SymbolTable:
+    def __init__(self):
+        self.scopes = [{}]
+
+    def push(self):
+        self.scopes.append({})
+
+    def pop(self):
+        self.scopes.pop()
+
+    # C type of a visible variable, None if it is not declared yet
+    def lookup(self, name):
+        for scope in reversed(self.scopes):
+            if name in scope:
+                return scope[name]
+        return None
+
+    def declare(self, name, c_type):
+        self.scopes[-1][name] = c_type
+
+
+# Global variables of forme.c readable from a Draw++ program (an assignment declares a local one)
+PRELUDE_GLOBALS = {"x": "int", "y": "int", "dx": "int", "dy": "int"}
+PRELUDE_VALUES = {"x": 400, "y": 400, "dx": 100, "dy": 90}  # their initial value
+
+# Size of the window opened by forme.c
+CANVAS_WIDTH = 800
+CANVAS_HEIGHT = 800
+
+COMPARISON_OPERATORS = ("==", "<", ">", "!", "=")
+
+
+# C type of an expression, from the literals and the declared variables it uses. The operands of an
+# arithmetic operator are looked at without recursion : a long chain of operators is a deep tree.
+def infer_type(expression, symbols):
+    match expression:
+        case Literal():
+            return get_value_type(expression.value)
+        case Variable():
+            return symbols.lookup(expression.name) or PRELUDE_GLOBALS.get(expression.name, "int")
+        case BinaryExpression(operator=operator) if operator not in COMPARISON_OPERATORS:
+            types = set()
+            operands = [expression.left, expression.right]
+            while operands:
+                operand = operands.pop()
+                if isinstance(operand, BinaryExpression) and operand.operator not in COMPARISON_OPERATORS:
+                    operands += (operand.left, operand.right)
+                else:
+                    types.add(infer_type(operand, symbols))
+            if "char*" in types:
+                return "char*"
+            return "float" if "float" in types else "int"
+    return "int"
@@ -0,0 +1,111 @@
+import codecs
+import re
+from collections import namedtuple
+
+
+# Token produced by the tokenizer : (type, value) plus its position in the source
+Token = namedtuple("Token", ["type", "value", "line", "column"], defaults=(None, None))
+
+
+class Tokenizer:
+    #Define tokens models (order matters : the first matching pattern wins)
+    token_patterns = [
+        ("SI", r"\bsi\b"),  #Word "if"
+        ("SINON", r"\bsinon\b"),  # word "else" 
+        ("POUR", r"\bpour\b"),  # word "for"
+        ("A", r"\bà\b"),  
+        ("DE", r"\bde\b"),  
+        ("TANTQUE", r"tantque"), #word "while"
+        ("EQUALS_EQUIV", r"==>"),
+        ("AFFICHER", r"afficher"),#word "printf"
+        ("FLOTTANT", r"-?\d+\.\d+"),
+        ("ASSIGNATION", r"->"),
+        ("NOMBRE", r"-?\d+"),
+        ("OPERATEUR", r"[+\-*/=><!]"),
+        ("DRAW_LINE", r"\bdrawLine\b"), # C function 
+        ("DRAW_SQUARE", r"\bdrawSquare\b"), # C function
+        ("DRAW_CIRCLE", r"\bdrawCircle\b"), # C function
+        ("DRAW_ARC", r"\bdrawArc\b"), # C function
+        ("DRAW_CURSOR", r"\bdrawCursor\b"), # C function
+        ("MOVE_CURSOR", r"\bmoveCursor\b"), # C function
+        ("ROTATE_CURSOR", r"\brotateCursor\b"), # C function
+        ("PARENTHESE_OUV", r"\("), #Syntax elements '('
+        ("PARENTHESE_FERM", r"\)"),
+        ("ACCOLADE_OUV", r"\{"),
+        ("ACCOLADE_FERM", r"\}"),
+        ("VIRGULE", r","),
+        ("VARIABLE", r"[a-zA-Z_]\w*"),
+        ("CHAINE", r'"[^"]*"'),  # Strings in between double quotes
+        ("ESPACE", r"\s+"),  # Ignore blank spaces
+    ]
+
+    # All patterns joined in one alternation of named groups, compiled once for the class.
+    # Alternatives are tried left to right, so token_patterns order is kept.
+    master_regex = re.compile("|".join(f"(?P<{name}>{pattern})" for name, pattern in token_patterns))
+
+    chunk_size = 1 << 20  # bytes decoded at a time from a buffer source
+    lookahead = 16  # characters after a token the patterns may need to look at (e.g. "12" then ".5")
+
+    # code is a str, or a bytes-like buffer (bytes, mmap, memoryview) decoded piece by piece : a
+    # memory-mapped file is tokenized without ever being held as a whole str
+    def __init__(self, code, first_line=1, encoding="utf-8"):
+        self.code = code   #code typed in IDE
+        self.tokens = []   #empty list to fill with elements from source code
+        self.first_line = first_line  # line number of the first line of code (part of a bigger document)
+        self.encoding = encoding  # of a buffer source
+
+    # Pieces of the source code as str : (text, True if it is the last one)
+    def chunks(self):
+        if isinstance(self.code, str):
+            yield self.code, True
+            return
+        decoder = codecs.getincrementaldecoder(self.encoding)()
+        view = memoryview(self.code)
+        for start in range(0, len(view), self.chunk_size):
+            yield decoder.decode(view[start:start + self.chunk_size]), False
+        yield decoder.decode(b"", final=True), True
+
+    #Generator reading the source code one token at a time
+    def iter_tokens(self):
+        match_at = self.master_regex.match
+        code = ""  # part of the source being analysed : rest of the previous piece + new piece
+        pos = 0  # offset of the next character to analyse
+        line = self.first_line
+        line_start = 0  # offset of the first character of the current line (negative if in an older piece)
+
+        for chunk, last_chunk in self.chunks():
+            cut = max(pos - 1, 0)  # the character before pos is kept for the "\b" of the patterns
+            code = code[cut:] + chunk
+            line_start -= cut
+            pos -= cut
+            end = len(code)
+            # Tokens too close to the end of a piece may go on in the next one : analysed again with it
+            limit = end if last_chunk else end - self.lookahead
+
+            while pos < end:  # while code left to analyse
+                match = match_at(code, pos)
+                if not last_chunk and (match.end() > limit if match else code[pos] == '"'):
+                    break  # token (or string) maybe cut by the end of the piece
+                if not match:  # No token match
+                    raise SyntaxError(
+                        f"Caractère inattendu : {code[pos]} (ligne {line}, colonne {pos - line_start + 1})"
+                    )
+
+                token_type = match.lastgroup  # Name of the group (token type) that matched
+                value = match.group()
+                if token_type != "ESPACE":  # Ignore blank spaces
+                    yield Token(token_type, value, line, pos - line_start + 1)
+
+                # Keep line/column up to date (only blank spaces and strings can hold line breaks)
+                newlines = value.count("\n")
+                if newlines:
+                    line += newlines
+                    line_start = pos + value.rindex("\n") + 1
+                pos = match.end()  # Read next token
+
+        yield Token("EOF", None, line, pos - line_start + 1)  # Add  value : EOF at the end of list
+
+    #Function to analyse source code
+    def tokenize(self):
+        self.tokens = list(self.iter_tokens())
+        return self.tokens
@@ -0,0 +1,241 @@
+import io
+import shutil
+from functools import partial
+
+from .nodes import Node, BinaryExpression, Literal, Variable, NodeVisitor, OPERATOR_PRECEDENCE
+from .optimizer import C_INT_MIN
+from .symbols import SymbolTable, infer_type
+
+
+# Writes C code line by line into a file-like sink, the indentation is kept as state. It stops
+# growing at max_indent levels : the code of a deeply nested program stays linear in its size.
+class CEmitter:
+    def __init__(self, sink, level=0, indent="    ", max_indent=32):
+        self.write = sink.write
+        self.level = level  # current nesting depth
+        self.indent = indent
+        self.max_indent = max_indent
+
+    def line(self, text):
+        self.write(f"{self.indent * min(self.level, self.max_indent)}{text}\n")
+
+    def open_block(self, header=""):
+        self.line(f"{header} {{" if header else "{")
+        self.level += 1
+
+    def close_block(self):
+        self.level -= 1
+        self.line("}")
+
+
+# End of main() appended after the generated code : show the drawing until the window is closed.
+# SDL_WaitEvent sleeps until the next event, the process uses no CPU while the window stays open.
+C_EPILOGUE = (
+    "    SDL_RenderPresent(renderer);\n"
+    "    SDL_Event e;\n"
+    "    while (SDL_WaitEvent(&e) && e.type != SDL_QUIT) {\n"
+    "    }\n"
+    "    SDL_DestroyRenderer(renderer);\n"
+    "    SDL_DestroyWindow(window);\n"
+    "    SDL_Quit();\n"
+    "    return 0;\n"
+    "}\n"
+)
+
+# Offscreen export (render farms) : the prelude draws into a surface instead of a window when
+# DRAWPP_OFFSCREEN is defined before it, the epilogue saves the surface as a BMP and exits
+C_OFFSCREEN_PROLOGUE = "#define DRAWPP_OFFSCREEN\n"
+C_OFFSCREEN_EPILOGUE = (
+    "    SDL_RenderPresent(renderer);\n"
+    "    int status = 0;\n"
+    "    if (SDL_SaveBMP(surface, outputPath) != 0) {\n"
+    "        fprintf(stderr, \"Erreur SDL_SaveBMP: %s\\n\", SDL_GetError());\n"
+    "        status = 1;\n"
+    "    }\n"
+    "    SDL_DestroyRenderer(renderer);\n"
+    "    SDL_FreeSurface(surface);\n"
+    "    SDL_Quit();\n"
+    "    return status;\n"
+    "}\n"
+)
+
+# Epilogue modes of write_c_program : (text written before the prelude, end of main())
+EPILOGUES = {
+    "interactive": ("", C_EPILOGUE),
+    "offscreen": (C_OFFSCREEN_PROLOGUE, C_OFFSCREEN_EPILOGUE),
+}
+
+
+# Batched variants of the draw built-ins in forme.c : the shapes are gathered into arrays sent to SDL
+# in one call, flushDrawBatch draws them (drawCursor flushes itself before changing the color)
+BATCHED_FUNCTIONS = {
+    "drawSquare": "batchSquare",
+    "drawCircle": "batchCircle",
+    "drawLine": "batchLine",
+    "drawArc": "batchArc",
+}
+
+
+# Precedence of the C binary operators (see OPERATOR_PRECEDENCE)
+C_PRECEDENCE = {operator: precedence for operator, precedence in OPERATOR_PRECEDENCE.items()
+                if operator not in ("=", "!")}
+
+
+# C code of a literal. -2147483648 would be the long -(2147483648) in C : the smallest int is written
+# as INT_MIN is in limits.h
+def c_literal(value):
+    if isinstance(value, int) and value == C_INT_MIN:
+        return "(-2147483647 - 1)"
+    return str(value)
+
+
+# Parentheses around the operand of operator, on its left or right side, that C would otherwise
+# group differently. "=" and "!" are not C binary operators : their operands always get some.
+def needs_parentheses(operand, operator, right):
+    if not isinstance(operand, BinaryExpression):
+        return False
+    if operand.operator not in C_PRECEDENCE or operator not in C_PRECEDENCE:
+        return True
+    precedence, outer = C_PRECEDENCE[operand.operator], C_PRECEDENCE[operator]
+    return precedence < outer or (right and precedence == outer)  # operators are left associative
+
+
+
+# Statements are written to the emitter, expressions are returned as strings. Neither is translated
+# by recursion : statements still to translate wait on a stack, so any nesting depth is translated.
+class CTranslator(NodeVisitor):
+    def __init__(self, batch=False):
+        self.batch = batch  # draw calls gathered in the draw batch of the prelude
+
+    # Generated code returned as a string
+    def translate(self, ast):
+        buffer = io.StringIO()
+        self.emit(ast, buffer)
+        return buffer.getvalue()
+
+    # Generated code written into sink, starting at the given indentation level
+    def emit(self, ast, sink, level=0):
+        self.out = CEmitter(sink, level)
+        self.symbols = SymbolTable()  # new table for every translation
+        self.pending = [ast]  # nodes to visit and actions (functions) to call, the last one first
+        while self.pending:
+            item = self.pending.pop()
+            if isinstance(item, Node):
+                self.visit(item)
+            else:
+                item()
+        if self.batch:
+            self.out.line("flushDrawBatch(renderer);")  # before the SDL_RenderPresent of the epilogue
+
+    # Nodes and actions run after the current node, in this order
+    def then(self, *items):
+        self.pending.extend(reversed(items))
+
+    # Block of statements with its own scope for the declarations, closed by "}"
+    def block(self, ast):
+        return self.symbols.push, ast, self.symbols.pop, self.out.close_block
+
+    def visit_Program(self, ast):
+        self.then(*ast.body)
+
+    def visit_Block(self, ast):
+        self.out.open_block()
+        self.then(*self.block(ast.body))
+
+    def visit_IfStatement(self, ast):
+        self.out.open_block(f"if ({self.expression(ast.condition)})")
+        if ast.else_branch:  # Check if bloc "else" exists
+            self.then(*self.block(ast.then_branch), partial(self.out.open_block, "else"),
+                      *self.block(ast.else_branch))
+        else:
+            self.then(*self.block(ast.then_branch))
+
+    def visit_Assignment(self, ast):
+        value = self.expression(ast.value)
+        if self.symbols.lookup(ast.variable):
+            #If variable already defined, simply assign new value
+            self.out.line(f"{ast.variable} = {value};")
+        else:
+            # If variable not defined yet, declare it in the current block
+            value_type = infer_type(ast.value, self.symbols)
+            self.symbols.declare(ast.variable, value_type)
+            self.out.line(f"{value_type} {ast.variable} = {value};")
+
+    def visit_PrintStatement(self, ast):
+        values = self.expression(ast.values[0]).strip('"')  # Always retrieve str to print
+        if len(ast.values) > 1:
+            variable = self.expression(ast.values[1])  # If yes, get variable
+            self.out.line(f'printf("{values}\\n", {variable});')  # Print str and variable
+        else:
+            self.out.line(f'printf("{values}\\n");')  # Else, simply print str
+
+    def visit_ForLoop(self, ast):
+        variable = ast.variable
+        start = self.expression(ast.start)
+        end = self.expression(ast.end)
+        self.out.open_block(f"for (int {variable} = {start}; {variable} <= {end}; {variable}++)")
+        self.symbols.push()
+        self.symbols.declare(variable, "int")  # loop variable only visible in the loop
+        self.then(*self.block(ast.body), self.symbols.pop)
+
+    def visit_WhileLoop(self, ast):
+        self.out.open_block(f"while ({self.expression(ast.condition)})")
+        self.then(*self.block(ast.body))
+
+    # C code of an expression : its pieces in source order, operands wrapped in parentheses where
+    # needs_parentheses asks for them, joined once at the end
+    def expression(self, ast):
+        pieces = []
+        stack = [ast]  # nodes, and str pieces written when they are popped
+        while stack:
+            node = stack.pop()
+            if isinstance(node, str):
+                pieces.append(node)
+            elif isinstance(node, BinaryExpression):
+                operator = node.operator
+                right = (node.right,)
+                if needs_parentheses(node.right, operator, True):
+                    right = ("(", node.right, ")")
+                left = (node.left,)
+                if needs_parentheses(node.left, operator, False):
+                    left = ("(", node.left, ")")
+                stack.extend(reversed((*left, f" {operator} ", *right)))
+            elif isinstance(node, Literal):
+                pieces.append(c_literal(node.value))
+            elif isinstance(node, Variable):
+                pieces.append(node.name)
+            else:
+                self.generic_visit(node)
+        return "".join(pieces)
+
+    # Expression alone as a statement : nothing is generated
+    def visit_BinaryExpression(self, ast):
+        return self.expression(ast)
+
+    def visit_Literal(self, ast):
+        return self.expression(ast)
+
+    def visit_Variable(self, ast):
+        return self.expression(ast)
+
+    # Every draw built-in : drawLine, drawSquare, drawCircle, drawArc, drawCursor, moveCursor, rotateCursor
+    def visit_DrawCommand(self, ast):
+        args = [self.expression(param) for param in ast.params]
+        if ast.uses_renderer:
+            args.insert(0, "renderer")
+        function = BATCHED_FUNCTIONS.get(ast.function, ast.function) if self.batch else ast.function
+        self.out.line(f"{function}({', '.join(args)});")
+
+
+# Complete C program written into sink : prelude (forme.c), generated body of main(), epilogue.
+# epilogue is a key of EPILOGUES : "interactive" window, or "offscreen" BMP export.
+def write_c_program(sink, ast, prelude_path, translator=None, epilogue="interactive"):
+    if epilogue not in EPILOGUES:
+        raise ValueError(f"Mode de sortie inconnu : {epilogue}")
+    prologue, end_of_main = EPILOGUES[epilogue]
+    sink.write(prologue)
+    with open(prelude_path, "r") as prelude:
+        shutil.copyfileobj(prelude, sink)
+    sink.write("\n")
+    (translator or CTranslator()).emit(ast, sink, level=1)
+    sink.write(end_of_main)
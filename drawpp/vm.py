@@ -0,0 +1,341 @@
+# Second execution engine next to CTranslator : the AST compiled to a flat bytecode run by a small
+# stack machine. Draw built-ins append to a display list instead of drawing, so a program can be
+# run and checked in milliseconds without a C toolchain.
+import math
+from array import array
+
+from .nodes import BinaryExpression, Literal, Variable, NodeVisitor
+from .symbols import SymbolTable, PRELUDE_VALUES, infer_type
+
+# Opcodes, every instruction is an opcode followed by one operand (0 when unused)
+CONST = 0  # push constants[operand]
+LOAD = 1  # push slots[operand]
+STORE = 2  # pop into slots[operand]
+STORE_INT = 3  # pop, truncate to int, store (assignment of a float to an int variable)
+STORE_FLOAT = 4  # pop, convert to float, store
+ADD = 5
+SUB = 6
+MUL = 7
+DIV = 8
+LT = 9
+GT = 10
+EQ = 11
+JUMP = 12  # pc = operand
+JUMP_IF_FALSE = 13  # pop, jump if 0
+LOOP = 14  # backward jump closing a loop iteration, counted by the step budget
+FOR_TEST = 15  # pop end, push 1 if slots[operand] (the loop variable) <= end else 0
+INCREMENT = 16  # slots[operand] += 1
+DRAW = 17  # pop the parameters of DRAW_COMMANDS[operand], add it to the display list
+MOVE = 18  # pop dy, dx : moveCursor
+ROTATE = 19  # pop angle : rotateCursor
+PRINT = 20  # pop operand values : afficher
+POP = 21  # drop the value of an expression statement
+MARK = 22  # start of a top-level statement : the display list length is recorded in VM.marks
+
+OPCODE_NAMES = [
+    "CONST", "LOAD", "STORE", "STORE_INT", "STORE_FLOAT", "ADD", "SUB", "MUL", "DIV", "LT", "GT", "EQ",
+    "JUMP", "JUMP_IF_FALSE", "LOOP", "FOR_TEST", "INCREMENT", "DRAW", "MOVE", "ROTATE", "PRINT", "POP",
+    "MARK",
+]
+BINARY_OPCODES = {"+": ADD, "-": SUB, "*": MUL, "/": DIV, "<": LT, ">": GT, "==": EQ}
+
+# Draw built-ins producing an item of the display list : (C function name, number of parameters)
+DRAW_COMMANDS = [("drawSquare", 3), ("drawCircle", 3), ("drawLine", 4), ("drawArc", 5), ("drawCursor", 2)]
+DRAW_INDEX = {name: index for index, (name, _) in enumerate(DRAW_COMMANDS)}
+
+# The cursor globals of forme.c live in the first slots
+GLOBAL_SLOTS = {name: slot for slot, name in enumerate(PRELUDE_VALUES)}
+
+
+class Bytecode:
+    def __init__(self, code, constants, slot_count):
+        self.code = code  # array of ints : opcode, operand, opcode, operand...
+        self.constants = constants
+        self.slot_count = slot_count  # globals then every declared variable
+
+    def disassemble(self):
+        lines = []
+        for pc in range(0, len(self.code), 2):
+            opcode, operand = self.code[pc], self.code[pc + 1]
+            if opcode == CONST:
+                detail = f"  ({self.constants[operand]!r})"
+            elif opcode == DRAW:
+                detail = f"  ({DRAW_COMMANDS[operand][0]})"
+            else:
+                detail = ""
+            lines.append(f"{pc:6}  {OPCODE_NAMES[opcode]:14}{operand}{detail}")
+        return "\n".join(lines)
+
+
+# AST -> Bytecode. Variables are resolved to slots at compile time with the C block scopes,
+# and the C type of every declaration decides the conversions done by the stores.
+# With marks, every top-level statement starts with a MARK : the VM then tells which statement
+# drew which shapes (see VM.marks). A program can be compiled and run in parts : scope holds the
+# {name: C type} of the top-level variables declared by the parts before, in the slots following
+# the globals, and self.types / self.slots keep the top-level scope once the part is compiled.
+class BytecodeCompiler(NodeVisitor):
+    def compile(self, ast, marks=False, scope=None):
+        self.marks = marks
+        self.code = array("i")
+        self.constants = []
+        self.constant_index = {}
+        self.types = SymbolTable()
+        self.slots = SymbolTable()
+        self.slot_count = len(GLOBAL_SLOTS)
+        for name, c_type in (scope or {}).items():
+            self.declare(name, c_type)
+        self.visit(ast)
+        return Bytecode(self.code, self.constants, self.slot_count)
+
+    def emit(self, opcode, operand=0):
+        self.code.append(opcode)
+        self.code.append(operand)
+        return len(self.code) - 1  # position of the operand, to patch jumps
+
+    def patch(self, position, target=None):
+        self.code[position] = len(self.code) if target is None else target
+
+    def constant(self, value):
+        key = (type(value), value)
+        if key not in self.constant_index:
+            self.constant_index[key] = len(self.constants)
+            self.constants.append(value)
+        return self.constant_index[key]
+
+    def push_scope(self):
+        self.types.push()
+        self.slots.push()
+
+    def pop_scope(self):
+        self.types.pop()
+        self.slots.pop()
+
+    def declare(self, name, c_type):
+        slot = self.slot_count
+        self.slot_count += 1
+        self.types.declare(name, c_type)
+        self.slots.declare(name, slot)
+        return slot
+
+    def block(self, ast):
+        self.push_scope()
+        self.visit(ast)
+        self.pop_scope()
+
+    def visit_Program(self, ast):
+        marks, self.marks = self.marks, False  # blocks are Programs too : only the top-level one is marked
+        for statement in ast.body:
+            if marks:
+                self.emit(MARK)
+            self.visit(statement)
+            if isinstance(statement, (Literal, Variable, BinaryExpression)):
+                self.emit(POP)  # expression alone as a statement : its value is dropped
+
+    def visit_Block(self, ast):
+        self.block(ast.body)
+
+    def visit_Assignment(self, ast):
+        self.visit(ast.value)
+        value_type = infer_type(ast.value, self.types)
+        declared_type = self.types.lookup(ast.variable)
+        if declared_type is None:
+            self.emit(STORE, self.declare(ast.variable, value_type))
+        elif declared_type == "int" and value_type == "float":
+            self.emit(STORE_INT, self.slots.lookup(ast.variable))
+        elif declared_type == "float" and value_type == "int":
+            self.emit(STORE_FLOAT, self.slots.lookup(ast.variable))
+        else:
+            self.emit(STORE, self.slots.lookup(ast.variable))
+
+    def visit_IfStatement(self, ast):
+        self.visit(ast.condition)
+        to_else = self.emit(JUMP_IF_FALSE)
+        self.block(ast.then_branch)
+        if ast.else_branch:
+            to_end = self.emit(JUMP)
+            self.patch(to_else)
+            self.block(ast.else_branch)
+            self.patch(to_end)
+        else:
+            self.patch(to_else)
+
+    def visit_WhileLoop(self, ast):
+        start = len(self.code)
+        self.visit(ast.condition)
+        to_end = self.emit(JUMP_IF_FALSE)
+        self.block(ast.body)
+        self.emit(LOOP, start)
+        self.patch(to_end)
+
+    def visit_ForLoop(self, ast):
+        # for (int i = start; i <= end; i++) : the loop variable has its own scope
+        self.visit(ast.start)
+        self.push_scope()
+        slot = self.declare(ast.variable, "int")
+        self.emit(STORE_INT if infer_type(ast.start, self.types) == "float" else STORE, slot)
+        start = len(self.code)
+        self.visit(ast.end)
+        self.emit(FOR_TEST, slot)
+        to_end = self.emit(JUMP_IF_FALSE)
+        self.block(ast.body)
+        self.emit(INCREMENT, slot)
+        self.emit(LOOP, start)
+        self.patch(to_end)
+        self.pop_scope()
+
+    def visit_PrintStatement(self, ast):
+        values = ast.values[:2]  # printf(format, value)
+        for value in values:
+            self.visit(value)
+        self.emit(PRINT, len(values))
+
+    def visit_BinaryExpression(self, ast):
+        if ast.operator not in BINARY_OPCODES:
+            raise SyntaxError(f"Opérateur non supporté : {ast.operator}")
+        self.visit(ast.left)
+        self.visit(ast.right)
+        self.emit(BINARY_OPCODES[ast.operator])
+
+    def visit_Literal(self, ast):
+        value = ast.value.strip('"') if isinstance(ast.value, str) else ast.value
+        self.emit(CONST, self.constant(value))
+
+    def visit_Variable(self, ast):
+        slot = self.slots.lookup(ast.name)
+        if slot is None:
+            slot = GLOBAL_SLOTS.get(ast.name)
+        if slot is None:
+            raise NameError(f"Variable non définie : {ast.name}")
+        self.emit(LOAD, slot)
+
+    def visit_DrawCommand(self, ast):
+        for param in ast.params:
+            self.visit(param)
+        self.emit(DRAW, DRAW_INDEX[ast.function])
+
+    def visit_MoveCursor(self, ast):
+        for param in ast.params:
+            self.visit(param)
+        self.emit(MOVE)
+
+    def visit_RotateCursor(self, ast):
+        self.visit(ast.params[0])
+        self.emit(ROTATE)
+
+
+class VM:
+    def __init__(self, output=None, max_steps=None):
+        self.output = output  # text stream receiving afficher(...), None to ignore it
+        self.max_steps = max_steps  # max number of loop iterations (LOOP instructions), None for no limit
+        self.marks = []  # display list length at every MARK of the last run
+        self.slots = []  # variable values at the end of the last run
+
+    # Display list of the program : (C function name, int parameters...) for every drawn shape.
+    # values are the first slots (globals then the variables of scope, see BytecodeCompiler) when
+    # the program goes on from a previous part, the initial globals of forme.c by default.
+    def run(self, bytecode, values=None):
+        code = bytecode.code.tolist()
+        constants = bytecode.constants
+        slots = self.slots = [0] * bytecode.slot_count
+        initial = PRELUDE_VALUES.values() if values is None else values
+        slots[:len(initial)] = initial
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        display_list = []
+        marks = self.marks = []
+        budget = -1 if self.max_steps is None else self.max_steps
+        pc = 0
+        end = len(code)
+
+        while pc < end:
+            opcode = code[pc]
+            operand = code[pc + 1]
+            pc += 2
+            if opcode == LOAD:
+                push(slots[operand])
+            elif opcode == CONST:
+                push(constants[operand])
+            elif opcode <= STORE_FLOAT:
+                value = pop()
+                if opcode == STORE_INT:
+                    value = int(value)
+                elif opcode == STORE_FLOAT:
+                    value = float(value)
+                slots[operand] = value
+            elif opcode <= EQ:
+                right = pop()
+                left = pop()
+                if opcode == ADD:
+                    push(left + right)
+                elif opcode == SUB:
+                    push(left - right)
+                elif opcode == MUL:
+                    push(left * right)
+                elif opcode == DIV:
+                    if right == 0:
+                        raise ZeroDivisionError("Division par zéro")
+                    if isinstance(left, int) and isinstance(right, int):
+                        quotient = abs(left) // abs(right)  # C truncates toward 0
+                        push(quotient if (left < 0) == (right < 0) else -quotient)
+                    else:
+                        push(left / right)
+                elif opcode == LT:
+                    push(int(left < right))
+                elif opcode == GT:
+                    push(int(left > right))
+                else:
+                    push(int(left == right))
+            elif opcode == JUMP_IF_FALSE:
+                if not pop():
+                    pc = operand
+            elif opcode == LOOP:
+                if budget == 0:
+                    raise RuntimeError(f"Limite de {self.max_steps} itérations atteinte")
+                budget -= 1
+                pc = operand
+            elif opcode == FOR_TEST:
+                push(int(slots[operand] <= pop()))
+            elif opcode == INCREMENT:
+                slots[operand] += 1
+            elif opcode == JUMP:
+                pc = operand
+            elif opcode == DRAW:
+                name, count = DRAW_COMMANDS[operand]
+                params = [int(value) for value in stack[-count:]]
+                del stack[-count:]
+                display_list.append((name, *params))
+            elif opcode == MOVE:
+                dy = int(pop())
+                slots[0] += int(pop())
+                slots[1] += dy
+            elif opcode == ROTATE:
+                angle_rad = int(pop()) * math.pi / 180.0
+                dx, dy = slots[2], slots[3]
+                slots[2] = int(dx * math.cos(angle_rad) - dy * math.sin(angle_rad))
+                slots[3] = int(dx * math.sin(angle_rad) + dy * math.cos(angle_rad))
+            elif opcode == PRINT:
+                values = stack[-operand:] if operand else []  # stack[-0:] would be the whole stack
+                del stack[len(stack) - len(values):]
+                self.print(values)
+            elif opcode == POP:
+                pop()
+            elif opcode == MARK:
+                marks.append(len(display_list))
+        return display_list
+
+    def print(self, values):
+        if self.output is None:
+            return
+        text = str(values[0]) if values else ""
+        if len(values) > 1:
+            try:
+                text = text % values[1]
+            except (TypeError, ValueError):
+                text = f"{text} {values[1]}"
+        self.output.write(text + "\n")
+
+
+# Display list of a program, compiled then run on the VM
+def run_program(ast, output=None, max_steps=None):
+    return VM(output, max_steps).run(BytecodeCompiler().compile(ast))
@@ -0,0 +1,80 @@
+# Compilation running in a separate process, so that a long compile never blocks the caller (the
+# editor's Tk loop). Progress and result come back through a pipe that the caller polls, a job is
+# cancelled by terminating its process.
+import multiprocessing
+
+from .build import executable_path_for
+from .cache import CompileCache
+from .pipeline import compile_to_file
+
+
+# Body of the job process : messages ("stage", name), with profile ("profile", report of
+# drawpp.profiling) at the end, then ("done", cached) or ("error", kind, text)
+def run_job(connection, code, output_path, prelude_path, cache_dir, profile, options):
+    try:
+        cache = CompileCache(cache_dir)
+        progress = lambda stage: connection.send(("stage", stage))
+        profiler = None
+        if profile:
+            from .profiling import Profiler
+
+            profiler = Profiler([lambda report: connection.send(("profile", report))], memory=profile == "memory")
+        cached = compile_to_file(code, output_path, prelude_path, cache=cache, progress=progress,
+                                 profiler=profiler, **options)
+    except SyntaxError as e:
+        connection.send(("error", "syntax", str(e)))
+    except Exception as e:
+        connection.send(("error", "runtime", str(e)))
+    else:
+        connection.send(("done", cached))
+    finally:
+        connection.close()
+
+
+# compile_to_file(code, output_path, prelude_path, **options) started in a new process. With profile
+# (True, or "memory" to follow the memory peak too), the stages are timed by a drawpp.profiling.Profiler.
+# With the option builder (a drawpp.build.NativeBuilder), the job also builds the executable.
+class CompileJob:
+    def __init__(self, code, output_path, prelude_path, cache_dir=None, profile=False, **options):
+        self.output_path = output_path
+        self.executable_path = executable_path_for(output_path) if options.get("builder") else None
+        self.stage = None  # last stage started (see pipeline.STAGES)
+        self.profile = None  # report of the Profiler once received
+        self.result = None  # ("done", cached), ("error", kind, text) or ("cancelled",) once finished
+        self.connection, sender = multiprocessing.Pipe(duplex=False)
+        self.process = multiprocessing.Process(
+            target=run_job, args=(sender, code, output_path, prelude_path, cache_dir, profile, options), daemon=True
+        )
+        self.process.start()
+        sender.close()  # only the child writes, EOF when it exits
+
+    @property
+    def running(self):
+        return self.result is None
+
+    # Reads the messages already received, never blocks. True when the job has just finished.
+    def poll(self):
+        while self.result is None and self.connection.poll():
+            try:
+                message = self.connection.recv()
+            except EOFError:  # process killed before sending its result
+                message = ("error", "runtime", "Le processus de compilation s'est arrêté")
+            if message[0] == "stage":
+                self.stage = message[1]
+            elif message[0] == "profile":
+                self.profile = message[1]
+            else:
+                self.result = message
+                self.close()
+                return True
+        return False
+
+    def cancel(self):
+        if self.result is None:
+            self.process.terminate()
+            self.result = ("cancelled",)
+            self.close()
+
+    def close(self):
+        self.connection.close()
+        self.process.join(0)  # reaped now if it has already exited, by multiprocessing otherwise
@@ -1,70 +1,178 @@
 #include <SDL2/SDL.h>
 #include <stdio.h>
 #include <math.h>
+#include <stdlib.h>
 
+#define WINDOW_WIDTH 800
+#define WINDOW_HEIGHT 800
+#define BATCH_SIZE 1024  // rectangles, points or polyline vertices kept before a call to SDL
 
 // Declaration of global variables
 int x = 400, y = 400;  // Initial position of the cursor
 int dx = 100, dy = 90;  // Initial direction (horizontal movement)
 
+// Shapes waiting to be drawn : they are sent to SDL with one call per array (draw batch).
+// Every shape of a batch has the same color, so the drawing order inside a batch does not matter.
+static SDL_Rect batchRects[BATCH_SIZE];
+static int batchRectCount = 0;
+static SDL_Point batchPoints[BATCH_SIZE];
+static int batchPointCount = 0;
+static SDL_Point batchPolyline[BATCH_SIZE];  // connected line segments
+static int batchPolylineCount = 0;
+
+static void flushRects(SDL_Renderer *renderer) {
+    if (batchRectCount > 0) {
+        SDL_RenderFillRects(renderer, batchRects, batchRectCount);
+        batchRectCount = 0;
+    }
+}
+
+static void flushPoints(SDL_Renderer *renderer) {
+    if (batchPointCount > 0) {
+        SDL_RenderDrawPoints(renderer, batchPoints, batchPointCount);
+        batchPointCount = 0;
+    }
+}
+
+static void flushPolyline(SDL_Renderer *renderer) {
+    if (batchPolylineCount > 1) {
+        SDL_RenderDrawLines(renderer, batchPolyline, batchPolylineCount);
+    }
+    batchPolylineCount = 0;
+}
+
+// Draw every shape of the batch : before a color change and before SDL_RenderPresent
+void flushDrawBatch(SDL_Renderer *renderer) {
+    flushRects(renderer);
+    flushPolyline(renderer);
+    flushPoints(renderer);
+}
+
+static void batchRect(SDL_Renderer *renderer, int x, int y, int w, int h) {
+    if (batchRectCount == BATCH_SIZE) {
+        flushRects(renderer);
+    }
+    SDL_Rect rect = {x, y, w, h};
+    batchRects[batchRectCount++] = rect;
+}
+
+static void batchPoint(SDL_Renderer *renderer, int x, int y) {
+    if (batchPointCount == BATCH_SIZE) {
+        flushPoints(renderer);
+    }
+    SDL_Point point = {x, y};
+    batchPoints[batchPointCount++] = point;
+}
+
 // Function to draw a square
 void drawSquare(SDL_Renderer *renderer, int x, int y, int size) {
     SDL_Rect square = {x, y, size, size};  // Set the position and size of the square
     SDL_RenderFillRect(renderer, &square);  // Draw the square
 }
 
-// Function to draw a circle
-void drawCircle(SDL_Renderer *renderer, int x, int y, int radius) {
-    for (int w = 0; w < 2 * radius; w++) {
-        for (int h = 0; h < 2 * radius; h++) {
-            int dx = radius - w;  // Horizontal distance from the center
-            int dy = radius - h;  // Vertical distance from the center
-            if ((dx * dx + dy * dy) <= (radius * radius)) {
-                SDL_RenderDrawPoint(renderer, x + dx, y + dy);
-            }
+void batchSquare(SDL_Renderer *renderer, int x, int y, int size) {
+    batchRect(renderer, x, y, size, size);
+}
+
+// Fill the pixels (x + dx, y + dy) with low <= dx, dy <= high and dx * dx + dy * dy <= radius * radius,
+// one rectangle of height 1 per row (scanline) instead of one point per pixel
+static void fillDisc(SDL_Renderer *renderer, int x, int y, int low, int high, int radius) {
+    long long radius2 = (long long)radius * radius;
+    int halfWidth = radius;  // largest dx of the current row, only decreases when moving away from the center
+    for (int dy = 0; dy <= radius; dy++) {
+        while ((long long)halfWidth * halfWidth + (long long)dy * dy > radius2) {
+            halfWidth--;
+        }
+        int left = x + (-halfWidth > low ? -halfWidth : low);
+        int right = x + (halfWidth < high ? halfWidth : high);
+        if (dy <= high && y + dy >= 0 && y + dy < WINDOW_HEIGHT) {
+            batchRect(renderer, left, y + dy, right - left + 1, 1);  // row below the center
+        }
+        if (dy > 0 && -dy >= low && y - dy >= 0 && y - dy < WINDOW_HEIGHT) {
+            batchRect(renderer, left, y - dy, right - left + 1, 1);  // row above the center
         }
     }
 }
 
+void batchCircle(SDL_Renderer *renderer, int x, int y, int radius) {
+    if (radius > 0) {
+        // Same pixels as scanning w, h in [0, 2 * radius) with offsets radius - w, radius - h
+        fillDisc(renderer, x, y, -radius + 1, radius, radius);
+    }
+}
+
+// Function to draw a circle
+void drawCircle(SDL_Renderer *renderer, int x, int y, int radius) {
+    batchCircle(renderer, x, y, radius);
+    flushDrawBatch(renderer);
+}
+
 // Function to draw a line segment
 void drawLine(SDL_Renderer *renderer, int x1, int y1, int x2, int y2) {
     SDL_RenderDrawLine(renderer, x1, y1, x2, y2);
 }
 
-// Function to draw an arc
-void drawArc(SDL_Renderer *renderer, int x, int y, int radius, int startAngle, int endAngle) {
+// A segment starting where the previous one ended extends the polyline, any other starts a new one
+void batchLine(SDL_Renderer *renderer, int x1, int y1, int x2, int y2) {
+    if (batchPolylineCount == 0 || batchPolylineCount == BATCH_SIZE
+            || batchPolyline[batchPolylineCount - 1].x != x1 || batchPolyline[batchPolylineCount - 1].y != y1) {
+        flushPolyline(renderer);
+        SDL_Point first = {x1, y1};
+        batchPolyline[batchPolylineCount++] = first;
+    }
+    SDL_Point end = {x2, y2};
+    batchPolyline[batchPolylineCount++] = end;
+}
+
+void batchArc(SDL_Renderer *renderer, int x, int y, int radius, int startAngle, int endAngle) {
    // Ensure that the starting angle is smaller than the ending angle
     if (startAngle > endAngle) {
         int temp = startAngle;
         startAngle = endAngle;
         endAngle = temp;
     }
+    if (endAngle - startAngle > 360) {
+        endAngle = startAngle + 360;  // further angles draw the same points again
+    }
 
-   // Draw the points of the arc
-    for (int angle = startAngle; angle <= endAngle; angle++) {
-        double rad = angle * M_PI / 180.0;  // Conversion to radians
-        int dx = (int)(radius * cos(rad));  // Calculate the x coordinate
-        int dy = (int)(radius * sin(rad));  // Calculate the y coordinate
+    // About one point per pixel of arc length : no gaps at large radii, few points at small ones
+    double start = startAngle * M_PI / 180.0;  // Conversion to radians
+    double span = (endAngle - startAngle) * M_PI / 180.0;
+    int steps = (int)ceil(abs(radius) * span);
+    if (steps < 1) {
+        steps = 1;
+    }
+    // Each point is the previous one rotated by the step angle : no cos/sin per point
+    double stepCos = cos(span / steps);
+    double stepSin = sin(span / steps);
+    double px = radius * cos(start);
+    double py = radius * sin(start);
 
-        // Draw each point of the arc
-        SDL_RenderDrawPoint(renderer, x + dx, y + dy);
+    // Draw the points of the arc
+    for (int i = 0; i <= steps; i++) {
+        batchPoint(renderer, x + (int)px, y + (int)py);
+        double nextPx = px * stepCos - py * stepSin;
+        py = px * stepSin + py * stepCos;
+        px = nextPx;
     }
 }
 
+// Function to draw an arc
+void drawArc(SDL_Renderer *renderer, int x, int y, int radius, int startAngle, int endAngle) {
+    batchArc(renderer, x, y, radius, startAngle, endAngle);
+    flushDrawBatch(renderer);
+}
+
 
 // Function to draw a cursor in the shape of a blue circle
 void drawCursor(SDL_Renderer *renderer, int x, int y) {
     int radius = 5;  // Size of the cursor (circle)
+    flushDrawBatch(renderer);  // shapes waiting in the batch keep the previous color
     // Cursor color (blue here)
     SDL_SetRenderDrawColor(renderer, 0, 0, 255, 255);  // Blue
-    // Draw a circle
-    for (int w = -radius; w < radius; w++) {
-        for (int h = -radius; h < radius; h++) {
-            if (w * w + h * h <= radius * radius) {  // Check if the point is inside the circle
-                SDL_RenderDrawPoint(renderer, x + w, y + h);
-            }
-        }
-    }
+    // Draw a circle (offsets from -radius to radius - 1, like the original point by point loops)
+    fillDisc(renderer, x, y, -radius, radius - 1, radius);
+    flushDrawBatch(renderer);
 }
 
 // Function to move the cursor using global variables
@@ -82,7 +190,42 @@ void rotateCursor(int angle) {
     dy = (int)newDy;
 }
 
-int main() {
+// Generated programs either open a window (default), or are compiled with DRAWPP_OFFSCREEN defined :
+// they then draw into a memory surface, save it as a BMP file (first argument, DRAWPP_OUTPUT by
+// default) and exit, no display needed
+#ifndef DRAWPP_OUTPUT
+#define DRAWPP_OUTPUT "dessin.bmp"
+#endif
+
+int main(int argc, char *argv[]) {
+#ifdef DRAWPP_OFFSCREEN
+    const char *outputPath = argc > 1 ? argv[1] : DRAWPP_OUTPUT;
+
+    // Initialization of SDL, the video subsystem is not needed by the software renderer
+    if (SDL_Init(0) != 0) {
+        fprintf(stderr, "Erreur SDL_Init: %s\n", SDL_GetError());
+        return 1;
+    }
+
+    // Creation of the surface receiving the drawing, and of a software renderer drawing on it
+    SDL_Surface *surface = SDL_CreateRGBSurfaceWithFormat(0, WINDOW_WIDTH, WINDOW_HEIGHT, 32,
+                                                          SDL_PIXELFORMAT_RGB888);
+    if (!surface) {
+        fprintf(stderr, "Erreur SDL_CreateRGBSurfaceWithFormat: %s\n", SDL_GetError());
+        SDL_Quit();
+        return 1;
+    }
+    SDL_Renderer *renderer = SDL_CreateSoftwareRenderer(surface);
+    if (!renderer) {
+        fprintf(stderr, "Erreur SDL_CreateSoftwareRenderer: %s\n", SDL_GetError());
+        SDL_FreeSurface(surface);
+        SDL_Quit();
+        return 1;
+    }
+#else
+    (void)argc;
+    (void)argv;
+
     // Initialization of SDL
     if (SDL_Init(SDL_INIT_VIDEO) != 0) {
         fprintf(stderr, "Erreur SDL_Init: %s\n", SDL_GetError());
@@ -92,7 +235,7 @@ int main() {
     // Creation of a window
     SDL_Window *window = SDL_CreateWindow("DRAW DESSIN",
                                           SDL_WINDOWPOS_CENTERED, SDL_WINDOWPOS_CENTERED,
-                                          800, 800, SDL_WINDOW_SHOWN);
+                                          WINDOW_WIDTH, WINDOW_HEIGHT, SDL_WINDOW_SHOWN);
     if (!window) {
         fprintf(stderr, "Erreur SDL_CreateWindow: %s\n", SDL_GetError());
         SDL_Quit();
@@ -107,6 +250,7 @@ int main() {
         SDL_Quit();
         return 1;
     }
+#endif
 
     // Set the background color (white here)
     SDL_SetRenderDrawColor(renderer, 255, 255, 255, 255);
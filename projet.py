@@ -1,452 +1,40 @@
-import re
+import codecs
+import os
+import time
 import tkinter as tk
 from tkinter import filedialog, ttk, messagebox
 
 
-class Tokenizer:
-    def __init__(self, code):
-        self.code = code   #code typed in IDE
-        self.tokens = []   #empty list to fill with elements from source code
-
-        #Define tokens models 
-        self.token_patterns = [
-            ("SI", r"\bsi\b"),  #Word "if"
-            ("SINON", r"\bsinon\b"),  # word "else" 
-            ("POUR", r"\bpour\b"),  # word "for"
-            ("A", r"\bà\b"),  
-            ("DE", r"\bde\b"),  
-            ("TANTQUE", r"tantque"), #word "while"
-            ("EQUALS_EQUIV", r"==>"),
-            ("AFFICHER", r"afficher"),#word "printf"
-            ("FLOTTANT", r"-?\d+\.\d+"),
-            ("ASSIGNATION", r"->"),
-            ("NOMBRE", r"-?\d+"),
-            ("OPERATEUR", r"[+\-*/=><!]"),
-            ("DRAW_LINE", r"\bdrawLine\b"), # C function 
-            ("DRAW_SQUARE", r"\bdrawSquare\b"), # C function
-            ("DRAW_CIRCLE", r"\bdrawCircle\b"), # C function
-            ("DRAW_ARC", r"\bdrawArc\b"), # C function
-            ("DRAW_CURSOR", r"\bdrawCursor\b"), # C function
-            ("MOVE_CURSOR", r"\bmoveCursor\b"), # C function
-            ("ROTATE_CURSOR", r"\brotateCursor\b"), # C function
-            ("PARENTHESE_OUV", r"\("), #Syntax elements '('
-            ("PARENTHESE_FERM", r"\)"),
-            ("ACCOLADE_OUV", r"\{"),
-            ("ACCOLADE_FERM", r"\}"),
-            ("VIRGULE", r","),
-            ("VARIABLE", r"[a-zA-Z_]\w*"),
-            ("CHAINE", r'"[^"]*"'),  # Strings in between double quotes
-            ("ESPACE", r"\s+"),  # Ignore blank spaces
-        ]
-
-    #Function to analyse source code
-    def tokenize(self):
-        code = self.code
-        tokens = []  # empty list to store tokens from code
-
-        while code:  # while code left to analyse 
-            match = None
-
-            # Matching words from code to known tokens by looping through token_patterns
-            for token_type, pattern in self.token_patterns:
-                regex = re.compile(pattern)
-                match = regex.match(code)
-
-                if match:
-                    value = match.group(0)  # Extract matching value 
-                    if token_type != "ESPACE":  # Ignore blank spaces 
-                        tokens.append((token_type, value))  # Add token to list
-                    code = code[len(value):]  # Read next token
-                    break
-
-            if not match:  # No token match 
-                raise SyntaxError(f"Caractère inattendu : {code[0]}")
-
-        tokens.append(("EOF", None))  # Add  value : EOF at the end of list
-        return tokens
-
-
-def get_value_type(value):
-    if isinstance(value, str):
-        return "char"
-    elif isinstance(value, int):
-        return "int"
-    elif isinstance(value, float):
-        return "float"
-    elif isinstance(value, bool):
-        return "bool"
-    else:
-        return "unknown"
-
-
-def get_type(value):
-    if isinstance(value, str):
-        return "%s"
-    elif isinstance(value, int):
-        return "%d"
-    elif isinstance(value, float):
-        return "%f"
-        # elif isinstance(value, bool):
-        #   return "bool"
-    else:
-        return "unknown"
-
-
-# --- Parser ---
-class Parser:
-    def __init__(self, tokens):
-        self.tokens = tokens
-        self.pos = 0
-
-    def consume(self, expected_type=None):
-        current_token = self.tokens[self.pos]
-        if expected_type and current_token[0] != expected_type:
-            raise SyntaxError(f"Expected {expected_type}, got {current_token[0]}")
-        self.pos += 1
-        return current_token
-
-    def peek(self):
-        return self.tokens[self.pos]
-
-    def parse(self):
-        return self.parse_statements()
-
-    def parse_statements(self):
-        statements = []
-        while self.peek()[0] not in ("EOF", "ACCOLADE_FERM"):
-            statements.append(self.parse_statement())
-        return {"type": "Program", "body": statements}
-
-    def parse_statement(self):
-        token = self.peek()
-        if token[0] == "SI":
-            return self.parse_if()
-        elif token[0] == "DRAW_LINE":
-            return self.parse_draw_line()
-        elif token[0] == "DRAW_SQUARE":
-            return self.parse_draw_square()
-        elif token[0] == "DRAW_CIRCLE":
-            return self.parse_draw_circle()
-        elif token[0] == "DRAW_ARC":
-            return self.parse_draw_arc()
-        elif token[0] == "DRAW_CURSOR":
-            return self.parse_draw_cursor()
-        elif token[0] == "MOVE_CURSOR":
-            return self.parse_move_cursor()
-        elif token[0] == "ROTATE_CURSOR":
-            return self.parse_rotate_cursor()
-        elif token[0] == "AFFICHER":
-            return self.parse_print()
-        elif token[0] == "VARIABLE":
-            # Check if expression is variable assignment or idependant
-            next_token = self.tokens[self.pos + 1]
-            if next_token[0] == "ASSIGNATION":
-                return self.parse_assignment()
-            else:
-                return self.parse_expression()  # Treat it like independant expression 
-        elif token[0] == "POUR":
-            return self.parse_for()
-        elif token[0] == "TANTQUE":
-            return self.parse_while()
-        elif token[0] in ("NOMBRE", "CHAINE"):
-            # Allow idependant expression
-            return self.parse_expression()
-
-        raise SyntaxError(f"Unexpected token: {token}")
-
-    def parse_if(self):
-        self.consume("SI")
-        condition = self.parse_expression()
-        self.consume("ACCOLADE_OUV")
-        then_branch = self.parse_statements()
-        self.consume("ACCOLADE_FERM")
-        if self.peek()[0] == "SINON":
-            self.consume("SINON")
-            self.consume("ACCOLADE_OUV")
-            else_branch = self.parse_statements()
-            self.consume("ACCOLADE_FERM")
-        elif self.peek()[0] != "SINON":
-            else_branch = None
-        return {"type": "IfStatement", "condition": condition, "then": then_branch, "else": else_branch}
-
-    def parse_expression(self):
-        left = self.parse_primary()  # Analysis of left side : first operand
-
-        while self.peek()[0] in ("OPERATEUR", "EQUALS_EQUIV"):  # Check operators, including '==>'
-            operator = self.consume()[1]  # Consomme l'opérateur
-            if operator == "==>":
-                operator = "=="  # Replace '==>' by '=='
-            right = self.parse_primary()  # Analysis of right side : second operand
-            left = {"type": "BinaryExpression", "operator": operator, "left": left, "right": right}
-
-        return left
-
-    def parse_primary(self):
-        token = self.consume()
-        if token[0] == "VARIABLE":
-            return {"type": "Variable", "name": token[1]}
-        elif token[0] == "NOMBRE":
-            return {"type": "Literal", "value": int(token[1])}
-        elif token[0] == "FLOTTANT":
-            return {"type": "Literal", "value": float(token[1])}
-        elif token[0] == "CHAINE":
-            return {"type": "Literal", "value": token[1]}
-        raise SyntaxError(f"Unexpected token in expression: {token}")
-
-    def parse_assignment(self):
-        variable = self.consume("VARIABLE")
-        self.consume("ASSIGNATION")
-        value = self.parse_expression()
-        return {"type": "Assignment", "variable": variable[1], "value": value}
-
-    def parse_print(self):
-        self.consume("AFFICHER")
-        self.consume("PARENTHESE_OUV")
-
-        expressions = []
-        while self.peek()[0] != "PARENTHESE_FERM":
-            expr = self.parse_expression()  # This will now include the variables
-            expressions.append(expr)
-            if self.peek()[0] == "VIRGULE":
-                self.consume("VIRGULE")
-
-        self.consume("PARENTHESE_FERM")
-
-        # Return PrintStatement, but for each expression to print, str and variables are handled
-        return {"type": "PrintStatement", "values": expressions}
-
-    def parse_for(self):
-        self.consume("POUR")  # Consuming the word "for"
-        variable = self.consume("VARIABLE")[1]  # Identifying the variable
-        self.consume("DE")  # Consuming the word "de"
-        start = self.parse_expression()  # Analysing beginning of range
-        self.consume("A")  # Consuming word 'à'
-        end = self.parse_expression()  # Analysing end of range
-        self.consume("ACCOLADE_OUV")  # Consuming '{'
-        body = self.parse_statements()  # Analysing instructions from body
-        self.consume("ACCOLADE_FERM")  # Consuming '}'
-
-        return {
-            "type": "ForLoop",
-            "variable": variable,
-            "start": start,
-            "end": end,
-            "body": body,
-        }
-
-    def parse_draw_line(self):
-        self.consume("DRAW_LINE")
-        self.consume("PARENTHESE_OUV")
-        x1 = self.parse_expression()
-        self.consume("VIRGULE")
-        y1 = self.parse_expression()
-        self.consume("VIRGULE")
-        x2 = self.parse_expression()
-        self.consume("VIRGULE")
-        y2 = self.parse_expression()
-        self.consume("PARENTHESE_FERM")
-        return {"type": "DRAW_LINE", "params": [x1, y1, x2, y2]}
-
-    def parse_draw_square(self):
-        self.consume("DRAW_SQUARE")
-        self.consume("PARENTHESE_OUV")
-        x = self.parse_expression()  # Expression for x position
-        self.consume("VIRGULE")
-        y = self.parse_expression()  # Expression for y position 
-        self.consume("VIRGULE")
-        size = self.parse_expression()  # Expression for square size
-        self.consume("PARENTHESE_FERM")
-        return {"type": "DRAW_SQUARE", "params": [x, y, size]}
-
-    def parse_draw_circle(self):
-        self.consume("DRAW_CIRCLE")
-        self.consume("PARENTHESE_OUV")
-        x = self.parse_expression()  # Expression for x position
-        self.consume("VIRGULE")
-        y = self.parse_expression()  # Expression for y position
-        self.consume("VIRGULE")
-        radius = self.parse_expression()  # Expression for radius
-        self.consume("PARENTHESE_FERM")
-        return {"type": "DRAW_CIRCLE", "params": [x, y, radius]}
-
-    def parse_draw_arc(self):
-        self.consume("DRAW_ARC")
-        self.consume("PARENTHESE_OUV")
-        x = self.parse_expression()  # Expression for x position
-        self.consume("VIRGULE")
-        y = self.parse_expression()  # Expression for y position
-        self.consume("VIRGULE")
-        radius = self.parse_expression()  # Expression for radius
-        self.consume("VIRGULE")
-        start_angle = self.parse_expression()  # Expression for start angle
-        self.consume("VIRGULE")
-        end_angle = self.parse_expression()  # Expression for end angle
-        self.consume("PARENTHESE_FERM")
-        return {"type": "DRAW_ARC", "params": [x, y, radius, start_angle, end_angle]}
-
-    def parse_draw_cursor(self):
-        self.consume("DRAW_CURSOR")
-        self.consume("PARENTHESE_OUV")
-        x = self.parse_expression()   # Expression for x position
-        self.consume("VIRGULE")
-        y = self.parse_expression()  # Expression for y position
-        self.consume("PARENTHESE_FERM")
-        return {"type": "DRAW_CURSOR", "params": [x, y]}
-
-    def parse_move_cursor(self):
-        self.consume("MOVE_CURSOR")  # Consuming key word MOVE_CURSOR
-        # print("Consommé MOVE_CURSOR")
-        self.consume("PARENTHESE_OUV")  # Consuming opening parenthesis
-        dx = self.parse_expression()  # Parse to get expression for dx
-        self.consume("VIRGULE")  # Consuming the comma 
-        dy = self.parse_expression()  # Parse to get expression for dy
-        self.consume("PARENTHESE_FERM")  # Consuming closing parenthesis
-        print("Consommé PARENTHESE_FERM")
-        return {"type": "MOVE_CURSOR", "params": [dx, dy]}
-
-    def parse_rotate_cursor(self):
-        self.consume("ROTATE_CURSOR")  # Consuming key word "ROTATE_CURSOR"
-        self.consume("PARENTHESE_OUV")  # Consuming opening parenthesis
-        angle = self.parse_expression()  # Parse the angle (expression or litteral)
-        self.consume("PARENTHESE_FERM")  # Consuming closing parenthesis
-        return {
-            "type": "ROTATE_CURSOR",  # Type of node for cursor rotation
-            "params": [angle]  # Parameters : dx, dy, angle
-        }
-
-    def parse_while(self):
-        self.consume("TANTQUE")
-        condition = self.parse_expression()
-        self.consume("ACCOLADE_OUV")
-        body = self.parse_statements()
-        self.consume("ACCOLADE_FERM")
-        return {"type": "WhileLoop", "condition": condition, "body": body}
-
-
-variable_already_defined = []
-
-
-class CTranslator:
-    def translate(self, ast):
-        # variable_already_defined.clear()
-        print(f"AST: {ast}")  # Debug to check AST
-        if ast["type"] == "Program":
-            return "\n".join(self.translate(statement) for statement in ast["body"])
-
-        elif ast["type"] == "IfStatement":
-            code = f"if ({self.translate(ast['condition'])}){{\n{self.translate(ast['then']).replace('\n', '\n')}\n}}"
-            if ast.get("else"):  # Check if bloc "else" exists
-                code += f"\nelse {{\n    {self.translate(ast['else']).replace('\n', '\n    ')}\n}}"
-            return code
-
-
-        elif ast["type"] == "Assignment":
-            if ast['variable'] in variable_already_defined:
-                #If variable already defined, simply assign new value
-                return f"{ast['variable']} = {self.translate(ast['value'])};"
-            else:
-                # If varaible not defined yet
-                match (ast["value"]["type"]):
-                    case "Literal":
-                        value_type = get_value_type(ast["value"]["value"])
-                        print(f"value = {ast['value']['value']} value type = {value_type}")
-                        variable_already_defined.append(ast['variable'])  # Ajouter la variable définie
-                        return f"{value_type} {ast['variable']} = {self.translate(ast['value'])};"
-                    case "Variable":
-                        print(f"value = {ast['value']} {ast['value']['name']}")
-                        if ast['value']["name"] in ["y", "x"]:
-                            #If value is specific variable, define as int
-                            variable_already_defined.append(ast['variable'])  # Add defined varaible
-                            return f"float {ast['variable']} = {self.translate(ast['value'])};"
-                        else:
-                            variable_already_defined.append(ast['variable'])  # Add defined variable
-                            return f"auto {ast['variable']} = {self.translate(ast['value'])};"
-                    case "BinaryExpression":
-                        return f"float {ast['variable']} = {self.translate(ast['value'])};"
-        elif ast["type"] == "PrintStatement":
-            values = self.translate(ast["values"][0]).strip('"')  # Always retrieve str to print
-            if len(ast["values"]) > 1:
-                variable = self.translate(ast["values"][1])  # If yes, get variable
-                return f'printf("{values}\\n", {variable});'  # Print str and variable
-            else:
-                return f'printf("{values}\\n");'  # Else, simply print str
-
-        elif ast["type"] == "ForLoop":
-            variable = ast["variable"]
-            start = self.translate(ast["start"])
-            end = self.translate(ast["end"])
-            body = self.translate(ast["body"]).replace("\n", "\n    ")
-            return f"for (int {variable} = {start}; {variable} <= {end}; {variable}++) {{\n    {body}\n}}"
-
-        elif ast["type"] == "WhileLoop":
-            body = self.translate(ast["body"]).replace("\n", "\n    ")
-            return f"while ({self.translate(ast['condition'])}) {{\n    {body}\n}}"
-
-        elif ast["type"] == "BinaryExpression":
-            left = self.translate(ast["left"])
-            operator = ast["operator"]
-            right = self.translate(ast["right"])
-            return f"{left} {operator} {right}"
-
-        elif ast["type"] == "Literal":
-            return str(ast["value"])
-
-        elif ast["type"] == "Variable":
-            return ast["name"]
-
-        # To generate "DRAW_LINE" case
-        elif ast["type"] == "DRAW_LINE":
-            # Extract AST coordinates
-            x1 = self.translate(ast["params"][0])  # x1
-            y1 = self.translate(ast["params"][1])  # y1
-            x2 = self.translate(ast["params"][2])  # x2
-            y2 = self.translate(ast["params"][3])  # y2
-            return f"drawLine(renderer, {x1}, {y1}, {x2}, {y2});"
-        elif ast["type"] == "DRAW_SQUARE":
-            # Extract coordinates and square size 
-            x = self.translate(ast["params"][0])  # x
-            y = self.translate(ast["params"][1])  # y
-            size = self.translate(ast["params"][2])  # size
-            return f"drawSquare(renderer, {x}, {y}, {size});"
-
-        elif ast["type"] == "DRAW_CIRCLE":
-            # Extract coordinates and circle radius
-            x = self.translate(ast["params"][0])  # x
-            y = self.translate(ast["params"][1])  # y
-            radius = self.translate(ast["params"][2])  # radius
-            return f"drawCircle(renderer, {x}, {y}, {radius});"
-
-        elif ast["type"] == "DRAW_ARC":
-            # Extract coordinates, radius, angles
-            x = self.translate(ast["params"][0])  # x
-            y = self.translate(ast["params"][1])  # y
-            radius = self.translate(ast["params"][2])  # radius
-            start_angle = self.translate(ast["params"][3])  # strat angle
-            end_angle = self.translate(ast["params"][4])  # end angle
-            return f"drawArc(renderer, {x}, {y}, {radius}, {start_angle}, {end_angle});"
-
-        elif ast["type"] == "DRAW_CURSOR":
-            # Extract cursor coordinates
-            x = self.translate(ast["params"][0])  # x
-            y = self.translate(ast["params"][1])  # y
-            return f"drawCursor(renderer, {x}, {y});"
-
-        elif ast["type"] == "MOVE_CURSOR":
-            # Extract AST parameters
-            dx = self.translate(ast["params"][0])  # dx shift
-            dy = self.translate(ast["params"][1])  # dy shift
-            # Generating corresponding C code
-            return f"moveCursor({dx}, {dy});"
-
-        elif ast["type"] == "ROTATE_CURSOR":
-            # Extract AST parameters
-            angle = self.translate(ast["params"][0])  # rotating angle
-            # Generating corresponding C code
-            return f"rotateCursor({angle});"
+# Stages of drawpp.pipeline.STAGES shown in the status bar
+STAGE_LABELS = {
+    "tokenize": "analyse lexicale",
+    "parse": "analyse syntaxique",
+    "optimize": "optimisation",
+    "translate": "traduction en C",
+    "write": "écriture du fichier",
+    "build": "compilation de l'exécutable",
+}
 
 
-        else:
-            raise ValueError(f"Unknown AST node type: {ast['type']} in {ast}")
+# Colors of the drawpp.highlight styles
+HIGHLIGHT_COLORS = {
+    "keyword": "#7f0055",
+    "builtin": "#0033b3",
+    "number": "#1750eb",
+    "string": "#067d17",
+    "operator": "#8c8c8c",
+}
+HIGHLIGHT_MARGIN = 50  # lines colored above and below the visible ones
+
+CHECK_DELAY_MS = 300  # syntax check once typing has paused for this long
+CHECK_SLICE_MS = 10  # max time of one step of the first (chunked) analysis of a tab
+CHECK_CHUNK_LINES = 50
+
+PREVIEW_SIZE = 800  # window of forme.c (drawpp.symbols.CANVAS_WIDTH and CANVAS_HEIGHT)
+PREVIEW_MAX_STEPS = 100000  # loop iterations per group of statements of the preview : an endless loop stops
+
+IO_CHUNK_BYTES = 256 * 1024  # bytes read per step when a file is opened
+IO_CHUNK_LINES = 5000  # lines written per step when a file is saved
 
 
 # --- GUI Editor ---
@@ -456,11 +44,15 @@ class DrawPlusPlusEditor:
         self.root.title("Draw++ Editor")
         # self.root.state("zoomed")
         self.root.attributes("-zoomed", True)
+        self.jobs = {}  # tab id -> compilation job (drawpp.worker.CompileJob), one job per tab
+        self.polling = False  # poll_jobs scheduled with after()
 
         self.create_menu()
+        self.create_status_bar()
 
         self.tab_control = ttk.Notebook(root)
         self.tab_control.pack(expand=1, fill="both")
+        self.tab_control.bind("<<NotebookTabChanged>>", self.on_tab_changed)
 
         self.new_file()
 
@@ -477,39 +69,278 @@ class DrawPlusPlusEditor:
 
         run_menu = tk.Menu(menu_bar, tearoff=0)
         run_menu.add_command(label="Exécuter", command=self.run_code)
+        run_menu.add_command(label="Annuler la compilation", command=self.cancel_job)
+        run_menu.add_separator()
+        # Durations of the stages of the next compiles shown in the status bar (see drawpp.profiling)
+        self.profile = tk.BooleanVar(value=False)
+        run_menu.add_checkbutton(label="Mesurer les étapes de la compilation", variable=self.profile)
+        # Executable built next to the C file (see drawpp.build), the prelude functions compiled only once
+        self.build = tk.BooleanVar(value=False)
+        run_menu.add_checkbutton(label="Compiler l'exécutable", variable=self.build)
         menu_bar.add_cascade(label="Exécuter", menu=run_menu)
 
         self.root.config(menu=menu_bar)
 
+    # Status of the compilation of the current tab, at the bottom of the window
+    def create_status_bar(self):
+        status_bar = tk.Frame(self.root)
+        status_bar.pack(side="bottom", fill="x")
+        self.status = tk.Label(status_bar, text="Prêt", anchor="w")
+        self.status.pack(side="left", fill="x", expand=True)
+        self.progress = ttk.Progressbar(status_bar, length=200, mode="determinate")
+        self.progress.pack(side="right")
+        self.diagnostic = tk.Label(status_bar, text="", anchor="e", fg="red")
+        self.diagnostic.pack(side="right", padx=10)
+
     def new_file(self):
         new_tab = tk.Frame(self.tab_control)
-        text_area = tk.Text(new_tab, wrap="word", undo=True)
-        text_area.pack(side="right", fill="both", expand=True)
+        panes = tk.PanedWindow(new_tab, orient="horizontal", sashrelief="raised")
+        panes.pack(fill="both", expand=True)
+        text_area = tk.Text(panes, wrap="word", undo=True)
+        panes.add(text_area, stretch="always")
+
+        # Preview of the drawing next to the code, updated by check_syntax (see show_preview)
+        preview_frame = tk.Frame(panes)
+        new_tab.preview_status = tk.Label(preview_frame, text="", anchor="w", fg="red")
+        new_tab.preview_status.pack(side="bottom", fill="x")
+        canvas = tk.Canvas(preview_frame, width=PREVIEW_SIZE, height=PREVIEW_SIZE, background="white",
+                           scrollregion=(0, 0, PREVIEW_SIZE, PREVIEW_SIZE))
+        canvas.pack(fill="both", expand=True)
+        panes.add(preview_frame, stretch="always")
+        new_tab.canvas = canvas
+        new_tab.preview = None  # drawpp.preview.Preview of the canvas, made on the first update
 
         #Store text text area reference in tab
         new_tab.text_area = text_area  # Direct reference to text area
+        new_tab.front_end = None  # drawpp.incremental.IncrementalParser of the text, built on the first check
+        new_tab.loaded_lines = 0  # lines already given to front_end while it is being built
+        new_tab.dirty = None  # [unchanged lines at the start, unchanged lines at the end] since the last check
+        new_tab.check_id = None  # pending after() of check_syntax
+        new_tab.highlighted = set()  # lines colored since the last edit
+        new_tab.highlight_id = None  # pending after_idle() of highlight
+        new_tab.io = None  # [label, done, total] while the file is being loaded or saved
+        for style, color in HIGHLIGHT_COLORS.items():
+            text_area.tag_configure(style, foreground=color)
+        text_area.tag_configure("syntax_error", underline=True, foreground="red")  # above the colors
+        text_area.config(yscrollcommand=lambda first, last: self.schedule_highlight(new_tab))
+        self.watch_edits(new_tab)
         self.tab_control.add(new_tab, text="Sans titre")
         self.tab_control.select(new_tab)
 
+    # Every insert/delete/replace of the text area goes through proxy : the changed lines are
+    # recorded (the <<Modified>> event doesn't tell which ones) and a syntax check is scheduled
+    def watch_edits(self, tab):
+        widget = tab.text_area._w
+        original = widget + "_original"
+        self.root.tk.call("rename", widget, original)
+
+        def proxy(command, *args):
+            if command in ("insert", "delete", "replace"):
+                self.record_edit(tab, command, args)
+            return self.root.tk.call((original, command) + args)
+
+        self.root.tk.createcommand(widget, proxy)
+
+    def record_edit(self, tab, command, args):
+        text_area = tab.text_area
+        line_of = lambda index: int(text_area.index(index).split(".")[0])
+        line_count = line_of("end-1c")
+        if command == "insert":
+            first = last = line_of(args[0])
+        elif command == "delete" and len(args) == 1:
+            first, last = line_of(args[0]), line_of(f"{args[0]} +1c")  # one character, maybe a line break
+        else:
+            indexes = args if command == "delete" else args[:2]
+            lines = [line_of(index) for index in indexes]
+            first, last = min(lines), max(lines)
+
+        unchanged = [max(first - 1, 0), max(line_count - last, 0)]
+        if tab.dirty is not None:
+            unchanged = [min(tab.dirty[0], unchanged[0]), min(tab.dirty[1], unchanged[1])]
+        tab.dirty = unchanged
+        if tab.check_id is not None:
+            self.root.after_cancel(tab.check_id)
+        tab.check_id = self.root.after(CHECK_DELAY_MS, self.check_syntax, tab)
+        tab.highlighted.clear()  # line numbers may have moved
+        self.schedule_highlight(tab)
+
+    # Highlighting once the pending events are handled, at most once per batch of edits or scrolls
+    def schedule_highlight(self, tab):
+        if tab.highlight_id is None:
+            tab.highlight_id = self.root.after_idle(self.highlight, tab)
+
+    # Colors the visible lines plus a margin, the lines already colored since the last edit are skipped
+    def highlight(self, tab):
+        from drawpp.highlight import STYLES, line_spans
+
+        tab.highlight_id = None
+        text_area = tab.text_area
+        line_of = lambda index: int(text_area.index(index).split(".")[0])
+        first = max(line_of("@0,0") - HIGHLIGHT_MARGIN, 1)
+        last = min(line_of(f"@0,{text_area.winfo_height()}") + HIGHLIGHT_MARGIN, line_of("end-1c"))
+        todo = [number for number in range(first, last + 1) if number not in tab.highlighted]
+        if not todo:
+            return
+        first, last = todo[0], todo[-1]
+        lines = text_area.get(f"{first}.0", f"{last}.end").split("\n")
+
+        ranges = {style: [] for style in STYLES}
+        runs = []  # (first, last) of the runs of consecutive lines to color
+        for number in todo:
+            if runs and runs[-1][1] == number - 1:
+                runs[-1][1] = number
+            else:
+                runs.append([number, number])
+            for style, start, end in line_spans(lines[number - first]):
+                ranges[style] += (f"{number}.{start}", f"{number}.{end}")
+        for style in STYLES:
+            for run_first, run_last in runs:
+                text_area.tag_remove(style, f"{run_first}.0", f"{run_last}.end")
+            if ranges[style]:
+                text_area.tag_add(style, *ranges[style])
+        tab.highlighted.update(todo)
+
+    # Live diagnostics : only the changed lines are analysed again (drawpp.incremental)
+    def check_syntax(self, tab):
+        from drawpp.incremental import IncrementalParser
+
+        tab.check_id = None
+        text_area = tab.text_area
+        line_count = int(text_area.index("end-1c").split(".")[0])
+        if tab.front_end is None or tab.loaded_lines:
+            # First analysis of the tab, a few lines per step so that a big file doesn't freeze the editor
+            if tab.dirty is not None:  # edited meanwhile : start again
+                tab.front_end, tab.loaded_lines, tab.dirty = IncrementalParser(""), 0, None
+            elif tab.front_end is None:
+                tab.front_end, tab.loaded_lines = IncrementalParser(""), 0
+            deadline = time.perf_counter() + CHECK_SLICE_MS / 1000
+            while tab.loaded_lines < line_count and time.perf_counter() < deadline:
+                first = tab.loaded_lines + 1
+                last = min(first + CHECK_CHUNK_LINES - 1, line_count)
+                chunk = text_area.get(f"{first}.0", f"{last}.end")
+                tab.front_end.append(chunk if first == 1 else "\n" + chunk)
+                tab.loaded_lines = last
+            if tab.loaded_lines < line_count:
+                tab.check_id = self.root.after(1, self.check_syntax, tab)
+                return
+            tab.loaded_lines = 0
+        elif tab.dirty is not None:
+            front_end = tab.front_end
+            start, end = tab.dirty
+            tab.dirty = None
+            # at least one line replaced by at least one line
+            while start + end >= min(front_end.line_count, line_count):
+                if start:
+                    start -= 1
+                else:
+                    end -= 1
+            first = start + 1
+            last = line_count - end
+            front_end.edit(first, front_end.line_count - end - start, text_area.get(f"{first}.0", f"{last}.end"))
+        self.show_diagnostics(tab)
+        if not tab.loaded_lines and not tab.front_end.error_segments:
+            self.show_preview(tab)
+
+    # Only the shapes of the changed statements are drawn again (drawpp.preview). The preview keeps
+    # the last drawing while the code has errors.
+    def show_preview(self, tab):
+        from drawpp.preview import Preview
+
+        if tab.preview is None:
+            tab.preview = Preview(tab.canvas, PREVIEW_MAX_STEPS)
+        try:
+            tab.preview.update(tab.front_end.program())
+        except (NameError, ZeroDivisionError, RuntimeError, SyntaxError) as e:
+            tab.preview_status.config(text=f"Aperçu : {e}")
+        else:
+            tab.preview_status.config(text="")
+
+    def show_diagnostics(self, tab):
+        text_area = tab.text_area
+        text_area.tag_remove("syntax_error", "1.0", "end")
+        errors = tab.front_end.errors() if tab.front_end is not None and not tab.loaded_lines else []
+        for line, _ in errors:
+            text_area.tag_add("syntax_error", f"{line}.0", f"{line}.end")
+        if str(tab) == self.tab_control.select():
+            self.diagnostic.config(text=f"Ligne {errors[0][0]} : {errors[0][1]}" if errors else "")
+
+    # The file is read and inserted piece by piece, one piece per after() tick : a big file doesn't
+    # freeze the editor and the progress is shown in the status bar
     def open_file(self):
         file_path = filedialog.askopenfilename(filetypes=[("Fichiers Draw++", "*.draw"), ("Tous les fichiers", "*.*")])
         if file_path:
-            with open(file_path, "r") as file:
-                content = file.read()
+            try:
+                file = open(file_path, "rb")
+            except OSError as e:
+                messagebox.showerror("Erreur", f"Impossible d'ouvrir le fichier : {e}")
+                return
             self.new_file()
-            text_area = self.get_current_text_area()
-            text_area.insert("1.0", content)
-
+            tab = self.tab_control.nametowidget(self.tab_control.select())
+            tab.io = ["Chargement", 0, os.fstat(file.fileno()).st_size]
+            tab.text_area.config(undo=False, state="disabled")  # no typing in a half loaded file
+            self.load_chunk(tab, file, codecs.getincrementaldecoder("utf-8")())
+
+    def load_chunk(self, tab, file, decoder):
+        text_area = tab.text_area
+        try:
+            data = file.read(IO_CHUNK_BYTES)
+            text = decoder.decode(data, final=not data)  # a character may be cut between two pieces
+        except (OSError, UnicodeDecodeError) as e:
+            messagebox.showerror("Erreur", f"Impossible de lire le fichier : {e}")
+            data = text = None
+        if text:
+            text_area.config(state="normal")
+            text_area.insert("end-1c", text)
+            text_area.config(state="disabled")
+        if data:
+            tab.io[1] += len(data)
+            self.update_status()
+            self.root.after(1, self.load_chunk, tab, file, decoder)
+            return
+        file.close()
+        tab.io = None
+        text_area.config(undo=True, state="normal")
+        text_area.edit_reset()  # loading can't be undone
+        self.update_status()
+
+    # The text is written piece by piece like open_file reads it, the text area stays read-only
+    # meanwhile so that the saved text is the one shown when saving started
     def save_file(self):
         current_tab = self.tab_control.select()
         if current_tab:
-            text_area = self.get_current_text_area()
-            content = text_area.get("1.0", "end-1c")
+            tab = self.tab_control.nametowidget(current_tab)
+            if tab.io is not None:
+                return  # already being loaded or saved
             file_path = filedialog.asksaveasfilename(defaultextension=".draw",
                                                      filetypes=[("Fichiers Draw++", "*.draw")])
             if file_path:
-                with open(file_path, "w") as file:
-                    file.write(content)
+                try:
+                    file = open(file_path, "w", encoding="utf-8")
+                except OSError as e:
+                    messagebox.showerror("Erreur", f"Impossible d'enregistrer le fichier : {e}")
+                    return
+                line_count = int(tab.text_area.index("end-1c").split(".")[0])
+                tab.io = ["Sauvegarde", 0, line_count]
+                tab.text_area.config(state="disabled")
+                self.save_chunk(tab, file, 1)
+
+    def save_chunk(self, tab, file, first):
+        line_count = tab.io[2]
+        last = first + IO_CHUNK_LINES  # first line of the next piece
+        try:
+            file.write(tab.text_area.get(f"{first}.0", f"{last}.0" if last <= line_count else "end-1c"))
+        except OSError as e:
+            messagebox.showerror("Erreur", f"Impossible d'enregistrer le fichier : {e}")
+            last = line_count + 1
+        if last <= line_count:
+            tab.io[1] = last - 1
+            self.update_status()
+            self.root.after(1, self.save_chunk, tab, file, last)
+            return
+        file.close()
+        tab.io = None
+        tab.text_area.config(state="normal")
+        self.update_status()
 
     def run_code(self):
         current_tab = self.tab_control.select()
@@ -518,66 +349,110 @@ class DrawPlusPlusEditor:
 
             # Direct access to text area from tab
             text_area = getattr(tab_widget, "text_area", None)
-            if text_area:
+            if tab_widget.io is not None:
+                messagebox.showwarning("Attention", "Le fichier est en cours de chargement ou de sauvegarde.")
+            elif text_area:
                 code = text_area.get("1.0", "end-1c")
-                print("Code à analyser :", code)  # Debug: Voir le code
-                try:
-                    tokenizer = Tokenizer(code)
-                    tokens = tokenizer.tokenize()
-                    print("Tokens : ", tokens)  # Debug: Voir les jetons
-                    parser = Parser(tokens)
-                    ast = parser.parse()
-                    translator = CTranslator()
-                    variable_already_defined.clear()
-
-                    c_code = translator.translate(ast)
-                    print("Code C généré :\n", c_code)
-                    # Read content from another C file (forme.c)
-                    file_path = filedialog.askopenfilename(
-                        title="Sélectionner le fichier C à importer",
-                        filetypes=[("Fichiers C", "*.c")]
-                    )
-                    if file_path:
-                        # Open and read file forme.c
-                        with open(file_path, "r") as file:
-                            forme_code = file.read()
-                        print("Contenu de forme.c :\n", forme_code)
-
-                        # Adding content from file in main C program
-                        full_c_code = (
-                            f"{forme_code}\n"  # Contenu de forme.c inséré ici
-                            f"{c_code.strip()}\n"  # Code C généré
-                            "SDL_RenderPresent(renderer);\n"
-                            "SDL_Event e;\n"
-                            "int quit = 0;\n"
-                            "while (!quit) {\n"
-                            "while (SDL_PollEvent(&e)) {\n"
-                            "if (e.type == SDL_QUIT) {\n"
-                            "quit = 1;\n"
-                            "}\n"
-                            "}\n"
-                            "}\n"
-                            "return 0;\n"
-                            "}"
-                        )
-                    # exec(python_code)  # Exec generated python code
-                    # Asking user where to store generated C file
-                    file_path = filedialog.asksaveasfilename(
-                        defaultextension=".c", filetypes=[("Fichiers C", "*.c")]
-                    )
-                    if file_path:
-                        with open(file_path, "w") as file:
-                            file.write(full_c_code)
-                        messagebox.showinfo(
-                            "Succès", "Le code C a été sauvegardé avec succès."
-                        )
-                except SyntaxError as e:
-                    messagebox.showerror("Erreur de syntaxe", f"Erreur de syntaxe : {str(e)}")
-                except Exception as e:
-                    messagebox.showerror("Erreur d'exécution", f"Erreur d'exécution : {str(e)}")
+                # Read content from another C file (forme.c)
+                prelude_path = filedialog.askopenfilename(
+                    title="Sélectionner le fichier C à importer",
+                    filetypes=[("Fichiers C", "*.c")]
+                )
+                if not prelude_path:
+                    return
+                # Asking user where to store generated C file
+                file_path = filedialog.asksaveasfilename(
+                    defaultextension=".c", filetypes=[("Fichiers C", "*.c")]
+                )
+                if not file_path:
+                    return
+                # Compiler imported on first use, it runs in another process : the editor stays responsive
+                from drawpp.worker import CompileJob
+
+                builder = None
+                if self.build.get():
+                    from drawpp.build import NativeBuilder
+
+                    try:
+                        builder = NativeBuilder(prelude_path)
+                    except (OSError, ValueError) as e:
+                        messagebox.showerror("Erreur", f"Compilation de l'exécutable impossible : {e}")
+                        return
+                if current_tab in self.jobs:
+                    self.jobs[current_tab].cancel()  # a new run replaces the one still running
+                self.jobs[current_tab] = CompileJob(code, file_path, prelude_path, profile=self.profile.get(),
+                                                    builder=builder)
+                self.update_status()
+                if not self.polling:
+                    self.polling = True
+                    self.root.after(50, self.poll_jobs)
             else:
                 messagebox.showerror("Erreur", "Impossible de trouver la zone de texte dans l'onglet actuel.")
 
+    def on_tab_changed(self, event):
+        self.update_status()
+        current_tab = self.tab_control.select()
+        if current_tab:
+            self.show_diagnostics(self.tab_control.nametowidget(current_tab))
+
+    def cancel_job(self):
+        job = self.jobs.get(self.tab_control.select())
+        if job is not None and job.running:
+            job.cancel()
+            self.update_status()
+
+    # Progress and results of the running jobs, every 50 ms while at least one is running
+    def poll_jobs(self):
+        finished = [job for job in self.jobs.values() if job.running and job.poll()]
+        self.update_status()
+        if any(job.running for job in self.jobs.values()):
+            self.root.after(50, self.poll_jobs)
+        else:
+            self.polling = False
+        for job in finished:
+            if job.result[0] == "done":
+                message = f"Le code C a été sauvegardé avec succès dans {job.output_path}."
+                if job.executable_path is not None:
+                    message += f"\nExécutable : {job.executable_path}"
+                messagebox.showinfo("Succès", message)
+            elif job.result[1] == "syntax":
+                messagebox.showerror("Erreur de syntaxe", f"Erreur de syntaxe : {job.result[2]}")
+            else:
+                messagebox.showerror("Erreur d'exécution", f"Erreur d'exécution : {job.result[2]}")
+
+    def update_status(self):
+        current_tab = self.tab_control.select()
+        io = self.tab_control.nametowidget(current_tab).io if current_tab else None
+        if io is not None:  # file being loaded or saved
+            label, done, total = io
+            self.status.config(text=f"{label} du fichier : {done * 100 // max(total, 1)} %")
+            self.progress.config(maximum=max(total, 1), value=done)
+            return
+
+        job = self.jobs.get(current_tab)
+        if job is None:
+            self.status.config(text="Prêt")
+            self.progress.config(value=0)
+            return
+
+        from drawpp.pipeline import STAGES  # already imported by the job
+
+        if job.running:
+            stage = STAGE_LABELS.get(job.stage, "démarrage")
+            text, done = f"Compilation en cours : {stage}...", STAGES.index(job.stage) if job.stage else 0
+        elif job.result[0] == "done":
+            text, done = f"Compilé : {job.output_path}" + (" (cache)" if job.result[1] else ""), len(STAGES)
+        elif job.result[0] == "cancelled":
+            text, done = "Compilation annulée", 0
+        else:
+            text, done = "Échec de la compilation", 0
+        if job.profile is not None:
+            from drawpp.profiling import format_report
+
+            text += f" — {format_report(job.profile)}"
+        self.status.config(text=text)
+        self.progress.config(maximum=len(STAGES), value=done)
+
     def get_current_text_area(self):
         # Get current tab text area
         current_tab = self.tab_control.select()
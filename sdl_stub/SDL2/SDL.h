@@ -0,0 +1,79 @@
+// Minimal stand-in for <SDL2/SDL.h> : the part of the SDL2 API used by forme.c and by the generated
+// programs. Linked with sdl_stub.c, nothing is displayed : every call is counted in sdl_stub_counters,
+// which lets the prelude be compiled, run and benchmarked on machines without SDL2.
+#ifndef SDL_STUB_H
+#define SDL_STUB_H
+
+#include <stdint.h>
+
+typedef uint8_t Uint8;
+typedef uint32_t Uint32;
+
+typedef struct SDL_Window SDL_Window;
+typedef struct SDL_Renderer SDL_Renderer;
+
+typedef struct SDL_Rect {
+    int x, y, w, h;
+} SDL_Rect;
+
+typedef struct SDL_Point {
+    int x, y;
+} SDL_Point;
+
+typedef struct SDL_Surface {
+    Uint32 flags;
+    int w, h;
+    int pitch;  // bytes per row
+    void *pixels;
+} SDL_Surface;
+
+typedef union SDL_Event {
+    Uint32 type;
+} SDL_Event;
+
+#define SDL_INIT_VIDEO 0x00000020u
+#define SDL_WINDOWPOS_CENTERED 0x2FFF0000u
+#define SDL_WINDOW_SHOWN 0x00000004u
+#define SDL_RENDERER_ACCELERATED 0x00000002u
+#define SDL_QUIT 0x100
+#define SDL_PIXELFORMAT_RGB888 0x16161804u
+
+int SDL_Init(Uint32 flags);
+void SDL_Quit(void);
+const char *SDL_GetError(void);
+
+SDL_Window *SDL_CreateWindow(const char *title, int x, int y, int w, int h, Uint32 flags);
+void SDL_DestroyWindow(SDL_Window *window);
+SDL_Renderer *SDL_CreateRenderer(SDL_Window *window, int index, Uint32 flags);
+void SDL_DestroyRenderer(SDL_Renderer *renderer);
+
+SDL_Surface *SDL_CreateRGBSurfaceWithFormat(Uint32 flags, int width, int height, int depth, Uint32 format);
+void SDL_FreeSurface(SDL_Surface *surface);
+SDL_Renderer *SDL_CreateSoftwareRenderer(SDL_Surface *surface);
+int SDL_SaveBMP(SDL_Surface *surface, const char *file);  // writes the pixels as left by the stub (not drawn)
+
+int SDL_SetRenderDrawColor(SDL_Renderer *renderer, Uint8 r, Uint8 g, Uint8 b, Uint8 a);
+int SDL_RenderClear(SDL_Renderer *renderer);
+int SDL_RenderDrawPoint(SDL_Renderer *renderer, int x, int y);
+int SDL_RenderDrawPoints(SDL_Renderer *renderer, const SDL_Point *points, int count);
+int SDL_RenderDrawLine(SDL_Renderer *renderer, int x1, int y1, int x2, int y2);
+int SDL_RenderDrawLines(SDL_Renderer *renderer, const SDL_Point *points, int count);
+int SDL_RenderFillRect(SDL_Renderer *renderer, const SDL_Rect *rect);
+int SDL_RenderFillRects(SDL_Renderer *renderer, const SDL_Rect *rects, int count);
+void SDL_RenderPresent(SDL_Renderer *renderer);
+
+int SDL_PollEvent(SDL_Event *event);  // one SDL_QUIT event, then an empty queue
+int SDL_WaitEvent(SDL_Event *event);
+
+// Number of calls of every renderer function, and of the points / rectangles they received
+typedef struct SDL_StubCounters {
+    long set_color, clear, present;
+    long draw_point, draw_points, points;
+    long draw_line, draw_lines, lines;
+    long fill_rect, fill_rects, rects;
+    long saved_bmp;
+} SDL_StubCounters;
+
+extern SDL_StubCounters sdl_stub_counters;
+
+#endif
@@ -0,0 +1,199 @@
+// Implementation of the stub SDL2 API declared in SDL2/SDL.h : nothing is drawn, calls are counted.
+//   gcc -I sdl_stub program.c sdl_stub/sdl_stub.c -lm
+#include <SDL2/SDL.h>
+#include <stdio.h>
+#include <stdlib.h>
+
+SDL_StubCounters sdl_stub_counters;
+
+struct SDL_Window {
+    int w, h;
+};
+
+struct SDL_Renderer {
+    Uint8 r, g, b, a;
+};
+
+static SDL_Window stub_window;
+static SDL_Renderer stub_renderer;
+
+int SDL_Init(Uint32 flags) {
+    (void)flags;
+    return 0;
+}
+
+void SDL_Quit(void) {
+}
+
+const char *SDL_GetError(void) {
+    return "stub SDL";
+}
+
+SDL_Window *SDL_CreateWindow(const char *title, int x, int y, int w, int h, Uint32 flags) {
+    (void)title, (void)x, (void)y, (void)flags;
+    stub_window.w = w;
+    stub_window.h = h;
+    return &stub_window;
+}
+
+void SDL_DestroyWindow(SDL_Window *window) {
+    (void)window;
+}
+
+SDL_Renderer *SDL_CreateRenderer(SDL_Window *window, int index, Uint32 flags) {
+    (void)window, (void)index, (void)flags;
+    return &stub_renderer;
+}
+
+void SDL_DestroyRenderer(SDL_Renderer *renderer) {
+    (void)renderer;
+}
+
+SDL_Surface *SDL_CreateRGBSurfaceWithFormat(Uint32 flags, int width, int height, int depth, Uint32 format) {
+    (void)depth, (void)format;
+    SDL_Surface *surface = malloc(sizeof(SDL_Surface));
+    if (!surface) {
+        return NULL;
+    }
+    surface->flags = flags;
+    surface->w = width;
+    surface->h = height;
+    surface->pitch = width * 4;
+    surface->pixels = calloc((size_t)height, (size_t)surface->pitch);
+    if (!surface->pixels) {
+        free(surface);
+        return NULL;
+    }
+    return surface;
+}
+
+void SDL_FreeSurface(SDL_Surface *surface) {
+    if (surface) {
+        free(surface->pixels);
+        free(surface);
+    }
+}
+
+SDL_Renderer *SDL_CreateSoftwareRenderer(SDL_Surface *surface) {
+    (void)surface;
+    return &stub_renderer;
+}
+
+static void write_le(FILE *file, Uint32 value, int bytes) {
+    for (int i = 0; i < bytes; i++) {
+        fputc((value >> (8 * i)) & 0xFF, file);
+    }
+}
+
+// 24 bits BMP, rows stored bottom-up and padded to 4 bytes
+int SDL_SaveBMP(SDL_Surface *surface, const char *file) {
+    FILE *output = fopen(file, "wb");
+    if (!output) {
+        return -1;
+    }
+    int row_size = (surface->w * 3 + 3) & ~3;
+    fputs("BM", output);
+    write_le(output, 54 + row_size * surface->h, 4);
+    write_le(output, 0, 4);
+    write_le(output, 54, 4);  // offset of the pixels
+    write_le(output, 40, 4);  // BITMAPINFOHEADER
+    write_le(output, surface->w, 4);
+    write_le(output, surface->h, 4);
+    write_le(output, 1, 2);
+    write_le(output, 24, 2);
+    for (int i = 0; i < 6; i++) {
+        write_le(output, 0, 4);
+    }
+    for (int y = surface->h - 1; y >= 0; y--) {
+        const Uint8 *row = (const Uint8 *)surface->pixels + y * surface->pitch;
+        for (int x = 0; x < surface->w; x++) {
+            fputc(row[4 * x], output);  // B, G, R of an RGB888 pixel (little endian)
+            fputc(row[4 * x + 1], output);
+            fputc(row[4 * x + 2], output);
+        }
+        for (int pad = surface->w * 3; pad < row_size; pad++) {
+            fputc(0, output);
+        }
+    }
+    sdl_stub_counters.saved_bmp++;
+    return fclose(output) == 0 ? 0 : -1;
+}
+
+int SDL_SetRenderDrawColor(SDL_Renderer *renderer, Uint8 r, Uint8 g, Uint8 b, Uint8 a) {
+    renderer->r = r;
+    renderer->g = g;
+    renderer->b = b;
+    renderer->a = a;
+    sdl_stub_counters.set_color++;
+    return 0;
+}
+
+int SDL_RenderClear(SDL_Renderer *renderer) {
+    (void)renderer;
+    sdl_stub_counters.clear++;
+    return 0;
+}
+
+int SDL_RenderDrawPoint(SDL_Renderer *renderer, int x, int y) {
+    (void)renderer, (void)x, (void)y;
+    sdl_stub_counters.draw_point++;
+    sdl_stub_counters.points++;
+    return 0;
+}
+
+int SDL_RenderDrawPoints(SDL_Renderer *renderer, const SDL_Point *points, int count) {
+    (void)renderer, (void)points;
+    sdl_stub_counters.draw_points++;
+    sdl_stub_counters.points += count;
+    return 0;
+}
+
+int SDL_RenderDrawLine(SDL_Renderer *renderer, int x1, int y1, int x2, int y2) {
+    (void)renderer, (void)x1, (void)y1, (void)x2, (void)y2;
+    sdl_stub_counters.draw_line++;
+    sdl_stub_counters.lines++;
+    return 0;
+}
+
+int SDL_RenderDrawLines(SDL_Renderer *renderer, const SDL_Point *points, int count) {
+    (void)renderer, (void)points;
+    sdl_stub_counters.draw_lines++;
+    sdl_stub_counters.lines += count > 1 ? count - 1 : 0;
+    return 0;
+}
+
+int SDL_RenderFillRect(SDL_Renderer *renderer, const SDL_Rect *rect) {
+    (void)renderer, (void)rect;
+    sdl_stub_counters.fill_rect++;
+    sdl_stub_counters.rects++;
+    return 0;
+}
+
+int SDL_RenderFillRects(SDL_Renderer *renderer, const SDL_Rect *rects, int count) {
+    (void)renderer, (void)rects;
+    sdl_stub_counters.fill_rects++;
+    sdl_stub_counters.rects += count;
+    return 0;
+}
+
+void SDL_RenderPresent(SDL_Renderer *renderer) {
+    (void)renderer;
+    sdl_stub_counters.present++;
+}
+
+// The event queue holds a single SDL_QUIT, the program closes its window as soon as it looks at events
+static int quit_pending = 1;
+
+int SDL_PollEvent(SDL_Event *event) {
+    if (!quit_pending) {
+        return 0;
+    }
+    quit_pending = 0;
+    event->type = SDL_QUIT;
+    return 1;
+}
+
+int SDL_WaitEvent(SDL_Event *event) {
+    event->type = SDL_QUIT;
+    return 1;
+}
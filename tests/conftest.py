@@ -0,0 +1,5 @@
+# The tests import drawpp from the working tree, like the benchmarks
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,97 @@
+# Programs and helpers shared by the tests : seeded random Draw++ programs (draw calls on and off the
+# window, squares covering others, cursor moves, assignments, afficher, and small pour / si / tantque
+# blocks), deep programs, parsing and comparison of trees
+import os
+import random
+
+from drawpp import Node, Parser, Tokenizer, walk
+
+PRELUDE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "forme.c")
+
+
+def parse(code):
+    return Parser(Tokenizer(code).tokenize()).parse()
+
+
+# Same classes and same values in the same order, compared without recursion (repr recurses)
+def same_tree(tree, other):
+    def values(node):
+        return type(node), [value if not isinstance(value, (Node, list)) else None
+                            for value in map(node.__getattribute__, node.field_names)]
+
+    nodes, other_nodes = list(walk(tree)), list(walk(other))
+    return len(nodes) == len(other_nodes) and all(map(lambda a, b: values(a) == values(b), nodes, other_nodes))
+
+
+# depth si blocks one inside the other, a draw call in the innermost one
+def nested_program(depth):
+    return "".join(f"si a > {level} {{\n" for level in range(depth)) + "drawSquare(a, 2, 3)\n" + "}\n" * depth
+
+
+# A draw call with a chain of terms additions : a tree as deep as the chain is long
+def chain_program(terms):
+    return "a -> 1\ndrawSquare(" + " + ".join(["a"] * terms) + ", 2, 3)\n"
+
+
+def number(rng):
+    return str(rng.choice([rng.randint(-100, 900), rng.randint(0, 800), rng.randint(-2000, 3000)]))
+
+
+def expression(rng, names):
+    choice = rng.random()
+    if choice < 0.4 or not names:
+        return number(rng)
+    if choice < 0.7:
+        return rng.choice(names)
+    return f"{rng.choice(names)} {rng.choice('+-*/')} {rng.randint(1, 9)}"
+
+
+# One statement, names are the variables it can read (assignments add theirs)
+def statement(rng, names, depth):
+    choice = rng.random()
+    if choice < 0.25:
+        size = rng.choice([number(rng), str(rng.randint(1, 300))])
+        return f"drawSquare({expression(rng, names)}, {expression(rng, names)}, {size})"
+    if choice < 0.35:
+        return f"drawCircle({expression(rng, names)}, {expression(rng, names)}, {rng.randint(1, 60)})"
+    if choice < 0.45:
+        return f"drawLine({', '.join(expression(rng, names) for _ in range(4))})"
+    if choice < 0.5:
+        return (f"drawArc({expression(rng, names)}, {expression(rng, names)}, {rng.randint(1, 60)}, "
+                f"{rng.randint(0, 360)}, {rng.randint(0, 360)})")
+    if choice < 0.55:
+        return "drawCursor(x, y)"
+    if choice < 0.6:
+        return f"moveCursor({rng.randint(-300, 300)}, {rng.randint(-300, 300)})"
+    if choice < 0.63:
+        return f"rotateCursor({rng.randint(0, 360)})"
+    if choice < 0.66:
+        return f'afficher("valeur %d", {expression(rng, names)})'
+    if choice < 0.75:
+        name = rng.choice(["a", "b", "c"])
+        assignment = f"{name} -> {expression(rng, names)}"
+        names.append(name)
+        return assignment
+    if depth < 2 and choice < 0.83:
+        name = rng.choice(["i", "j"])
+        body = "\n".join(statement(rng, names + [name], depth + 1) for _ in range(rng.randint(1, 4)))
+        start = rng.randint(-50, 850)
+        return f"pour {name} de {start} à {start + rng.randint(-3, 8)} {{\n{body}\n}}"
+    if depth < 2 and choice < 0.91:
+        body = "\n".join(statement(rng, list(names), depth + 1) for _ in range(rng.randint(1, 3)))
+        return f"si {expression(rng, names)} > {number(rng)} {{\n{body}\n}}"
+    if depth < 2 and choice < 0.95:
+        counter = f"k{depth}"  # only changed by its loop : at most 3 iterations
+        body = "\n".join(statement(rng, list(names), depth + 1) for _ in range(rng.randint(1, 3)))
+        return f"{counter} -> 0\ntantque {counter} < 3 {{\n{body}\n{counter} -> {counter} + 1\n}}"
+    return f"drawSquare({rng.randint(-100, 500)}, {rng.randint(-100, 500)}, {rng.randint(100, 400)})"
+
+
+def random_program(rng, max_statements=40):
+    names = ["x", "y"]
+    return "\n".join(statement(rng, names, 0) for _ in range(rng.randint(1, max_statements)))
+
+
+def random_programs(seed, count):
+    rng = random.Random(seed)
+    return [random_program(rng) for _ in range(count)]
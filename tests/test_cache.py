@@ -0,0 +1,96 @@
+import os
+import pickle
+
+from drawpp import CompileCache, compile_to_file, parse_source
+from programs import PRELUDE, chain_program, nested_program, parse, same_tree
+
+
+def test_tree_pickled_as_it_was_built():
+    ast = parse('a -> 2\nsi a > 1 {\n afficher("%d", a * (3 - a))\n} sinon {\n drawCircle(a, 1.5, 3)\n}\n'
+                "pour i de 0 à a {\n moveCursor(i, 2)\n}\n")
+    assert repr(pickle.loads(pickle.dumps(ast))) == repr(ast)  # small enough for repr
+
+
+def test_deep_trees_pickled_without_recursion():
+    for code in (nested_program(5000), chain_program(20000)):
+        ast = parse(code)
+        assert same_tree(pickle.loads(pickle.dumps(ast, pickle.HIGHEST_PROTOCOL)), ast)
+
+
+def test_deep_tree_stored_in_cache(tmp_path):
+    ast = parse(nested_program(1000))
+    cache = CompileCache(str(tmp_path))
+    cache.put("k" * 64, "ast", ast)
+    assert same_tree(cache.get("k" * 64, "ast"), ast)
+    assert cache.stats["errors"] == 0
+
+
+def test_failed_write_left_out_of_cache(tmp_path):
+    (tmp_path / "kk").write_text("a file where the cache wants a directory")
+    cache = CompileCache(str(tmp_path))
+    cache.put("k" * 64, "tokens", [1, 2, 3])
+    cache.put("k" * 64, "unpicklable", lambda: None)
+    assert cache.stats["errors"] == 2
+    assert cache.get("k" * 64, "tokens") is None
+
+
+# Entry of size bytes for key, from a file
+def put_bytes(cache, tmp_path, key, size):
+    path = tmp_path / "entrée"
+    path.write_bytes(b"x" * size)
+    cache.put_file(key, "c", str(path))
+
+
+def test_hits_and_misses_counted(tmp_path):
+    cache = CompileCache(str(tmp_path / "cache"))
+    key = cache.key("a -> 1")
+    assert cache.get(key, "tokens") is None
+    assert not cache.copy_to(key, "c", str(tmp_path / "copie.c"))
+    cache.put(key, "tokens", [1, 2])
+    put_bytes(cache, tmp_path, key, 10)
+    assert cache.get(key, "tokens") == [1, 2]
+    assert cache.copy_to(key, "c", str(tmp_path / "copie.c"))
+    assert (tmp_path / "copie.c").read_bytes() == b"x" * 10
+    assert cache.stats == {"hits": 2, "misses": 2, "writes": 2, "evictions": 0, "errors": 0}
+
+
+# Over max_bytes, the least recently used entries go first : a read makes an entry the most recent
+def test_least_recently_used_evicted_first(tmp_path):
+    cache = CompileCache(str(tmp_path / "cache"), max_bytes=300)
+    keys = [cache.key(name) for name in ("a", "b", "c", "d")]
+    for used, key in enumerate(keys[:3]):
+        put_bytes(cache, tmp_path, key, 100)
+        os.utime(cache.path(key, "c"), (1000 + used, 1000 + used))  # a, then b, then c
+    assert cache.lookup(keys[0], "c")  # a used last
+    put_bytes(cache, tmp_path, keys[3], 100)
+    assert cache.stats["evictions"] == 1
+    assert [cache.lookup(key, "c") is not None for key in keys] == [True, False, True, True]
+
+    put_bytes(cache, tmp_path, cache.key("e"), 250)  # the three older entries go to make room
+    assert [cache.lookup(key, "c") is not None for key in keys] == [False, False, False, False]
+    assert cache.stats["evictions"] == 4
+    assert sum(size for _, size, _ in cache.entries()) <= 300
+
+
+# A source already compiled skips its stages : parsing when its AST is cached, everything when its C is
+def test_stages_skipped_on_hit(tmp_path):
+    cache = CompileCache(str(tmp_path / "cache"))
+    code = "a -> 2\ndrawSquare(a, 100, 3)\n"
+    stages = []
+    assert same_tree(parse_source(code, cache, stages.append), parse(code))
+    assert stages == ["tokenize", "parse"]
+    stages.clear()
+    assert same_tree(parse_source(code, cache, stages.append), parse(code))
+    assert stages == []
+
+    c_path = str(tmp_path / "programme.c")
+    assert not compile_to_file(code, c_path, PRELUDE, cache=cache, progress=stages.append)
+    assert stages == ["optimize", "translate", "write"]  # tokens and AST from the cache
+    with open(c_path) as file:
+        c_code = file.read()
+    os.unlink(c_path)
+    stages.clear()
+    assert compile_to_file(code, c_path, PRELUDE, cache=cache, progress=stages.append)
+    assert stages == []
+    with open(c_path) as file:
+        assert file.read() == c_code
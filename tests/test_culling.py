@@ -0,0 +1,26 @@
+import pytest
+
+np = pytest.importorskip("numpy")  # the raster backend needs NumPy
+
+from drawpp import Optimizer, Culler  # noqa: E402
+from drawpp.raster import render  # noqa: E402
+from programs import parse, random_programs  # noqa: E402
+
+MAX_STEPS = 200000
+
+
+# Pixels of every random program are the same without and with the Optimizer and the Culler
+@pytest.mark.parametrize("seed", range(8))
+def test_culled_programs_draw_the_same_pixels(seed):
+    removed = 0
+    for code in random_programs(seed, 40):
+        ast = parse(code)
+        try:
+            expected = render(ast, max_steps=MAX_STEPS).pixels
+        except (NameError, ZeroDivisionError, RuntimeError):
+            continue  # undefined variable, division by zero, too many steps
+        culler = Culler()
+        culled = culler.cull(Optimizer().optimize(ast))
+        assert np.array_equal(render(culled, max_steps=MAX_STEPS).pixels, expected), code
+        removed += culler.stats["removed"]
+    assert removed > 0  # the programs give the Culler something to remove
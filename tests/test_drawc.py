@@ -0,0 +1,39 @@
+import os
+
+import drawc
+
+
+def write(path, code):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as file:
+        file.write(code)
+
+
+def test_output_path_for():
+    assert drawc.output_path_for(os.path.join("s", "a", "x.draw")) == os.path.join("s", "a", "x.c")
+    assert drawc.output_path_for(os.path.join("s", "a", "x.draw"), "out", "s") == os.path.join("out", "a", "x.c")
+    assert drawc.output_path_for("x.draw", "out") == os.path.join("out", "x.c")
+    assert drawc.glob_root(os.path.join("s", "**", "*.draw")) == "s"
+    assert drawc.glob_root(os.path.join("s", "a", "x.draw")) == os.path.join("s", "a")
+
+
+# Files of the same name in several folders of a pattern get their folders under -o
+def test_same_names_mirrored_under_output_dir(tmp_path, capsys):
+    for folder, size in (("a", 10), ("b", 20)):
+        write(str(tmp_path / "s" / folder / "x.draw"), f"drawSquare(100, 100, {size})\n")
+    output_dir = tmp_path / "out"
+    assert drawc.main([str(tmp_path / "s" / "**" / "*.draw"), "-o", str(output_dir), "-j", "2"]) == 0
+    for folder, size in (("a", 10), ("b", 20)):
+        with open(output_dir / folder / "x.c") as file:
+            assert f"drawSquare(renderer, 100, 100, {size});" in file.read()
+    assert "2 compilé(s)" in capsys.readouterr().out
+
+
+# Sources that would still be written to the same file are refused before anything is compiled
+def test_same_output_refused(tmp_path, capsys):
+    for folder in ("a", "b"):
+        write(str(tmp_path / folder / "x.draw"), "drawSquare(100, 100, 10)\n")
+    output_dir = tmp_path / "out"
+    assert drawc.main([str(tmp_path / "a" / "x.draw"), str(tmp_path / "b" / "x.draw"), "-o", str(output_dir)]) == 1
+    assert "Même fichier de sortie" in capsys.readouterr().err
+    assert not output_dir.exists()
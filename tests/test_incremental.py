@@ -0,0 +1,67 @@
+import random
+
+import pytest
+
+from drawpp import Parser, Tokenizer
+from drawpp.incremental import IncrementalParser
+from programs import parse, same_tree, statement
+
+# Lines that leave a statement open or broken : blocks, strings, expressions going on after a line break
+FRAGMENTS = [
+    "si a > 1 {", "} sinon {", "}", "pour i de 0 à 3 {", "tantque a < 2 {", 'afficher("début de texte',
+    'fin de texte", a)', "a -> a +", "+ 2", "drawSquare(1, 2", "3)", "", "@", "b -> 3",
+]
+
+
+def random_line(rng, fragments=0.3):
+    if rng.random() < fragments:
+        return rng.choice(FRAGMENTS)
+    return statement(rng, ["a", "b", "x", "y"], 2)  # no block : one line
+
+
+# Error of the text parsed whole, None when it is valid. The Parser stops on a "}" closing no block :
+# what is left makes the text invalid too.
+def whole_text_error(text):
+    try:
+        parser = Parser(Tokenizer(text).tokenize())
+        parser.parse()
+    except (SyntaxError, IndexError) as e:
+        return str(e)
+    if parser.peek().type != "EOF":
+        return "Accolade fermante sans accolade ouvrante"
+    return None
+
+
+# After every edit, the document and its AST are the ones of the edited text parsed whole. The errors of
+# an invalid text hold the one of the text parsed whole, at the same line : there may be more, segments
+# are tokenized on their own (the whole text is tokenized before it is parsed) and parsed after an error.
+@pytest.mark.parametrize("seed", range(12))
+def test_edits_parse_like_the_whole_text(seed):
+    rng = random.Random(seed)
+    lines = ["a -> 0", "b -> 0"] + [random_line(rng, 0) for _ in range(rng.randint(0, 60))]
+    parser = IncrementalParser("\n".join(lines))
+    invalid = 0
+    for _ in range(60):
+        broken = [number for number, line in enumerate(lines, 1) if line in FRAGMENTS]
+        if broken and rng.random() < 0.5:  # a fragment replaced by a statement
+            first, old_count, new_lines = rng.choice(broken), 1, [random_line(rng, 0)]
+        else:
+            first = rng.randint(1, len(lines))
+            old_count = rng.randint(0, min(3, len(lines) - first + 1))
+            new_lines = [random_line(rng) for _ in range(rng.randint(0 if old_count else 1, 3))] or [""]
+        parser.edit(first, old_count, "\n".join(new_lines))
+        lines[first - 1:first - 1 + old_count] = new_lines
+        text = "\n".join(lines)
+        assert parser.text() == text
+        assert parser.line_count == len(lines)
+
+        error = whole_text_error(text)
+        if error is None:
+            assert parser.errors() == []
+            assert same_tree(parser.program(), parse(text))
+        else:
+            line, message = IncrementalParser(text).errors()[0]
+            assert message.startswith(error)
+            assert (line, message) in parser.errors()
+            invalid += 1
+    assert 0 < invalid < 60
@@ -0,0 +1,209 @@
+import io
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from drawpp import Optimizer, BinaryExpression, ForLoop, Variable, CompileCache, compile_to_file, fold_constant, \
+    run_program, walk
+from drawpp.build import NativeBuilder, stub_sdl_options, executable_path_for
+from programs import PRELUDE, parse, random_programs
+
+STUB_DIR = os.path.join(os.path.dirname(PRELUDE), "sdl_stub")
+
+
+# int division of C : truncated toward 0, negative operands included
+DIVISION = """
+a -> 0 - 7
+afficher("%d", a / 2)
+afficher("%d", -7 / 2)
+afficher("%d", 7 / (0 - 2))
+afficher("%d", (0 - 7) / (0 - 2))
+afficher("%d", (0 - 1) / 3)
+afficher("%d", a / 2 * 2 + a - a / 2 * 2)
+"""
+
+# Results at the limits of a C int are folded, the ones past them are left to the C code
+BOUNDARIES = """
+a -> 2147483646 + 1
+b -> 0 - 2147483647 - 1
+afficher("%d", a)
+afficher("%d", b)
+afficher("%d", 46340 * 46340)
+afficher("%d", b / 2)
+afficher("%d", b + 2147483647)
+afficher("%d", (0 - 2147483647 - 1) / 2)
+"""
+
+# Values known before a si / tantque / pour are dropped where the block can change them
+CONTROL_FLOW = """
+n -> 3
+k -> 0
+tantque k < n {
+k -> k + 1
+}
+afficher("%d", k)
+s -> 0
+pour i de 1 à n + 7 {
+s -> s + i
+}
+afficher("%d", s)
+t -> 1
+pour i de 1 à 3 {
+t -> t * 2
+}
+afficher("%d", t)
+f -> 0
+si s > 50 {
+f -> 1
+} sinon {
+f -> 2
+}
+afficher("%d", f)
+g -> 4
+si s > 50 {
+g -> 4
+}
+afficher("%d", g)
+h -> 1
+si s < 50 {
+h -> 9
+}
+afficher("%d", h)
+"""
+
+PROGRAMS = {
+    "division": (DIVISION, "-3\n-3\n-3\n3\n0\n-7\n"),
+    "boundaries": (BOUNDARIES, "2147483647\n-2147483648\n2147395600\n-1073741824\n-1\n-1073741824\n"),
+    "control_flow": (CONTROL_FLOW, "3\n55\n8\n1\n4\n1\n"),
+}
+
+# "=" in a condition is the assignment of C : its variable is neither replaced nor known after it
+ASSIGNMENT_IN_CONDITION = """
+a -> 1
+si a = 3 {
+afficher("%d", a + 1)
+}
+afficher("%d", a)
+"""
+
+# Programs the VM does not run (C assignment in an expression), checked on the generated C only
+C_PROGRAMS = {
+    "assignment_in_condition": (ASSIGNMENT_IN_CONDITION, "4\n3\n"),
+}
+
+
+# (display list, printed text) of the VM
+def execute(ast):
+    output = io.StringIO()
+    items = run_program(ast, output)
+    return items, output.getvalue()
+
+
+@pytest.mark.parametrize("operator, left, right, value", [
+    ("/", 7, 2, 3),
+    ("/", -7, 2, -3),
+    ("/", 7, -2, -3),
+    ("/", -7, -2, 3),
+    ("/", -1, 3, 0),
+    ("/", 7.0, 2, 3.5),
+    ("+", 2147483646, 1, 2147483647),
+    ("-", -2147483647, 1, -2147483648),
+    ("*", 46340, 46340, 2147395600),
+    ("<", 1, 2, 1),
+    ("==", 2, 3, 0),
+])
+def test_fold_constant(operator, left, right, value):
+    assert fold_constant(operator, left, right) == value
+
+
+# Division by zero, results out of a C int, strings and non-finite floats stay to be computed at run time
+@pytest.mark.parametrize("operator, left, right", [
+    ("/", 1, 0),
+    ("+", 2147483647, 1),
+    ("-", -2147483648, 1),
+    ("*", 46341, 46341),
+    ("*", 65536, 65536),
+    ("/", -2147483648, -1),
+    ("*", 1e308, 10.0),
+    ("+", "texte", 1),
+])
+def test_fold_constant_refused(operator, left, right):
+    assert fold_constant(operator, left, right) is None
+
+
+@pytest.mark.parametrize("expression", ["2147483647 + 1", "0 - 2147483647 - 2", "46341 * 46341", "1 / 0"])
+def test_overflow_not_folded(expression):
+    assignment = Optimizer().optimize(parse(f"a -> {expression}")).body[0]
+    assert isinstance(assignment.value, BinaryExpression)
+
+
+@pytest.mark.parametrize("name", PROGRAMS)
+def test_optimized_program_runs_the_same(name):
+    code, expected = PROGRAMS[name]
+    ast = parse(code)
+    optimizer = Optimizer()
+    optimized = optimizer.optimize(ast)
+    assert execute(ast) == execute(optimized) == ([], expected)
+    assert optimizer.stats["constant_folding"] > 0
+
+
+def test_assignment_in_condition_not_replaced():
+    optimized = Optimizer().optimize(parse(ASSIGNMENT_IN_CONDITION))
+    condition = optimized.body[1].condition
+    assert isinstance(condition.left, Variable) and condition.left.name == "a"
+    assert isinstance(optimized.body[2].values[1], Variable)  # a is 3 now, not the 1 known before
+
+
+def nested_loops(depth, last):
+    loops = "".join(f"pour i{level} de 0 à {last} {{\n" for level in range(depth))
+    return f"s -> 0\n{loops}s -> s + 1\n{'}' * depth}\nafficher(\"%d\", s)"
+
+
+# Nested small loops are unrolled until the budget is spent, the loops around them are kept
+@pytest.mark.parametrize("depth, last", [(6, 7), (20, 1)])
+def test_nested_unrolling_within_budget(depth, last):
+    optimizer = Optimizer()
+    optimized = optimizer.optimize(parse(nested_loops(depth, last)))
+    assert optimizer.stats["loop_unrolling"] > 0
+    assert optimizer.stats["nodes_after"] <= optimizer.unroll_budget + optimizer.stats["nodes_before"]
+    assert any(isinstance(node, ForLoop) for node in walk(optimized))
+
+
+def test_nested_unrolling_runs_the_same():
+    ast = parse(nested_loops(12, 1))
+    optimized = Optimizer(unroll_budget=200).optimize(ast)
+    assert any(isinstance(node, ForLoop) for node in walk(optimized))
+    assert execute(optimized) == execute(ast) == ([], "4096\n")
+
+
+def test_small_nested_loops_unrolled():
+    optimized = Optimizer().optimize(parse(nested_loops(2, 3)))
+    assert not any(isinstance(node, ForLoop) for node in walk(optimized))
+    assert execute(optimized) == ([], "16\n")
+
+
+# Random programs draw and print the same without and with the Optimizer
+@pytest.mark.parametrize("seed", range(8))
+def test_random_programs_run_the_same(seed):
+    for code in random_programs(seed, 40):
+        ast = parse(code)
+        assert execute(Optimizer().optimize(ast)) == execute(ast), code
+
+
+# Output of the generated C, built against the stub SDL : format warnings are errors, a literal
+# of the wrong C type passed to printf fails the build
+@pytest.mark.skipif(shutil.which(os.environ.get("CC", "gcc")) is None, reason="no C compiler")
+@pytest.mark.parametrize("name", [*PROGRAMS, *C_PROGRAMS])
+def test_generated_c_prints_the_same(name, tmp_path):
+    code, expected = {**PROGRAMS, **C_PROGRAMS}[name]
+    builder = NativeBuilder(PRELUDE, CompileCache(str(tmp_path / "cache")), cflags=("-O2", "-Werror=format"),
+                            **stub_sdl_options(STUB_DIR))
+    for optimize in (False, True):
+        c_path = str(tmp_path / f"programme_{optimize}.c")
+        compile_to_file(code, c_path, PRELUDE, optimize=optimize, cull=False)
+        builder.build(c_path)
+        result = subprocess.run([executable_path_for(c_path)], capture_output=True, text=True, timeout=30)
+        assert result.returncode == 0
+        assert result.stdout == expected, (optimize, result.stdout)
@@ -0,0 +1,34 @@
+import time
+
+from drawpp import CompileCache, compile_to_file
+from drawpp.worker import CompileJob
+from programs import PRELUDE, chain_program, nested_program
+
+
+# Deep programs go through every stage with the cache : the tokens and the AST are stored, then the C
+# code comes from the cache, and the same AST read back gives the same C code with other options
+def test_deep_programs_compiled_with_cache(tmp_path):
+    for name, code in (("nested", nested_program(3000)), ("chain", chain_program(20000))):
+        output_path = tmp_path / f"{name}.c"
+        cache = CompileCache(str(tmp_path / "cache"))
+        assert compile_to_file(code, output_path, PRELUDE, cache=cache) is False
+        assert cache.stats["errors"] == 0
+        first = output_path.read_text()
+        assert compile_to_file(code, output_path, PRELUDE, cache=CompileCache(str(tmp_path / "cache"))) is True
+        assert output_path.read_text() == first
+
+        uncached_path = tmp_path / f"{name}_uncached.c"
+        compile_to_file(code, uncached_path, PRELUDE, optimize=False)
+        compile_to_file(code, output_path, PRELUDE, optimize=False, cache=CompileCache(str(tmp_path / "cache")))
+        assert output_path.read_text() == uncached_path.read_text()
+
+
+# Path of the editor : compile in a worker process with the default cache
+def test_deep_program_compiled_by_job(tmp_path, monkeypatch):
+    monkeypatch.setenv("DRAWPP_CACHE_DIR", str(tmp_path / "cache"))
+    job = CompileJob(nested_program(500), str(tmp_path / "job.c"), PRELUDE)
+    deadline = time.monotonic() + 60
+    while not job.poll():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    assert job.result == ("done", False)
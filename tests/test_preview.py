@@ -0,0 +1,94 @@
+import random
+
+import pytest
+
+from drawpp.incremental import IncrementalParser
+from drawpp.preview import Preview, canvas_item, BLACK, CURSOR_COLOR
+from drawpp.vm import run_program
+
+STATEMENTS = [
+    "drawCircle(x, y, 3)", "moveCursor(5, 2)", "a -> a + 1", "a -> 1", "b -> a * 2", "drawSquare(a, b, 4)",
+    "drawCursor(x, y)", "pour i de 1 à 3 {\n drawLine(i, a, i, 9)\n}", "drawArc(10, 20, 30, 0, a)",
+    "si a > 3 {\n drawCircle(a, a, 2)\n}", "rotateCursor(30)", "drawLine(x, y, dx, dy)",
+]
+
+
+# Items kept in their stacking order, bottom first, like the display list of a tk.Canvas
+class StackingCanvas:
+    def __init__(self):
+        self.items = {}
+        self.stack = []
+        self.count = 0
+
+    def create(self, item_type, *coords, **options):
+        self.count += 1
+        self.items[self.count] = [item_type, coords, options]
+        self.stack.append(self.count)
+        return self.count
+
+    def __getattr__(self, name):
+        if name.startswith("create_"):
+            return lambda *coords, **options: self.create(name[len("create_"):], *coords, **options)
+        raise AttributeError(name)
+
+    def coords(self, item_id, *coords):
+        self.items[item_id][1] = coords
+
+    def itemconfigure(self, item_id, **options):
+        self.items[item_id][2].update(options)
+
+    def delete(self, *item_ids):
+        for item_id in item_ids:
+            del self.items[item_id]
+            self.stack.remove(item_id)
+
+    def tag_raise(self, item_id, above):
+        self.stack.remove(item_id)
+        self.stack.insert(self.stack.index(above) + 1, item_id)
+
+    def tag_lower(self, item_id):
+        self.stack.remove(item_id)
+        self.stack.insert(0, item_id)
+
+    def drawing(self):
+        return [(item_type, tuple(coords), options) for item_type, coords, options in map(self.items.get, self.stack)]
+
+
+# Items of a full redraw, in drawing order
+def full_redraw(program):
+    color = BLACK
+    items = []
+    for shape in run_program(program):
+        if shape[0] == "drawCursor":
+            color = CURSOR_COLOR
+        item_type, coords, options = canvas_item(shape, color)
+        items.append((item_type, tuple(coords), dict(options)))
+    return items
+
+
+@pytest.mark.parametrize("seed", range(12))
+def test_edits_keep_the_order_of_a_full_redraw(seed):
+    rng = random.Random(seed)
+    lines = ["a -> 0", "b -> 0"] + [rng.choice(STATEMENTS) for _ in range(rng.randint(1, 200))]
+    parser = IncrementalParser("\n".join(lines))
+    canvas = StackingCanvas()
+    preview = Preview(canvas)
+    preview.group_size = rng.choice([1, 4, 64])
+    preview.update(parser.program())
+    assert canvas.drawing() == full_redraw(parser.program())
+
+    for _ in range(30):
+        line_count = parser.line_count
+        first = rng.randint(3, line_count)
+        old_count = rng.randint(0, min(3, line_count - first + 1))
+        new_lines = [rng.choice(STATEMENTS) for _ in range(rng.randint(0 if old_count else 1, 3))]
+        parser.edit(first, old_count, "\n".join(new_lines))
+        if parser.errors():
+            continue
+        program = parser.program()
+        try:
+            expected = full_redraw(program)
+        except (NameError, ZeroDivisionError, RuntimeError):
+            continue  # raised by update too, the items stay as they are
+        preview.update(program)
+        assert canvas.drawing() == expected
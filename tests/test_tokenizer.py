@@ -0,0 +1,90 @@
+import mmap
+import random
+
+import pytest
+
+from drawpp import Token, Tokenizer
+from programs import random_program
+
+SOURCE = 'x -> 12\n  si x > 3 {\n\tafficher("a\nb", x)\n}'
+
+# (type, value, line, column) of every token of SOURCE : columns count characters from 1, a tab is one
+POSITIONS = [
+    ("VARIABLE", "x", 1, 1),
+    ("ASSIGNATION", "->", 1, 3),
+    ("NOMBRE", "12", 1, 6),
+    ("SI", "si", 2, 3),
+    ("VARIABLE", "x", 2, 6),
+    ("OPERATEUR", ">", 2, 8),
+    ("NOMBRE", "3", 2, 10),
+    ("ACCOLADE_OUV", "{", 2, 12),
+    ("AFFICHER", "afficher", 3, 2),
+    ("PARENTHESE_OUV", "(", 3, 10),
+    ("CHAINE", '"a\nb"', 3, 11),  # a string holding a line break : what follows is on the next line
+    ("VIRGULE", ",", 4, 3),
+    ("VARIABLE", "x", 4, 5),
+    ("PARENTHESE_FERM", ")", 4, 6),
+    ("ACCOLADE_FERM", "}", 5, 1),
+    ("EOF", None, 5, 2),
+]
+
+
+def test_token_positions():
+    tokens = list(Tokenizer(SOURCE).iter_tokens())
+    assert all(isinstance(token, Token) for token in tokens)
+    assert [tuple(token) for token in tokens] == POSITIONS
+    assert Tokenizer(SOURCE).tokenize() == tokens
+
+
+# Lines are counted from first_line for a part of a bigger document, columns do not change
+def test_token_positions_from_first_line():
+    tokens = Tokenizer(SOURCE, first_line=10).tokenize()
+    assert [(line, column) for _, _, line, column in tokens] == [(line + 9, column) for *_, line, column in POSITIONS]
+
+
+def test_unexpected_character_position():
+    with pytest.raises(SyntaxError, match="ligne 2, colonne 4"):
+        Tokenizer("x -> 1\ny  @").tokenize()
+
+
+# Multibyte characters (2 bytes for "à" and "é", 4 for the emoji), strings with line breaks, longer than
+# a chunk, numbers and words that a cut would change ("12" + ".5", "si" + "non", "3si" : the "\b" of
+# "si" looks at the "3" before it)
+CHUNKED_SOURCE = (
+    'pour i de 0 à 12 {\n'
+    '  afficher("Étape numéro %d : un texte bien plus long qu\'un morceau 🎨\n'
+    'sur deux lignes", i)\n'
+    '  si i > 3 {\n  drawSquare(i * 12.5, 100, 3)\n  } sinon {\n  dessinée -> 1.25\n  }\n'
+    '}\nvaleur_très_longue_pour_dépasser_un_morceau -> 123456789\n'
+    'a -> 3si\nb -> 45sinon\n'
+)
+
+
+def buffer_tokens(tmp_path, code, chunk_size):
+    tokenizers = [Tokenizer(code), Tokenizer(code.encode("utf-8"))]
+    path = tmp_path / "programme.draw"
+    path.write_bytes(code.encode("utf-8"))
+    with open(path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        tokenizers.append(Tokenizer(mapped))
+        for tokenizer in tokenizers:
+            tokenizer.chunk_size = chunk_size
+        return [tokenizer.tokenize() for tokenizer in tokenizers]
+
+
+# A source read as str, bytes or mmap, in chunks of any size, gives the same tokens at the same positions
+@pytest.mark.parametrize("chunk_size", range(1, 18))
+def test_chunked_sources_give_same_tokens(tmp_path, chunk_size):
+    expected = Tokenizer(CHUNKED_SOURCE).tokenize()
+    assert any(token.type == "A" for token in expected) and any("🎨" in str(token.value) for token in expected)
+    for tokens in buffer_tokens(tmp_path, CHUNKED_SOURCE, chunk_size):
+        assert tokens == expected
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_chunked_random_programs(tmp_path, seed):
+    rng = random.Random(seed)
+    for chunk_size in (1, 2, 3, 5, 7, 11, 13, 17):
+        code = random_program(rng, 20)
+        expected = Tokenizer(code).tokenize()
+        for tokens in buffer_tokens(tmp_path, code, chunk_size):
+            assert tokens == expected, (chunk_size, code)
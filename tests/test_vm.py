@@ -0,0 +1,80 @@
+import io
+from array import array
+
+import pytest
+
+from drawpp.interpreter import Interpreter
+from drawpp.vm import CONST, DRAW, GLOBAL_SLOTS, PRINT, Bytecode, VM, run_program
+from programs import parse, random_programs
+
+
+# Canvas of the Interpreter keeping its draw calls as items of a display list
+class RecordingCanvas:
+    def __init__(self):
+        self.items = []
+
+    def draw_square(self, *params):
+        self.items.append(("drawSquare", *params))
+
+    def draw_circle(self, *params):
+        self.items.append(("drawCircle", *params))
+
+    def draw_line(self, *params):
+        self.items.append(("drawLine", *params))
+
+    def draw_arc(self, *params):
+        self.items.append(("drawArc", *params))
+
+    def draw_cursor(self, *params):
+        self.items.append(("drawCursor", *params))
+
+
+# (display list, printed text) of the Interpreter, or the type of the error it stopped on
+def interpret(ast):
+    canvas, output = RecordingCanvas(), io.StringIO()
+    try:
+        Interpreter(canvas, output).run(ast)
+    except (NameError, ZeroDivisionError) as e:
+        return type(e)
+    return canvas.items, output.getvalue()
+
+
+def execute(ast):
+    output = io.StringIO()
+    try:
+        items = run_program(ast, output)
+    except (NameError, ZeroDivisionError) as e:
+        return type(e)
+    return items, output.getvalue()
+
+
+# The VM draws and prints what the Interpreter does, and stops on the same errors
+@pytest.mark.parametrize("seed", range(8))
+def test_vm_matches_interpreter(seed):
+    drawn = 0
+    for code in random_programs(seed, 40):
+        ast = parse(code)
+        expected = interpret(ast)
+        assert execute(ast) == expected, code
+        if isinstance(expected, tuple):
+            drawn += len(expected[0])
+    assert drawn > 0
+
+
+def test_print_formats_like_interpreter():
+    ast = parse('a -> 7\nafficher("a vaut %d", a)\nafficher("sans valeur")\nafficher("a", a + 1)\n'
+                'drawSquare(a, a, 3)')
+    assert execute(ast) == interpret(ast) == ([("drawSquare", 7, 7, 3)], "a vaut 7\nsans valeur\na 8\n")
+
+
+def test_empty_print_rejected():
+    with pytest.raises(SyntaxError):
+        parse("afficher()")
+
+
+# A PRINT without operand takes nothing from the stack
+def test_print_without_values_keeps_stack():
+    bytecode = Bytecode(array("i", [CONST, 0, CONST, 1, CONST, 2, PRINT, 0, DRAW, 0]), [1, 2, 3], len(GLOBAL_SLOTS))
+    output = io.StringIO()
+    assert VM(output).run(bytecode) == [("drawSquare", 1, 2, 3)]
+    assert output.getvalue() == "\n"